@@ -15,5 +15,5 @@ echo ""
 echo "Press Ctrl+C to stop the server"
 echo ""
 
-python src/api/main.py
+python -m src.api.server --host 0.0.0.0 --port 8000
 
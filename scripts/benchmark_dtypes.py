@@ -0,0 +1,204 @@
+"""
+Memory and throughput benchmark for the compact feature schema
+Builds a synthetic dataset (one million rows by default) and compares
+(1) the memory of the feature frame with pandas default dtypes against
+FEATURE_DTYPES, and (2) preprocessing plus scoring throughput of logistic
+regression and random forest with float64 and float32 feature matrices,
+for both the pickled models and the compiled artifact.
+
+Usage:
+    python scripts/benchmark_dtypes.py --rows 1000000 --output dtypes.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.models.compiled import compile_model  # noqa: E402
+from src.models.inference import score_matrix  # noqa: E402
+from src.utils.features import (  # noqa: E402
+    FEATURE_COLUMNS,
+    MATRIX_DTYPES,
+    apply_feature_schema,
+)
+from src.utils.preprocessing import HeartDiseasePreprocessor  # noqa: E402
+
+# Value ranges of the synthetic features: (low, high) codes for categorical
+# columns, (mean, std) for continuous ones
+CATEGORICAL_RANGES = {
+    "sex": (0, 1),
+    "cp": (0, 3),
+    "fbs": (0, 1),
+    "restecg": (0, 2),
+    "exang": (0, 1),
+    "slope": (0, 2),
+    "ca": (0, 3),
+    "thal": (0, 3),
+}
+CONTINUOUS_MOMENTS = {
+    "age": (54.0, 9.0),
+    "trestbps": (131.0, 17.0),
+    "chol": (246.0, 51.0),
+    "thalach": (150.0, 23.0),
+    "oldpeak": (1.0, 1.2),
+}
+
+
+def synthetic_frame(n_rows, seed=0):
+    """Feature frame with pandas default dtypes, as read_csv returns it"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name in FEATURE_COLUMNS:
+        if name in CATEGORICAL_RANGES:
+            low, high = CATEGORICAL_RANGES[name]
+            columns[name] = rng.integers(low, high + 1, size=n_rows)
+        else:
+            mean, std = CONTINUOUS_MOMENTS[name]
+            columns[name] = np.round(rng.normal(mean, std, size=n_rows), 1)
+    return pd.DataFrame(columns)
+
+
+def synthetic_target(df, seed=0):
+    """Binary target loosely tied to a few features"""
+    rng = np.random.default_rng(seed + 1)
+    score = (
+        0.04 * (df["age"] - 54)
+        + 0.8 * df["cp"]
+        + 0.9 * df["ca"]
+        - 0.03 * (df["thalach"] - 150)
+        + rng.normal(0, 1, len(df))
+    )
+    return (score > score.median()).astype(int)
+
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024.0**2
+
+
+def train_models(df, y, train_rows):
+    """Fit LR and RF on a sample and return (name, model, preprocessor)"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    sample = df.iloc[:train_rows]
+    preprocessor = HeartDiseasePreprocessor()
+    X_train = preprocessor.fit_transform(sample).to_numpy()
+    y_train = y.iloc[:train_rows]
+
+    return [
+        (
+            "logistic_regression",
+            LogisticRegression(max_iter=1000).fit(X_train, y_train),
+            preprocessor,
+        ),
+        (
+            "random_forest",
+            RandomForestClassifier(n_estimators=100, random_state=0).fit(
+                X_train, y_train
+            ),
+            preprocessor,
+        ),
+    ]
+
+
+def time_scoring(model, preprocessor, X, chunk_rows, repeats):
+    """Best-of-N seconds to preprocess and score X chunk by chunk"""
+    best = float("inf")
+    probabilities = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        parts = []
+        for start in range(0, len(X), chunk_rows):
+            chunk = X[start : start + chunk_rows].copy()
+            parts.append(score_matrix(model, preprocessor, chunk)[1])
+        best = min(best, time.perf_counter() - start_time)
+        probabilities = np.concatenate(parts)
+    return best, probabilities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature dtype benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    print(f"Generating {args.rows} synthetic rows...")
+    df = synthetic_frame(args.rows)
+    y = synthetic_target(df)
+    compact = apply_feature_schema(df)
+
+    memory = {
+        "default_mb": frame_memory_mb(df),
+        "schema_mb": frame_memory_mb(compact),
+    }
+    print(
+        f"\nFeature frame: {memory['default_mb']:.1f} MB with default dtypes, "
+        f"{memory['schema_mb']:.1f} MB with FEATURE_DTYPES "
+        f"({memory['default_mb'] / memory['schema_mb']:.1f}x smaller)"
+    )
+
+    results = []
+    for name, model, preprocessor in train_models(compact, y, args.train_rows):
+        compiled = compile_model(model, preprocessor)
+        scorers = {
+            "pickle": (model, preprocessor),
+            "compiled": (compiled.scorer, compiled.preprocessor),
+        }
+        for form, (scorer, scorer_preprocessor) in scorers.items():
+            reference = None
+            for dtype in MATRIX_DTYPES:
+                X = compact.to_numpy(dtype=dtype)
+                seconds, probabilities = time_scoring(
+                    scorer, scorer_preprocessor, X, args.chunk_rows, args.repeats
+                )
+                if reference is None:
+                    reference = probabilities
+                results.append(
+                    {
+                        "model": name,
+                        "form": form,
+                        "dtype": dtype,
+                        "matrix_mb": X.nbytes / 1024.0**2,
+                        "seconds": seconds,
+                        "rows_per_second": len(X) / seconds,
+                        "max_abs_probability_diff": float(
+                            np.max(np.abs(probabilities - reference))
+                        ),
+                    }
+                )
+
+    print(
+        f"\n{'model':<22}{'form':<10}{'dtype':<9}{'matrix MB':>10}"
+        f"{'rows/sec':>14}{'max |dp|':>12}"
+    )
+    for row in results:
+        print(
+            f"{row['model']:<22}{row['form']:<10}{row['dtype']:<9}"
+            f"{row['matrix_mb']:>10.1f}{row['rows_per_second']:>14.0f}"
+            f"{row['max_abs_probability_diff']:>12.2e}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"rows": args.rows, "memory": memory, "scoring": results}, f, indent=2
+            )
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
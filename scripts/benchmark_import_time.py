@@ -0,0 +1,99 @@
+"""
+Import-time benchmark for the serving path
+Runs `python -X importtime` on the API module and fails when the
+cumulative import time exceeds a budget or heavy training-only
+libraries are pulled in.
+
+Usage:
+    python scripts/benchmark_import_time.py --budget-ms 2000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Libraries the serving path must not import at module load time
+FORBIDDEN_MODULES = ("pandas", "sklearn", "joblib", "mlflow", "scipy")
+
+
+def measure_import_time(module, repeat=3):
+    """
+    Measure the cumulative import time of a module in fresh interpreters
+
+    Args:
+        module: Dotted module name to import
+        repeat: Number of runs; the fastest one is reported
+
+    Returns:
+        Tuple of (best cumulative time in ms, {module: cumulative ms}, imported
+        forbidden modules)
+    """
+    code = (
+        f"import {module}, sys; "
+        f"print(','.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))"
+    )
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+
+    best_total, best_modules, forbidden = None, {}, []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-W", "ignore", "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=PROJECT_ROOT,
+            env=env,
+            check=True,
+        )
+
+        modules = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, name = line[len("import time:") :].split("|")
+            modules[name.strip()] = int(cumulative) / 1000.0
+
+        total = modules[module]
+        if best_total is None or total < best_total:
+            best_total, best_modules = total, modules
+        forbidden = [m for m in result.stdout.strip().split(",") if m]
+
+    return best_total, best_modules, forbidden
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serving import-time benchmark")
+    parser.add_argument("--module", default="src.api.main")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "2000")),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    total, modules, forbidden = measure_import_time(args.module, args.repeat)
+
+    print(f"Import time for {args.module}: {total:.1f} ms (budget {args.budget_ms} ms)")
+    print(f"\nTop {args.top} top-level imports by cumulative time:")
+    top_level = {name: ms for name, ms in modules.items() if "." not in name}
+    for name, ms in sorted(top_level.items(), key=lambda x: -x[1])[: args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    if forbidden:
+        print(f"\nFAIL: serving path imported {', '.join(forbidden)}")
+        failed = True
+    if total > args.budget_ms:
+        print(f"\nFAIL: import time exceeds budget of {args.budget_ms} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Per-worker memory benchmark for model loading strategies
+Starts several worker processes that each load the same random forest as
+(1) the joblib pickle, (2) the compiled artifact copied into memory, and
+(3) the compiled artifact memory-mapped read-only, then reports RSS, PSS
+and private memory per worker.
+
+RSS counts shared file-backed pages in full for every process, so the
+saving from memory-mapping shows up in PSS (proportional share) and
+private memory rather than in RSS.
+
+Usage:
+    python scripts/benchmark_model_memory.py --workers 4 --n-estimators 200
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+MODES = ("pickle", "compiled", "compiled-mmap")
+
+
+def read_memory_mb():
+    """Return RSS, PSS and private memory of this process in MB (Linux)"""
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) / 1024.0
+    except OSError:
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        return {"rss": rss, "pss": float("nan"), "private": float("nan")}
+
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def worker(mode, paths, X, ready, done, results):
+    """Load the model in one mode, score once, and report memory"""
+    import warnings
+
+    import joblib
+
+    from src.models.compiled import CompiledModel
+    from src.utils.preprocessing import HeartDiseasePreprocessor
+
+    before = read_memory_mb()
+
+    if mode == "pickle":
+        model = joblib.load(paths["model"])
+        preprocessor = HeartDiseasePreprocessor.load(paths["preprocessor"])
+    else:
+        compiled = CompiledModel.load(
+            paths["compiled"], mmap_mode="r" if mode == "compiled-mmap" else None
+        )
+        model, preprocessor = compiled.scorer, compiled.preprocessor
+
+    # Score once so every page of the model has been touched
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    model.predict_proba(preprocessor.transform_array(X.copy()))
+
+    # Measure while all workers hold the model, so shared pages are split
+    ready.wait()
+    after = read_memory_mb()
+    results.put({key: after[key] - before[key] for key in after})
+    done.wait()
+
+
+def run_mode(mode, paths, X, n_workers):
+    """Run n_workers processes for one loading mode and collect their memory"""
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Barrier(n_workers)
+    done = ctx.Barrier(n_workers + 1)
+    results = ctx.Queue()
+
+    processes = [
+        ctx.Process(target=worker, args=(mode, paths, X, ready, done, results))
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+
+    measurements = [results.get() for _ in range(n_workers)]
+    done.wait()
+    for process in processes:
+        process.join()
+
+    return {
+        key: float(np.mean([m[key] for m in measurements]))
+        for key in ("rss", "pss", "private")
+    }
+
+
+def build_artifacts(directory, n_estimators, n_samples):
+    """Train a synthetic random forest and save it in every format"""
+    import joblib
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
+    from src.models.compiled import compile_model
+    from src.utils.preprocessing import FEATURE_COLUMNS, HeartDiseasePreprocessor
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(n_samples, 13)), columns=FEATURE_COLUMNS)
+    y = (X["age"] + rng.normal(scale=2.0, size=n_samples) > 0).astype(int)
+
+    preprocessor = HeartDiseasePreprocessor()
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=0, n_jobs=-1)
+    model.fit(preprocessor.fit_transform(X), y)
+
+    paths = {
+        "model": directory / "production_model.pkl",
+        "preprocessor": directory / "preprocessor.pkl",
+        "compiled": directory / "compiled_model",
+    }
+    joblib.dump(model, paths["model"])
+    preprocessor.save(paths["preprocessor"])
+    compile_model(model, preprocessor).save(paths["compiled"])
+
+    return {key: str(path) for key, path in paths.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker model memory benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--n-samples", type=int, default=20000)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(
+            f"Training random forest with {args.n_estimators} trees "
+            f"on {args.n_samples} rows..."
+        )
+        paths = build_artifacts(Path(tmp), args.n_estimators, args.n_samples)
+        X = np.random.default_rng(1).normal(size=(256, 13))
+
+        results = {}
+        for mode in MODES:
+            results[mode] = run_mode(mode, paths, X, args.workers)
+
+    print(f"\nMemory added per worker by model loading ({args.workers} workers)")
+    print(f"{'mode':<16}{'RSS MB':>10}{'PSS MB':>10}{'private MB':>12}")
+    for mode, memory in results.items():
+        print(
+            f"{mode:<16}{memory['rss']:>10.1f}{memory['pss']:>10.1f}"
+            f"{memory['private']:>12.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"workers": args.workers, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
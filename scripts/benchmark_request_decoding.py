@@ -0,0 +1,133 @@
+"""
+Per-request decoding overhead of the prediction API
+Times turning a JSON body into a feature matrix and a response back into
+bytes, for the compiled path used by the API (TypeAdapter.validate_json into
+a preallocated row, orjson) and for the previous path (json.loads, model
+validation, attribute reads into a new array, response model, stdlib json).
+The model itself is not run.
+
+Usage:
+    python scripts/benchmark_request_decoding.py --batch-sizes 1 32 256
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.api.decoding import decode_batch, decode_record  # noqa: E402
+from src.api.main import (  # noqa: E402
+    BATCH_ADAPTER,
+    BATCH_ENVELOPE_ADAPTER,
+    INPUT_ADAPTER,
+    BatchPredictionItem,
+    BatchPredictionResponse,
+    HeartDiseaseInput,
+    PredictionResponse,
+)
+from src.utils.features import FEATURE_COLUMNS  # noqa: E402
+
+RECORD = HeartDiseaseInput.model_json_schema()["example"]
+
+
+def previous_single(body):
+    record = HeartDiseaseInput.model_validate(json.loads(body))
+    X = np.array([[getattr(record, name) for name in FEATURE_COLUMNS]])
+    response = PredictionResponse(prediction=1, probability=0.7, confidence="High")
+    return X, json.dumps(jsonable_encoder(response)).encode()
+
+
+def compiled_single(body):
+    row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+    decode_record(INPUT_ADAPTER, body, row[0])
+    response = {"prediction": 1, "probability": 0.7, "confidence": "High"}
+    return row, orjson.dumps(response)
+
+
+def previous_batch(body):
+    records = json.loads(body)["records"]
+    rows = []
+    for record in records:
+        validated = HeartDiseaseInput.model_validate(record)
+        rows.append([getattr(validated, name) for name in FEATURE_COLUMNS])
+    X = np.array(rows, dtype=np.float64)
+    response = BatchPredictionResponse(
+        results=[
+            BatchPredictionItem(
+                index=i, prediction=1, probability=0.7, confidence="High"
+            )
+            for i in range(len(rows))
+        ]
+    )
+    return X, json.dumps(jsonable_encoder(response)).encode()
+
+
+def compiled_batch(body):
+    n_records, X, _, _ = decode_batch(
+        BATCH_ADAPTER,
+        BATCH_ENVELOPE_ADAPTER,
+        INPUT_ADAPTER,
+        body,
+        len(FEATURE_COLUMNS),
+        max_records=1_000_000,
+    )
+    results = [
+        {
+            "index": i,
+            "prediction": 1,
+            "probability": 0.7,
+            "confidence": "High",
+            "errors": None,
+        }
+        for i in range(n_records)
+    ]
+    return X, orjson.dumps({"results": results})
+
+
+def time_call(fn, body, seconds=1.0):
+    """Mean microseconds per call, measured for about the given time"""
+    timer = timeit.Timer(lambda: fn(body))
+    number, _ = timer.autorange()
+    number = max(1, int(number * seconds / 0.2))
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request decoding benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    results = []
+    for batch_size in args.batch_sizes:
+        if batch_size == 1:
+            body = json.dumps(RECORD).encode()
+            paths = {"previous": previous_single, "compiled": compiled_single}
+        else:
+            body = json.dumps({"records": [RECORD] * batch_size}).encode()
+            paths = {"previous": previous_batch, "compiled": compiled_batch}
+
+        timings = {name: time_call(fn, body) for name, fn in paths.items()}
+        results.append({"batch_size": batch_size, "microseconds": timings})
+        print(
+            f"  batch={batch_size:<5} previous={timings['previous']:9.1f}us  "
+            f"compiled={timings['compiled']:9.1f}us  "
+            f"({timings['previous'] / timings['compiled']:.1f}x)"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Per-call cost of the scoring core
+Compares the previous inference path (preprocess, model.predict, then
+model.predict_proba and a confidence lookup) with score_matrix, which
+derives the class, probability and confidence band from one predict_proba
+pass, for logistic regression and random forest at several batch sizes.
+
+Usage:
+    python scripts/benchmark_scoring.py --batch-sizes 1 32 1000
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.models.inference import get_confidence_level, score_matrix  # noqa: E402
+from src.utils.features import FEATURE_COLUMNS  # noqa: E402
+from src.utils.preprocessing import HeartDiseasePreprocessor  # noqa: E402
+
+
+def training_data(n_rows=1000, seed=0):
+    """Random features with a target tied to a few of them"""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(
+        rng.normal(size=(n_rows, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS
+    )
+    y = (X["age"] + X["cp"] - X["thalach"] + rng.normal(0, 1, n_rows) > 0).astype(int)
+    return X, y
+
+
+def previous_path(model, preprocessor, X):
+    """Two model passes: predict for the class, predict_proba for the score"""
+    X_processed = preprocessor.transform_array(X)
+    predictions = model.predict(X_processed)
+    probabilities = model.predict_proba(X_processed)[:, 1]
+    confidences = [get_confidence_level(p) for p in probabilities]
+    return predictions, probabilities, confidences
+
+
+def single_pass(model, preprocessor, X):
+    return score_matrix(model, preprocessor, X.copy())
+
+
+def time_call(fn, *args, seconds=1.0):
+    """Mean microseconds per call, measured for about the given time"""
+    timer = timeit.Timer(lambda: fn(*args))
+    number, _ = timer.autorange()
+    number = max(1, int(number * seconds / 0.2))
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring core benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1000])
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    X_train, y_train = training_data()
+    preprocessor = HeartDiseasePreprocessor()
+    X_processed = np.asarray(preprocessor.fit_transform(X_train))
+    models = {
+        "logistic_regression": LogisticRegression(max_iter=1000),
+        "random_forest": RandomForestClassifier(
+            n_estimators=args.n_estimators, random_state=42
+        ),
+    }
+
+    results = []
+    for name, model in models.items():
+        model.fit(X_processed, y_train)
+        print(name)
+        for batch_size in args.batch_sizes:
+            X = X_train.to_numpy()[np.arange(batch_size) % len(X_train)]
+
+            # Both paths must agree before their cost is compared
+            for expected, result in zip(
+                previous_path(model, preprocessor, X),
+                single_pass(model, preprocessor, X),
+            ):
+                np.testing.assert_array_equal(np.asarray(result), np.asarray(expected))
+
+            timings = {
+                "previous": time_call(previous_path, model, preprocessor, X),
+                "single_pass": time_call(single_pass, model, preprocessor, X),
+            }
+            results.append(
+                {"model": name, "batch_size": batch_size, "microseconds": timings}
+            )
+            print(
+                f"  batch={batch_size:<5} "
+                f"previous={timings['previous']:9.1f}us  "
+                f"single_pass={timings['single_pass']:9.1f}us  "
+                f"({timings['previous'] / timings['single_pass']:.2f}x)"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
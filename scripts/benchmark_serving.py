@@ -0,0 +1,457 @@
+"""
+End-to-end serving benchmark for the prediction API
+Drives /predict (batch size 1) or /predict/batch (larger batch sizes) at a
+range of concurrency levels and reports throughput and p50/p95/p99 latency.
+
+Three targets are supported:
+    inprocess  the FastAPI app called through httpx's ASGI transport, which
+               measures the application without any network or server cost
+    uvicorn    a local uvicorn server started for the run, which adds HTTP
+               parsing and the loopback network
+    prefork    the production server (src/api/server.py), once per worker
+               count given with --workers, to show how throughput scales
+
+Results are written as JSON so runs can be compared; --baseline compares
+against an earlier result file and exits non-zero on a regression.
+
+Usage:
+    python scripts/benchmark_serving.py --target inprocess uvicorn \
+        --concurrency 1 8 32 --batch-sizes 1 32 --requests 2000 \
+        --output benchmark_serving.json
+    python scripts/benchmark_serving.py --target prefork --workers 1 2 4 \
+        --concurrency 32 --batch-sizes 1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+TARGETS = ("inprocess", "uvicorn", "prefork")
+
+# Value ranges used to generate valid, varied request bodies
+FEATURE_RANGES = {
+    "age": (29, 77),
+    "sex": (0, 1),
+    "cp": (0, 3),
+    "trestbps": (94, 200),
+    "chol": (126, 564),
+    "fbs": (0, 1),
+    "restecg": (0, 2),
+    "thalach": (71, 202),
+    "exang": (0, 1),
+    "oldpeak": (0.0, 6.2),
+    "slope": (0, 2),
+    "ca": (0, 3),
+    "thal": (0, 3),
+}
+
+
+def generate_records(n, seed=0):
+    """Generate n random patient records that pass input validation"""
+    rng = np.random.default_rng(seed)
+    records = []
+    for _ in range(n):
+        record = {}
+        for name, (low, high) in FEATURE_RANGES.items():
+            if isinstance(low, float):
+                record[name] = round(float(rng.uniform(low, high)), 1)
+            else:
+                record[name] = int(rng.integers(low, high + 1))
+        records.append(record)
+    return records
+
+
+def summarize(latencies, duration, n_requests, batch_size, errors):
+    """
+    Summarize one scenario
+
+    Args:
+        latencies: Per-request latencies in seconds
+        duration: Wall-clock duration of the scenario in seconds
+        n_requests: Number of requests sent
+        batch_size: Records per request
+        errors: Number of failed requests
+
+    Returns:
+        Dictionary of throughput and latency statistics
+    """
+    latencies_ms = np.asarray(latencies) * 1000.0
+    if len(latencies_ms) == 0:
+        latencies_ms = np.array([np.nan])
+
+    return {
+        "requests": n_requests,
+        "errors": errors,
+        "duration_seconds": duration,
+        "requests_per_second": n_requests / duration,
+        "rows_per_second": n_requests * batch_size / duration,
+        "latency_ms": {
+            "mean": float(np.mean(latencies_ms)),
+            "p50": float(np.percentile(latencies_ms, 50)),
+            "p95": float(np.percentile(latencies_ms, 95)),
+            "p99": float(np.percentile(latencies_ms, 99)),
+            "max": float(np.max(latencies_ms)),
+        },
+    }
+
+
+async def run_scenario(client, records, concurrency, batch_size, n_requests):
+    """Send n_requests from `concurrency` concurrent clients and time each one"""
+    if batch_size == 1:
+        url = "/predict"
+        bodies = records
+    else:
+        url = "/predict/batch"
+        bodies = [
+            {"records": records[i : i + batch_size]}
+            for i in range(0, len(records) - batch_size + 1, batch_size)
+        ]
+
+    latencies = []
+    errors = 0
+    counter = iter(range(n_requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            body = bodies[i % len(bodies)]
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=body)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    return summarize(latencies, duration, n_requests, batch_size, errors)
+
+
+async def run_target(client, args, records):
+    """Run every concurrency and batch size combination against one client"""
+    # Warm up connections, the model and any lazy imports
+    await run_scenario(client, records, 1, 1, args.warmup)
+
+    results = []
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            result = await run_scenario(
+                client, records, concurrency, batch_size, args.requests
+            )
+            result.update({"concurrency": concurrency, "batch_size": batch_size})
+            results.append(result)
+            print(
+                f"  batch={batch_size:<4} concurrency={concurrency:<4} "
+                f"{result['requests_per_second']:>9.1f} req/s "
+                f"{result['rows_per_second']:>10.1f} rows/s  "
+                f"p50={result['latency_ms']['p50']:.2f}ms "
+                f"p95={result['latency_ms']['p95']:.2f}ms "
+                f"p99={result['latency_ms']['p99']:.2f}ms "
+                f"errors={result['errors']}"
+            )
+    return results
+
+
+async def benchmark_inprocess(model_root, args, records):
+    """Benchmark the app through the ASGI transport, without a server"""
+    import httpx
+
+    os.chdir(model_root)
+    from src.api import main
+
+    await main.startup_event()
+    try:
+        if main.model_bundle is None:
+            raise RuntimeError(f"No model could be loaded from {model_root}/models")
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            # Measure the warmed-up model, as a load balancer would route to it
+            while (await client.get("/health/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+            return await run_target(client, args, records)
+    finally:
+        await main.shutdown_event()
+        os.chdir(PROJECT_ROOT)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def benchmark_uvicorn(model_root, args, records):
+    """Benchmark a local uvicorn server started for this run"""
+    port = _free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "src.api.main:app",
+        "--host",
+        "127.0.0.1",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+    ]
+    return await benchmark_server(command, port, model_root, args, records)
+
+
+async def benchmark_prefork(model_root, args, records):
+    """Benchmark the prefork server at every requested worker count"""
+    results = []
+    for workers in args.workers:
+        print(f" workers={workers}")
+        port = _free_port()
+        command = [
+            sys.executable,
+            "-m",
+            "src.api.server",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ]
+        for result in await benchmark_server(command, port, model_root, args, records):
+            results.append({"workers": workers, **result})
+    return results
+
+
+async def benchmark_server(command, port, model_root, args, records):
+    """Start a server process, wait until it is healthy and benchmark it"""
+    import httpx
+
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    server = subprocess.Popen(command, cwd=model_root, env=env)
+
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            deadline = time.monotonic() + args.startup_timeout
+            while True:
+                try:
+                    if (await client.get("/health/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError(f"{command[2]} did not become healthy")
+                await asyncio.sleep(0.1)
+
+            return await run_target(client, args, records)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def build_sample_model(directory):
+    """Train a logistic regression on synthetic data in directory/models"""
+    import joblib
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+
+    from src.models.compiled import compile_model
+    from src.utils.preprocessing import FEATURE_COLUMNS, HeartDiseasePreprocessor
+
+    X = pd.DataFrame(generate_records(2000, seed=1))[FEATURE_COLUMNS]
+    y = ((X["age"] > 55) ^ (X["cp"] == 0)).astype(int)
+
+    preprocessor = HeartDiseasePreprocessor()
+    model = LogisticRegression(max_iter=1000)
+    model.fit(np.asarray(preprocessor.fit_transform(X)), y)
+
+    models_dir = Path(directory) / "models"
+    models_dir.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, models_dir / "production_model.pkl")
+    preprocessor.save(models_dir / "preprocessor.pkl")
+    compile_model(model, preprocessor).save(models_dir / "compiled_model")
+
+
+def compare_to_baseline(results, baseline_path, max_regression):
+    """
+    Compare results with a baseline file
+
+    A scenario regresses when its throughput drops, or its p95 latency rises,
+    by more than max_regression (a fraction) relative to the baseline.
+
+    Returns:
+        List of regression descriptions
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def index(entries):
+        return {
+            (r["target"], r.get("workers"), r["concurrency"], r["batch_size"]): r
+            for r in entries["results"]
+        }
+
+    previous = index(baseline)
+    regressions = []
+    for key, current in index(results).items():
+        if key not in previous:
+            continue
+        before = previous[key]
+        name = f"{key[0]} batch={key[3]} concurrency={key[2]}"
+        if key[1] is not None:
+            name += f" workers={key[1]}"
+
+        throughput_ratio = current["rows_per_second"] / before["rows_per_second"]
+        if throughput_ratio < 1 - max_regression:
+            regressions.append(
+                f"{name}: throughput {throughput_ratio - 1:+.0%} "
+                f"({before['rows_per_second']:.0f} -> "
+                f"{current['rows_per_second']:.0f} rows/s)"
+            )
+
+        p95_ratio = current["latency_ms"]["p95"] / before["latency_ms"]["p95"]
+        if p95_ratio > 1 + max_regression:
+            regressions.append(
+                f"{name}: p95 latency {p95_ratio - 1:+.0%} "
+                f"({before['latency_ms']['p95']:.2f} -> "
+                f"{current['latency_ms']['p95']:.2f} ms)"
+            )
+
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end serving benchmark")
+    parser.add_argument("--target", nargs="+", choices=TARGETS, default=["inprocess"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 32])
+    parser.add_argument(
+        "--workers",
+        nargs="+",
+        type=int,
+        default=[1, 2, 4],
+        help="Worker counts for the prefork target",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=1000, help="Requests per scenario"
+    )
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument(
+        "--distinct-records",
+        type=int,
+        default=5000,
+        help="Size of the pool of generated records (small pools hit the cache)",
+    )
+    parser.add_argument(
+        "--model-root",
+        help="Directory containing models/ (default: the project root, or a "
+        "synthetic sample model if it has no trained model)",
+    )
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--output", default="benchmark_serving.json")
+    parser.add_argument("--baseline", help="Earlier result file to compare against")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Allowed relative drop in throughput or rise in p95 latency",
+    )
+    args = parser.parse_args()
+
+    records = generate_records(args.distinct_records, seed=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_root = Path(args.model_root or PROJECT_ROOT).resolve()
+        if not (model_root / "models" / "production_model.pkl").exists():
+            print("No trained model found, using a synthetic sample model")
+            model_root = Path(tmp)
+            build_sample_model(model_root)
+
+        results = []
+        for target in args.target:
+            print(f"\n{target}:")
+            runner = {
+                "inprocess": benchmark_inprocess,
+                "uvicorn": benchmark_uvicorn,
+                "prefork": benchmark_prefork,
+            }[target]
+            for result in asyncio.run(runner(model_root, args, records)):
+                results.append({"target": target, **result})
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "environment": {
+            name: os.environ[name]
+            for name in sorted(os.environ)
+            if name.startswith(
+                (
+                    "MODEL_",
+                    "MICRO_BATCH",
+                    "INFERENCE_",
+                    "PREDICTION_CACHE",
+                    "API_WORKERS",
+                )
+            )
+        },
+        "config": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "distinct_records": args.distinct_records,
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, args.baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Micro-batching scheduler for the prediction API
+Coalesces concurrent single predictions into one vectorized inference call
+"""
+
+import asyncio
+import inspect
+import time
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Queue single feature rows and score them together
+
+    A batch is flushed when it reaches max_batch_size rows or when the
+    oldest queued row has waited max_wait_ms, whichever comes first. Each
+    caller awaits its own future, which resolves with the result for its row.
+
+    Rows can carry a context object (for example the model they must be
+    scored with); rows with different contexts in one flush are scored in
+    separate calls.
+    """
+
+    def __init__(
+        self,
+        score_fn,
+        max_batch_size=32,
+        max_wait_ms=5.0,
+        batch_size_histogram=None,
+        queue_wait_histogram=None,
+    ):
+        """
+        Initialize the batcher
+
+        Args:
+            score_fn: Callable taking a 2D array of rows and their shared
+                context, returning one result per row; may be a coroutine
+                function
+            max_batch_size: Maximum number of rows per flush
+            max_wait_ms: Maximum time a row waits before its batch is flushed
+            batch_size_histogram: Optional Prometheus histogram of batch sizes
+            queue_wait_histogram: Optional Prometheus histogram of queue waits
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_size_histogram = batch_size_histogram
+        self.queue_wait_histogram = queue_wait_histogram
+
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self._getter = None
+        self._flushes = set()
+
+    async def submit(self, row, context=None):
+        """
+        Queue a single row and wait for its result
+
+        Args:
+            row: 1D array of features
+            context: Object passed to score_fn together with this row
+
+        Returns:
+            The result produced by score_fn for this row
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((row, future, time.perf_counter(), context))
+        return await future
+
+    def _ensure_worker(self):
+        """Start the flush loop on the running event loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._getter = None
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Collect queued rows into batches until cancelled"""
+        while True:
+            batch = []
+            try:
+                await self._collect(batch)
+            except asyncio.CancelledError:
+                getter, self._getter = self._getter, None
+                if getter is not None:
+                    if getter.done() and not getter.cancelled():
+                        batch.append(getter.result())
+                    else:
+                        getter.cancel()
+                # Rows already taken off the queue are scored, not dropped;
+                # close() waits for this flush
+                if batch:
+                    self._start_flush(batch)
+                raise
+            self._start_flush(batch)
+
+    async def _collect(self, batch):
+        """Move the next batch of queued rows into batch"""
+        first = await self._get()
+        batch.append(first)
+        deadline = first[2] + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                # Take whatever is already queued without waiting
+                if self._queue.empty():
+                    break
+                batch.append(self._queue.get_nowait())
+                continue
+            item = await self._get(timeout)
+            if item is None:
+                break
+            batch.append(item)
+
+    async def _get(self, timeout=None):
+        """
+        Next queued row, or None once timeout seconds have passed
+
+        The get task outlives a timeout and is reused by the next call.
+        asyncio.wait_for(queue.get(), timeout) would cancel it instead,
+        which before Python 3.12 can drop a row dequeued just as the
+        timeout fires.
+        """
+        if self._getter is None:
+            self._getter = self._loop.create_task(self._queue.get())
+
+        done, _ = await asyncio.wait({self._getter}, timeout=timeout)
+        if not done:
+            return None
+        getter, self._getter = self._getter, None
+        return getter.result()
+
+    def _start_flush(self, batch):
+        """Score a batch in its own task, so collecting the next one goes on"""
+        flush = self._loop.create_task(self._flush(batch))
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch):
+        """Score one batch and resolve the waiting futures"""
+        now = time.perf_counter()
+        if self.batch_size_histogram is not None:
+            self.batch_size_histogram.observe(len(batch))
+        if self.queue_wait_histogram is not None:
+            for _, _, enqueued_at, _ in batch:
+                self.queue_wait_histogram.observe(now - enqueued_at)
+
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[3]), []).append(item)
+
+        for group in groups.values():
+            await self._score_group(group)
+
+    async def _score_group(self, group):
+        """Score rows sharing one context and resolve their futures"""
+        try:
+            X = np.stack([row for row, _, _, _ in group])
+            results = self.score_fn(X, group[0][3])
+            if inspect.isawaitable(results):
+                results = await results
+        except Exception as e:
+            for _, future, _, _ in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _, _), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self):
+        """
+        Stop the flush loop, score the rows it had collected, and fail any
+        rows still queued
+        """
+        if self._worker is None:
+            return
+
+        if self._loop is asyncio.get_running_loop():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            if self._flushes:
+                await asyncio.gather(*self._flushes, return_exceptions=True)
+
+            while not self._queue.empty():
+                _, future, _, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batcher closed"))
+
+        self._worker = None
+        self._queue = None
+        self._loop = None
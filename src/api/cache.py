@@ -0,0 +1,121 @@
+"""
+In-process prediction cache for the prediction API
+Size-bounded LRU keyed by the canonicalized feature vector and model version
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    LRU cache of prediction results with an optional time-to-live
+
+    Keys include the model version, so entries from a previous model are
+    never served; clear() drops them eagerly when the model changes.
+    """
+
+    def __init__(
+        self,
+        max_size=10000,
+        ttl_seconds=None,
+        hits_counter=None,
+        misses_counter=None,
+        evictions_counter=None,
+    ):
+        """
+        Initialize cache
+
+        Args:
+            max_size: Maximum number of entries (0 disables the cache)
+            ttl_seconds: Optional lifetime of an entry in seconds
+            hits_counter: Optional Prometheus counter of cache hits
+            misses_counter: Optional Prometheus counter of cache misses
+            evictions_counter: Optional Prometheus counter of evicted entries
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds or None
+        self.hits_counter = hits_counter
+        self.misses_counter = misses_counter
+        self.evictions_counter = evictions_counter
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    @staticmethod
+    def make_key(row, version):
+        """
+        Hash a feature vector and model version into a cache key
+
+        The row is canonicalized to float64 so equal values hash equally
+        whether they arrived as ints or floats, and -0.0 matches 0.0.
+
+        Args:
+            row: 1D array of raw features in FEATURE_COLUMNS order
+            version: Model version string
+
+        Returns:
+            Bytes key
+        """
+        canonical = np.asarray(row, dtype=np.float64) + 0.0
+        canonical[np.isnan(canonical)] = np.nan
+        digest = hashlib.blake2b(canonical.tobytes(), digest_size=16)
+        digest.update(version.encode())
+        return digest.digest()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is not None and expires_at <= time.monotonic():
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+
+        if entry is None:
+            if self.misses_counter is not None:
+                self.misses_counter.inc()
+            return None
+
+        if self.hits_counter is not None:
+            self.hits_counter.inc()
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries if full"""
+        if not self.enabled:
+            return
+
+        expires_at = None
+        if self.ttl_seconds is not None:
+            expires_at = time.monotonic() + self.ttl_seconds
+
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+
+        if evicted and self.evictions_counter is not None:
+            self.evictions_counter.inc(evicted)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,159 @@
+"""
+Request decoding for the prediction API
+Validates raw JSON bodies with compiled pydantic-core validators and writes
+the validated records straight into NumPy feature matrices
+"""
+
+import numpy as np
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch holds more records than allowed"""
+
+    def __init__(self, size, max_size):
+        super().__init__(f"Batch size {size} exceeds maximum of {max_size}")
+        self.size = size
+        self.max_size = max_size
+
+
+def check_field_order(model, feature_columns):
+    """
+    Ensure a model declares its fields in feature column order
+
+    Validated records are copied into matrices in field order, so the
+    schema must list the features exactly as the model expects them.
+    """
+    fields = list(model.model_fields)
+    if fields != list(feature_columns):
+        raise ValueError(
+            f"{model.__name__} fields {fields} do not match the feature order "
+            f"{list(feature_columns)}"
+        )
+
+
+def request_validation_error(exc, loc_prefix=("body",)):
+    """
+    Turn a pydantic ValidationError into FastAPI's 422 error
+
+    Locations are prefixed like FastAPI's own body validation errors.
+    """
+    errors = [
+        {**error, "loc": (*loc_prefix, *error["loc"])}
+        for error in exc.errors(include_url=False)
+    ]
+    return RequestValidationError(errors)
+
+
+def record_errors(exc):
+    """Per-record error list reported by /predict/batch"""
+    return [
+        {"loc": list(error["loc"]), "msg": error["msg"], "type": error["type"]}
+        for error in exc.errors(include_url=False)
+    ]
+
+
+def decode_record(adapter, body, out):
+    """
+    Validate one JSON record into a preallocated feature row
+
+    Args:
+        adapter: TypeAdapter of the input model
+        body: Raw JSON bytes
+        out: 1D array of length n_features to fill
+
+    Returns:
+        out
+
+    Raises:
+        RequestValidationError: If the body is not a valid record
+    """
+    try:
+        record = adapter.validate_json(body)
+    except ValidationError as e:
+        raise request_validation_error(e)
+
+    out[:] = tuple(record.__dict__.values())
+    return out
+
+
+def check_batch_length(exc):
+    """
+    Raise BatchTooLargeError if validation failed on the records limit
+
+    With max_length set on the records field, pydantic-core rejects an
+    oversized list before it validates any record.
+
+    Raises:
+        BatchTooLargeError: If exc reports too many records
+    """
+    for error in exc.errors(include_url=False):
+        if error["type"] == "too_long" and tuple(error["loc"]) == ("records",):
+            ctx = error["ctx"]
+            raise BatchTooLargeError(ctx["actual_length"], ctx["max_length"])
+
+
+def decode_batch(
+    batch_adapter, envelope_adapter, record_adapter, body, n_features, max_records
+):
+    """
+    Validate a JSON batch into a feature matrix
+
+    The whole batch is first validated in one compiled pass. Only if that
+    fails are the records validated one by one, so that valid records are
+    still scored and invalid ones get their own errors. Adapters whose
+    records field has max_length reject an oversized batch before any
+    record is validated; max_records is checked again on the result.
+
+    Args:
+        batch_adapter: TypeAdapter of {"records": [input model, ...]}
+        envelope_adapter: TypeAdapter of {"records": [any, ...]}
+        record_adapter: TypeAdapter of the input model
+        body: Raw JSON bytes
+        n_features: Columns of the feature matrix
+        max_records: Largest number of records accepted
+
+    Returns:
+        Tuple of (number of records, float32 matrix of the valid records,
+        indices of the valid records, {index: errors} for invalid records)
+
+    Raises:
+        RequestValidationError: If the body is not a batch envelope
+        BatchTooLargeError: If there are more than max_records records
+    """
+    try:
+        records = batch_adapter.validate_json(body).records
+    except ValidationError as e:
+        check_batch_length(e)
+        records = None
+
+    if records is not None:
+        if len(records) > max_records:
+            raise BatchTooLargeError(len(records), max_records)
+        X = np.empty((len(records), n_features), dtype=np.float32)
+        for i, record in enumerate(records):
+            X[i] = tuple(record.__dict__.values())
+        return len(records), X, np.arange(len(records)), {}
+
+    try:
+        raw_records = envelope_adapter.validate_json(body).records
+    except ValidationError as e:
+        check_batch_length(e)
+        raise request_validation_error(e)
+    if len(raw_records) > max_records:
+        raise BatchTooLargeError(len(raw_records), max_records)
+
+    X = np.empty((len(raw_records), n_features), dtype=np.float32)
+    valid = []
+    errors = {}
+    for i, raw in enumerate(raw_records):
+        try:
+            record = record_adapter.validate_python(raw)
+        except ValidationError as e:
+            errors[i] = record_errors(e)
+            continue
+        X[len(valid)] = tuple(record.__dict__.values())
+        valid.append(i)
+
+    return len(raw_records), X[: len(valid)], np.array(valid, dtype=np.intp), errors
@@ -0,0 +1,171 @@
+"""
+Execution backends for CPU-bound inference
+Dispatches scoring off the event loop to a thread or process pool
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+
+class InferenceExecutor:
+    """
+    Run inference inline, in a thread pool, or in a process pool
+
+    Inline mode calls the function directly on the event loop. Thread mode
+    keeps the loop free while sharing the in-memory model. Process mode
+    requires a picklable function and an initializer that preloads the
+    model in every worker.
+
+    After shutdown, run() raises in the pool modes instead of silently
+    creating a new pool; only an explicit start() reopens the executor.
+    """
+
+    def __init__(
+        self,
+        mode="inline",
+        max_workers=None,
+        initializer=None,
+        initargs=(),
+        queue_depth_gauge=None,
+        utilization_gauge=None,
+    ):
+        """
+        Initialize the executor
+
+        Args:
+            mode: One of "inline", "thread" or "process"
+            max_workers: Pool size (defaults to the number of CPUs)
+            initializer: Callable run once in each process pool worker
+            initargs: Arguments passed to initializer
+            queue_depth_gauge: Optional Prometheus gauge of queued tasks
+            utilization_gauge: Optional Prometheus gauge of busy worker share
+        """
+        if mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Unknown execution mode '{mode}', expected one of {EXECUTION_MODES}"
+            )
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.initializer = initializer
+        self.initargs = initargs
+        self.queue_depth_gauge = queue_depth_gauge
+        self.utilization_gauge = utilization_gauge
+
+        self._pool = None
+        self._in_flight = 0
+        self._closed = False
+
+    def start(self):
+        """Create the worker pool if this mode needs one"""
+        self._closed = False
+        if self._pool is not None or self.mode == "inline":
+            return
+
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+        else:
+            # Spawn avoids forking a process that already runs threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+                initargs=self.initargs,
+            )
+
+    def warm_workers(self, fn, *args, timeout=60.0):
+        """
+        Start the pool and have every process worker run fn(*args)
+
+        Process pools spawn their workers lazily, and each worker loads the
+        model in its initializer, so the first requests to reach a cold
+        pool pay for both. Calls are submitted max_workers at a time, which
+        spawns every worker, until each worker has answered one. Blocking;
+        thread and inline modes have nothing to warm.
+
+        Args:
+            fn: Picklable function returning the pid of the worker it ran in
+            *args: Positional arguments for fn
+            timeout: Seconds to wait for all workers
+
+        Returns:
+            Number of workers that ran fn
+
+        Raises:
+            TimeoutError: If not every worker answered within timeout
+        """
+        if self.mode != "process":
+            return 0
+
+        self.start()
+        deadline = time.monotonic() + timeout
+        workers = set()
+        while len(workers) < self.max_workers:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"Only {len(workers)} of {self.max_workers} inference "
+                    f"workers warmed up within {timeout}s"
+                )
+            futures = [self._pool.submit(fn, *args) for _ in range(self.max_workers)]
+            answered = {future.result(timeout=remaining) for future in futures}
+            if answered <= workers:
+                # Workers still loading; let the ones that are up idle meanwhile
+                time.sleep(0.05)
+            workers |= answered
+
+        return len(workers)
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) on the configured backend
+
+        Args:
+            fn: Function to call; must be picklable in process mode
+            *args: Positional arguments for fn
+
+        Returns:
+            The return value of fn
+
+        Raises:
+            RuntimeError: If the executor has been shut down
+        """
+        if self.mode == "inline":
+            return fn(*args)
+
+        if self._closed:
+            raise RuntimeError("Inference executor has been shut down")
+
+        if self._pool is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+
+        self._in_flight += 1
+        self._update_gauges()
+        try:
+            return await loop.run_in_executor(self._pool, fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._update_gauges()
+
+    def _update_gauges(self):
+        """Publish queue depth and utilization from the in-flight count"""
+        busy = min(self._in_flight, self.max_workers)
+        if self.queue_depth_gauge is not None:
+            self.queue_depth_gauge.set(self._in_flight - busy)
+        if self.utilization_gauge is not None:
+            self.utilization_gauge.set(busy / self.max_workers)
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool; run() fails until start() is called again"""
+        self._closed = True
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
@@ -0,0 +1,121 @@
+"""
+Infrastructure endpoints of the prediction API
+Routes probe and scrape requests around the request logging middleware and
+caches the Prometheus exposition, optionally gzip-compressed
+"""
+
+import gzip
+import random
+import time
+
+from prometheus_client import REGISTRY, generate_latest
+
+
+class InfraRouteBypass:
+    """
+    ASGI middleware that sends infrastructure requests straight to the router
+
+    Kubernetes probes and Prometheus scrapes arrive every few seconds per
+    pod, so they skip the middleware stack below this one (request logging,
+    request metrics). A sample_rate fraction of them still goes through it.
+    """
+
+    def __init__(self, app, router, paths, sample_rate=0.0):
+        """
+        Initialize middleware
+
+        Args:
+            app: The rest of the ASGI middleware stack
+            router: Router serving the infrastructure endpoints
+            paths: Exact request paths that bypass the stack
+            sample_rate: Fraction of those requests sent through the stack
+        """
+        self.app = app
+        self.router = router
+        self.paths = frozenset(paths)
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["path"] in self.paths
+            and (self.sample_rate <= 0.0 or random.random() >= self.sample_rate)
+        ):
+            await self.router(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def accepts_gzip(accept_encoding):
+    """Return True if an Accept-Encoding header value allows gzip"""
+    for coding in accept_encoding.lower().split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip() not in ("gzip", "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class MetricsCache:
+    """
+    Reuse the rendered Prometheus exposition for a short window
+
+    Rendering walks every metric of the registry; scrapers polling within
+    ttl_seconds of each other get the same snapshot. The gzip body is
+    compressed at most once per snapshot.
+    """
+
+    def __init__(self, ttl_seconds=1.0, registry=REGISTRY, compresslevel=6):
+        """
+        Initialize cache
+
+        Args:
+            ttl_seconds: Seconds a rendered exposition is reused (0 disables)
+            registry: Prometheus registry to render
+            compresslevel: gzip compression level
+        """
+        self.ttl_seconds = ttl_seconds
+        self.registry = registry
+        self.compresslevel = compresslevel
+        self._rendered_at = None
+        self._body = None
+        self._gzip_body = None
+
+    def clear(self):
+        """Drop the cached exposition"""
+        self._rendered_at = None
+        self._body = None
+        self._gzip_body = None
+
+    def get(self, gzip_encoding=False):
+        """
+        Current exposition, rendered again once the window has passed
+
+        Args:
+            gzip_encoding: Return the gzip-compressed body
+
+        Returns:
+            Tuple of (body bytes, content encoding or None)
+        """
+        now = time.monotonic()
+        if (
+            self._rendered_at is None
+            or self.ttl_seconds <= 0
+            or now - self._rendered_at >= self.ttl_seconds
+        ):
+            self._body = generate_latest(self.registry)
+            self._gzip_body = None
+            self._rendered_at = now
+
+        if not gzip_encoding:
+            return self._body, None
+
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self._body, self.compresslevel)
+        return self._gzip_body, "gzip"
@@ -1,18 +1,68 @@
 """
 FastAPI Application for Heart Disease Prediction API
 Includes monitoring, logging, and metrics endpoints
+
+Importing this module only loads what is needed to serve: scikit-learn,
+joblib and pandas are pulled in lazily when a pickled model is loaded,
+and never when MODEL_FORMAT=compiled.
 """
 
-from src.utils.preprocessing import HeartDiseasePreprocessor
+from src.api.batching import MicroBatcher
+from src.api.cache import PredictionCache
+from src.api.decoding import (
+    BatchTooLargeError,
+    check_field_order,
+    decode_batch,
+    decode_record,
+)
+from src.api.executor import InferenceExecutor
+from src.api.infra import InfraRouteBypass, MetricsCache, accepts_gzip
+from src.api.model_store import (
+    ReloadInProgressError,
+    artifact_paths,
+    artifact_signature,
+    load_bundle,
+    load_golden_inputs,
+    manifest_path,
+    validate_bundle,
+)
+from src.api.request_logging import (
+    RequestLogSampler,
+    configure_logging,
+    parse_sample_rates,
+)
+from src.api.timing import RequestProfiler, StageTimer, stage_histograms
+from src.models.inference import (
+    check_threshold,
+    init_worker,
+    score_matrix,
+    worker_score_matrix,
+    worker_warm_up,
+)
+from src.utils.features import FEATURE_COLUMNS, check_matrix_dtype
+import asyncio
+import atexit
+import hmac
+import json
 import logging
+import os
+import signal
+import threading
 from pathlib import Path
-import joblib
-import pandas as pd
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 import sys
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import (
+    Counter,
+    Gauge,
+    Histogram,
+    Info,
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+)
 from starlette.responses import Response
 import time
 
@@ -28,10 +78,60 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# "json" emits one JSON object per log line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# Hand log records to a background thread instead of writing them inline
+LOG_ASYNC = os.getenv("LOG_ASYNC", "false").lower() in ("1", "true", "yes")
+
+log_listener = configure_logging(
+    logging.getLogger(), json_format=LOG_FORMAT == "json", use_queue=LOG_ASYNC
+)
+if log_listener is not None:
+    atexit.register(log_listener.stop)
+
+# Request log sampling; errors and slow requests are always logged
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_SAMPLE_RATES = parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+
+request_log_sampler = RequestLogSampler(
+    default_rate=LOG_SAMPLE_RATE,
+    rates=LOG_SAMPLE_RATES,
+    slow_threshold=LOG_SLOW_REQUEST_MS / 1000.0 if LOG_SLOW_REQUEST_MS > 0 else None,
+)
+
+# Add a Server-Timing header with the per-stage durations to predictions
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Debug switch: cProfile a fraction of requests and dump them to PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+
+request_profiler = RequestProfiler(
+    sample_rate=PROFILE_SAMPLE_RATE, output_dir=PROFILE_DIR
+)
+
+# Probe and scrape endpoints skip request logging and request metrics; this
+# fraction of them still goes through the middleware
+INFRA_PATHS = ("/health", "/health/live", "/health/ready", "/metrics")
+INFRA_SAMPLE_RATE = float(os.getenv("INFRA_SAMPLE_RATE", "0"))
+
+# Seconds a rendered /metrics exposition is reused (0 renders every scrape)
+METRICS_CACHE_SECONDS = float(os.getenv("METRICS_CACHE_SECONDS", "1"))
+
+# Metric label values for methods outside this set are reported as "OTHER"
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Heart Disease Prediction API",
     description="MLOps API for predicting heart disease risk",
+    default_response_class=ORJSONResponse,
 )
 
 # Prometheus metrics
@@ -47,43 +147,518 @@ REQUEST_DURATION = Histogram(
     ["method", "endpoint"],
 )
 
+STAGE_DURATION = Histogram(
+    "api_stage_duration_seconds",
+    "Time prediction requests spend in each pipeline stage",
+    ["endpoint", "stage"],
+    buckets=(
+        0.00001,
+        0.000025,
+        0.00005,
+        0.0001,
+        0.00025,
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        1.0,
+    ),
+)
+
+PREDICT_STAGES = stage_histograms(STAGE_DURATION, "/predict")
+BATCH_STAGES = stage_histograms(STAGE_DURATION, "/predict/batch")
+
 PREDICTION_COUNT = Counter(
     "predictions_total", "Total number of predictions", ["prediction_class"]
 )
 
+MICRO_BATCH_SIZE = Histogram(
+    "micro_batch_size",
+    "Number of /predict requests scored per micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+MICRO_BATCH_QUEUE_WAIT = Histogram(
+    "micro_batch_queue_wait_seconds",
+    "Time /predict requests wait in the micro-batch queue",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "inference_pool_queue_depth",
+    "Inference tasks waiting for a free pool worker",
+    multiprocess_mode="livesum",
+)
+
+INFERENCE_UTILIZATION = Gauge(
+    "inference_pool_utilization",
+    "Fraction of inference pool workers currently busy",
+    multiprocess_mode="liveall",
+)
+
+MODEL_INFO = Info("model", "Version of the model currently being served")
+
+MODEL_LOAD_DURATION = Gauge(
+    "model_load_duration_seconds",
+    "Time spent loading (and validating, on reload) the served model",
+    multiprocess_mode="livemostrecent",
+)
+
+MODEL_RELOADS = Counter(
+    "model_reloads_total", "Number of model reload attempts", ["status"]
+)
+
+WARMUP_DURATION = Gauge(
+    "model_warmup_duration_seconds",
+    "Time spent warming up the served model before reporting ready",
+    multiprocess_mode="livemax",
+)
+
+WARMUP_LATENCY = Histogram(
+    "model_warmup_latency_seconds",
+    "Latency of the synthetic predictions run during warm-up",
+    ["kind"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+PREDICTION_CACHE_HITS = Counter(
+    "prediction_cache_hits_total", "Predictions served from the prediction cache"
+)
+
+PREDICTION_CACHE_MISSES = Counter(
+    "prediction_cache_misses_total", "Predictions not found in the prediction cache"
+)
+
+PREDICTION_CACHE_EVICTIONS = Counter(
+    "prediction_cache_evictions_total",
+    "Entries evicted from the prediction cache to stay within its size",
+)
+
+
+def _metrics_registry():
+    """
+    Registry rendered by /metrics
+
+    Under the prefork server (src/api/server.py) every worker writes its
+    metrics to files in PROMETHEUS_MULTIPROC_DIR, and /metrics aggregates
+    all workers' files, whichever worker answers the scrape. Info metrics
+    are not shared that way; model_info is the answering worker's.
+    """
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+
+    from prometheus_client import CollectorRegistry, multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(MODEL_INFO)
+    return registry
+
+
+metrics_cache = MetricsCache(
+    ttl_seconds=METRICS_CACHE_SECONDS, registry=_metrics_registry()
+)
+
 # Load model and preprocessor
 MODEL_PATH = Path("models/production_model.pkl")
 PREPROCESSOR_PATH = Path("models/preprocessor.pkl")
+COMPILED_MODEL_PATH = Path("models/compiled_model")
+
+# "pickle" serves the joblib model; "compiled" serves the NumPy scoring artifact
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "pickle").lower()
+
+# Memory-map compiled artifacts read-only so worker processes share pages
+MODEL_MMAP = os.getenv("MODEL_MMAP", "true").lower() in ("1", "true", "yes")
+
+# Dtype of the feature matrices the model scores; "float32" halves their size
+MODEL_DTYPE = check_matrix_dtype(os.getenv("MODEL_DTYPE", "float64"))
+
+# Probability of disease above which a patient is predicted as class 1
+DECISION_THRESHOLD = check_threshold(os.getenv("DECISION_THRESHOLD", "0.5"))
+
+# Upper bound on records accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+# Server-side micro-batching of concurrent /predict calls
+MICRO_BATCHING_ENABLED = os.getenv("MICRO_BATCHING_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+# Where inference runs: inline on the event loop, or a thread/process pool
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "inline").lower()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+
+# Synthetic single and batch predictions run through the full pipeline after
+# startup, before /health/ready reports ready (0 and 0 skips warm-up)
+WARMUP_REQUESTS = int(os.getenv("WARMUP_REQUESTS", "20"))
+WARMUP_BATCHES = int(os.getenv("WARMUP_BATCHES", "5"))
+WARMUP_BATCH_SIZE = int(os.getenv("WARMUP_BATCH_SIZE", "32"))
 
-model = None
-preprocessor = None
+# Hot reload: golden inputs a new model must reproduce before it is swapped
+# in; training writes them next to the model artifacts
+GOLDEN_INPUTS_PATH = Path(os.getenv("GOLDEN_INPUTS_PATH", "models/golden_inputs.json"))
+RELOAD_MIN_GOLDEN_AGREEMENT = float(os.getenv("RELOAD_MIN_GOLDEN_AGREEMENT", "0.9"))
+
+# Poll model artifacts every N seconds and reload on change (0 disables)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+
+# Shared secret for /admin endpoints (X-Admin-Token header); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# LRU cache of predictions for repeated inputs (size 0 disables, TTL 0 = no expiry)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "0"))
+
+prediction_cache = PredictionCache(
+    max_size=PREDICTION_CACHE_SIZE,
+    ttl_seconds=PREDICTION_CACHE_TTL,
+    hits_counter=PREDICTION_CACHE_HITS,
+    misses_counter=PREDICTION_CACHE_MISSES,
+    evictions_counter=PREDICTION_CACHE_EVICTIONS,
+)
+
+# Currently served ModelBundle; replaced as a whole on reload
+model_bundle = None
+
+# Bundle loaded by a prefork parent (src/api/server.py) for its workers
+preloaded_bundle = None
+
+# Pid of the prefork supervisor, when running in one of its workers
+supervisor_pid = None
+
+# Set once the served model has been warmed up; gates /health/ready
+model_ready = False
+
+_reload_lock = threading.Lock()
+_watch_task = None
+_warmup_task = None
+
+
+def _serving_paths():
+    """Artifact paths for the configured model format"""
+    paths = artifact_paths(
+        MODEL_FORMAT, MODEL_PATH, PREPROCESSOR_PATH, COMPILED_MODEL_PATH
+    )
+    if MODEL_FORMAT == "compiled" and len(paths) > 1:
+        logger.warning(
+            f"Compiled model not found at {COMPILED_MODEL_PATH}, "
+            f"falling back to {MODEL_PATH}"
+        )
+    return paths
+
+
+def _create_process_executor(bundle):
+    """Process pool whose workers preload the artifacts of a bundle"""
+    if len(bundle.source) == 1:
+        initargs = (None, None, bundle.source[0])
+    else:
+        initargs = (bundle.source[0], bundle.source[1], None)
+
+    return InferenceExecutor(
+        mode="process",
+        max_workers=INFERENCE_WORKERS,
+        initializer=init_worker,
+        initargs=initargs,
+        queue_depth_gauge=INFERENCE_QUEUE_DEPTH,
+        utilization_gauge=INFERENCE_UTILIZATION,
+    )
+
+
+def _activate(bundle):
+    """
+    Make a bundle the one served to new requests
+
+    The swap is a single reference assignment. Requests that already hold
+    the previous bundle finish on it; the previous bundle is retired, so its
+    process pool, if any, shuts down once the last of them is released.
+    Cached predictions of the previous model are dropped.
+
+    Returns:
+        The previously served bundle, or None
+    """
+    global model_bundle
+
+    if INFERENCE_EXECUTOR == "process" and bundle.executor is None:
+        bundle.executor = _create_process_executor(bundle)
+        bundle.executor.start()
+
+    previous = model_bundle
+    model_bundle = bundle
+    prediction_cache.clear()
+
+    MODEL_INFO.info({"version": bundle.version})
+    MODEL_LOAD_DURATION.set(bundle.load_duration)
+
+    if previous is not None:
+        previous.retire()
+
+    return previous
+
+
+def _acquire_bundle():
+    """
+    Current bundle, registered as in use by the calling request
+
+    Callers must release() the bundle once they are done scoring with it.
+
+    Returns:
+        ModelBundle, or None if no model is loaded
+    """
+    while True:
+        bundle = model_bundle
+        # A bundle retired between the read and acquire() has been replaced
+        if bundle is None or bundle.acquire():
+            return bundle
+
+
+def _warm_pool(bundle):
+    """
+    Spawn every process pool worker of a bundle and score once in each
+
+    Blocking. Returns the number of workers warmed (0 without a pool).
+    """
+    if bundle.executor is None:
+        return 0
+
+    record = HeartDiseaseInput.model_config["json_schema_extra"]["example"]
+    X = _feature_matrix([[record[name] for name in FEATURE_COLUMNS]])
+    return bundle.executor.warm_workers(worker_warm_up, X, DECISION_THRESHOLD)
+
+
+def _read_bundle():
+    """Load the serving artifacts, logging why if they cannot be loaded"""
+    try:
+        return load_bundle(_serving_paths(), mmap=MODEL_MMAP)
+    except FileNotFoundError as e:
+        logger.warning(str(e))
+    except Exception as e:
+        logger.error(f"Error loading model/preprocessor: {e}")
+    return None
 
 
 def load_model():
     """Load the trained model and preprocessor"""
-    global model, preprocessor
+    bundle = _read_bundle()
+    if bundle is None:
+        return None
+
+    _activate(bundle)
+    logger.info(f"Model {bundle.version} loaded from {', '.join(bundle.source)}")
+
+    return bundle
+
+
+def preload_model():
+    """
+    Load the model in a parent process before it forks workers
+
+    The bundle is not activated here, since executor threads and process
+    pools do not survive a fork. Each worker activates it at startup
+    instead of loading its own copy, so the model's memory pages are
+    shared copy-on-write.
+
+    Returns:
+        The preloaded bundle, or None if it could not be loaded
+    """
+    global preloaded_bundle
+
+    preloaded_bundle = _read_bundle()
+    if preloaded_bundle is not None:
+        logger.info(
+            f"Model {preloaded_bundle.version} preloaded from "
+            f"{', '.join(preloaded_bundle.source)}"
+        )
+    return preloaded_bundle
+
+
+def _load_validated_bundle():
+    """
+    Load the serving artifacts and check them against the golden inputs
+
+    Raises:
+        FileNotFoundError: If an artifact is missing
+        ValueError: If the model fails golden-set validation
+    """
+    start_time = time.perf_counter()
+    bundle = load_bundle(_serving_paths(), mmap=MODEL_MMAP)
+
+    X_golden, expected, expected_probabilities = load_golden_inputs(GOLDEN_INPUTS_PATH)
+    if expected is None and expected_probabilities is None:
+        logger.warning(
+            f"No expected predictions in the golden inputs at "
+            f"{GOLDEN_INPUTS_PATH}: the reloaded model is only checked for "
+            f"well-formed output, not for correct predictions"
+        )
+    validate_bundle(
+        bundle,
+        X_golden,
+        expected,
+        RELOAD_MIN_GOLDEN_AGREEMENT,
+        DECISION_THRESHOLD,
+        expected_probabilities,
+    )
+    bundle.load_duration = time.perf_counter() - start_time
+
+    return bundle
+
+
+def reload_model():
+    """
+    Load, validate and swap in the current model artifacts
+
+    Blocking; the API runs it in a worker thread so serving continues on
+    the current model while the new one loads and warms up. With a process
+    pool, every worker of the new pool has loaded the model and scored
+    once before the swap.
+
+    Returns:
+        Tuple of (new bundle, previous bundle or None)
+
+    Raises:
+        ReloadInProgressError: If another reload is running
+        FileNotFoundError: If an artifact is missing
+        ValueError: If the new model fails golden-set validation
+    """
+    global model_ready
+
+    if not _reload_lock.acquire(blocking=False):
+        raise ReloadInProgressError("A model reload is already in progress")
 
     try:
-        if MODEL_PATH.exists():
-            model = joblib.load(MODEL_PATH)
-            logger.info(f"Model loaded from {MODEL_PATH}")
-        else:
-            logger.warning(f"Model not found at {MODEL_PATH}")
+        start_time = time.perf_counter()
+        bundle = _load_validated_bundle()
 
-        if PREPROCESSOR_PATH.exists():
-            preprocessor = HeartDiseasePreprocessor.load(PREPROCESSOR_PATH)
-            logger.info(f"Preprocessor loaded from {PREPROCESSOR_PATH}")
-        else:
-            logger.warning(f"Preprocessor not found at {PREPROCESSOR_PATH}")
+        # Every pool worker loads the model before the swap, not on live traffic
+        if INFERENCE_EXECUTOR == "process":
+            bundle.executor = _create_process_executor(bundle)
+            try:
+                _warm_pool(bundle)
+            except Exception:
+                bundle.executor.shutdown(wait=False)
+                raise
+        bundle.load_duration = time.perf_counter() - start_time
 
-    except Exception as e:
-        logger.error(f"Error loading model/preprocessor: {e}")
+        previous = _activate(bundle)
+    except Exception:
+        MODEL_RELOADS.labels(status="failed").inc()
+        raise
+    finally:
+        _reload_lock.release()
+
+    MODEL_RELOADS.labels(status="success").inc()
+
+    # Golden-set validation already sent the new model through the pipeline
+    model_ready = True
+    logger.info(
+        f"Model reloaded: {previous.version if previous else None} -> "
+        f"{bundle.version} in {bundle.load_duration:.3f}s"
+    )
+
+    return bundle, previous
+
+
+def reload_preloaded_model():
+    """
+    Load and validate new artifacts in a prefork supervisor
+
+    Replaces the preloaded bundle, so workers forked afterwards serve the
+    new model; the supervisor then replaces the running workers.
+
+    Returns:
+        Tuple of (new bundle, previous bundle or None)
+
+    Raises:
+        FileNotFoundError: If an artifact is missing
+        ValueError: If the new model fails golden-set validation
+    """
+    global preloaded_bundle
+
+    try:
+        bundle = _load_validated_bundle()
+    except Exception:
+        MODEL_RELOADS.labels(status="failed").inc()
+        raise
+
+    previous = preloaded_bundle
+    preloaded_bundle = bundle
+    MODEL_RELOADS.labels(status="success").inc()
+    logger.info(
+        f"Model preloaded for new workers: "
+        f"{previous.version if previous else None} -> {bundle.version}"
+    )
+
+    return bundle, previous
+
+
+async def watch_model_files(interval):
+    """
+    Reload the model whenever training publishes new artifacts
+
+    Only the manifest is watched. Training renames it into place after
+    every artifact has been written, so a reload never picks up a new
+    preprocessor next to the previous model.
+    """
+    manifest = manifest_path(MODEL_PATH)
+    if not manifest.exists():
+        logger.warning(
+            f"No model manifest at {manifest}; the model is reloaded once "
+            f"training writes one, or through /admin/reload"
+        )
+    signature = artifact_signature([manifest])
+
+    while True:
+        await asyncio.sleep(interval)
+
+        current = artifact_signature([manifest])
+        if current == signature:
+            continue
+        signature = current
+
+        try:
+            await asyncio.to_thread(reload_model)
+        except Exception as e:
+            logger.error(f"Model reload failed, keeping current model: {e}")
 
 
 # Load model on startup
 @app.on_event("startup")
 async def startup_event():
-    load_model()
+    global _watch_task, _warmup_task
+
+    if preloaded_bundle is not None:
+        _activate(preloaded_bundle)
+    else:
+        load_model()
+    inference_executor.start()
+
+    # Warm up in the background so liveness probes are answered meanwhile
+    if model_bundle is not None:
+        _warmup_task = asyncio.create_task(warm_up_and_mark_ready(model_bundle))
+
+    # Under the prefork server, the supervisor watches and reloads all workers
+    if MODEL_WATCH_INTERVAL > 0 and supervisor_pid is None:
+        _watch_task = asyncio.create_task(watch_model_files(MODEL_WATCH_INTERVAL))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _watch_task is not None:
+        _watch_task.cancel()
+    if _warmup_task is not None:
+        _warmup_task.cancel()
+    await micro_batcher.close()
+    inference_executor.shutdown()
+    if model_bundle is not None and model_bundle.executor is not None:
+        model_bundle.executor.shutdown()
 
 
 # Pydantic models for request/response
@@ -110,8 +685,8 @@ class HeartDiseaseInput(BaseModel):
     ca: int = Field(..., ge=0, le=3, description="Number of major vessels (0-3)")
     thal: int = Field(..., ge=0, le=3, description="Thalassemia (0-3)")
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "age": 63,
                 "sex": 1,
@@ -128,6 +703,7 @@ class HeartDiseaseInput(BaseModel):
                 "thal": 1,
             }
         }
+    )
 
 
 class PredictionResponse(BaseModel):
@@ -140,47 +716,376 @@ class PredictionResponse(BaseModel):
     confidence: str = Field(..., description="Confidence level")
 
 
+class BatchPredictionRequest(BaseModel):
+    """Request schema for batch prediction"""
+
+    records: List[Any] = Field(
+        ...,
+        max_length=MAX_BATCH_SIZE,
+        description="Patient records, each following the /predict input schema",
+    )
+
+
+class ValidatedBatchRequest(BaseModel):
+    """Batch request whose records all follow the /predict input schema"""
+
+    # Oversized batches are rejected before any record is validated
+    records: List[HeartDiseaseInput] = Field(..., max_length=MAX_BATCH_SIZE)
+
+
+class BatchPredictionItem(BaseModel):
+    """Result for a single record of a batch prediction"""
+
+    index: int = Field(..., description="Position of the record in the request")
+    prediction: Optional[int] = Field(
+        None, description="Predicted class (0=No Disease, 1=Disease)"
+    )
+    probability: Optional[float] = Field(
+        None, description="Probability of disease (0-1)"
+    )
+    confidence: Optional[str] = Field(None, description="Confidence level")
+    errors: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Validation errors if the record was rejected"
+    )
+
+
+class BatchPredictionResponse(BaseModel):
+    """Response schema for batch prediction"""
+
+    results: List[BatchPredictionItem] = Field(
+        ..., description="Per-record results in request order"
+    )
+
+
+# Request bodies are validated by compiled validators straight from JSON and
+# copied into feature matrices in field order
+check_field_order(HeartDiseaseInput, FEATURE_COLUMNS)
+INPUT_ADAPTER = TypeAdapter(HeartDiseaseInput)
+BATCH_ADAPTER = TypeAdapter(ValidatedBatchRequest)
+BATCH_ENVELOPE_ADAPTER = TypeAdapter(BatchPredictionRequest)
+
+
+def _json_body(model):
+    """OpenAPI request body for endpoints that decode the raw body themselves"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+
+# Shared executor for inline and thread modes; process pools belong to bundles
+inference_executor = InferenceExecutor(
+    mode="inline" if INFERENCE_EXECUTOR == "process" else INFERENCE_EXECUTOR,
+    max_workers=INFERENCE_WORKERS,
+    queue_depth_gauge=INFERENCE_QUEUE_DEPTH,
+    utilization_gauge=INFERENCE_UTILIZATION,
+)
+
+
+async def run_inference(X, bundle, timings=None):
+    """
+    Score a raw feature matrix with a bundle on the configured executor
+
+    Process pool workers hold their own preloaded copy of the bundle's
+    artifacts, so they score with worker_score_matrix. Their preprocessing
+    cannot be timed separately, so the whole pool call counts as "infer".
+
+    Args:
+        X: Raw feature matrix
+        bundle: ModelBundle to score with
+        timings: Optional dictionary receiving stage durations in ns
+
+    Returns:
+        Tuple of (predicted classes, probabilities of disease, confidence
+        labels)
+    """
+    if bundle.executor is not None:
+        start = time.perf_counter_ns()
+        scored = await bundle.executor.run(worker_score_matrix, X, DECISION_THRESHOLD)
+        if timings is not None:
+            timings["infer"] = time.perf_counter_ns() - start
+        return scored
+    return await inference_executor.run(
+        score_matrix,
+        bundle.model,
+        bundle.preprocessor,
+        X,
+        DECISION_THRESHOLD,
+        timings,
+    )
+
+
+async def _score_rows(X, bundle):
+    """Score a micro-batch and return one (class, probability, label) per row"""
+    return list(zip(*await run_inference(X, bundle)))
+
+
+micro_batcher = MicroBatcher(
+    _score_rows,
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+    batch_size_histogram=MICRO_BATCH_SIZE,
+    queue_wait_histogram=MICRO_BATCH_QUEUE_WAIT,
+)
+
+
+def _feature_matrix(rows):
+    """
+    Feature matrix for validated records (in FEATURE_COLUMNS order)
+
+    Values are rounded through the float32 feature schema, the precision
+    the training data is stored in, and held in MODEL_DTYPE.
+    """
+    return np.asarray(rows, dtype=np.float32).astype(MODEL_DTYPE, copy=False)
+
+
+async def warm_up(bundle, n_requests, n_batches, batch_size):
+    """
+    Run synthetic predictions through the full prediction pipeline
+
+    Each call decodes and validates a JSON body, scores it with the bundle
+    on the configured executor and serializes the response, like /predict
+    and /predict/batch do, so one-time costs (lazy imports and code paths,
+    allocator growth, validator and serializer setup) are paid before real
+    traffic arrives. The prediction cache and request metrics are bypassed.
+    With a process pool, every pool worker is spawned and scores once first.
+
+    Args:
+        bundle: ModelBundle to warm up
+        n_requests: Number of single-record predictions
+        n_batches: Number of batch predictions
+        batch_size: Records per batch (capped at MAX_BATCH_SIZE)
+
+    Returns:
+        Dictionary with the total seconds, the number of process pool
+        workers warmed (with a pool) and, per kind, the number of calls and
+        the first and last latency in ms
+    """
+    record = HeartDiseaseInput.model_config["json_schema_extra"]["example"]
+    single_body = json.dumps(record).encode()
+    batch_body = json.dumps(
+        {"records": [record] * min(batch_size, MAX_BATCH_SIZE)}
+    ).encode()
+
+    async def single():
+        row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+        decode_record(INPUT_ADAPTER, single_body, row[0])
+        predictions, probabilities, confidences = await run_inference(
+            _feature_matrix(row), bundle
+        )
+        ORJSONResponse(
+            {
+                "prediction": int(predictions[0]),
+                "probability": float(probabilities[0]),
+                "confidence": confidences[0],
+            }
+        )
+
+    async def batch():
+        _, rows, _, _ = decode_batch(
+            BATCH_ADAPTER,
+            BATCH_ENVELOPE_ADAPTER,
+            INPUT_ADAPTER,
+            batch_body,
+            len(FEATURE_COLUMNS),
+            MAX_BATCH_SIZE,
+        )
+        predictions, probabilities, confidences = await run_inference(
+            _feature_matrix(rows), bundle
+        )
+        ORJSONResponse(
+            {
+                "results": [
+                    {
+                        "index": i,
+                        "prediction": prediction,
+                        "probability": probability,
+                        "confidence": confidence,
+                        "errors": None,
+                    }
+                    for i, (prediction, probability, confidence) in enumerate(
+                        zip(
+                            predictions.tolist(),
+                            probabilities.tolist(),
+                            confidences.tolist(),
+                        )
+                    )
+                ]
+            }
+        )
+
+    stats = {}
+    start_time = time.perf_counter()
+
+    # Spawn all process pool workers first, so none starts on live traffic
+    if bundle.executor is not None:
+        stats["workers"] = await asyncio.to_thread(_warm_pool, bundle)
+
+    for kind, call, n_calls in (
+        ("single", single, n_requests),
+        ("batch", batch, n_batches),
+    ):
+        latencies = []
+        for _ in range(n_calls):
+            call_start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - call_start)
+            WARMUP_LATENCY.labels(kind=kind).observe(latencies[-1])
+        if latencies:
+            stats[kind] = {
+                "calls": n_calls,
+                "first_ms": latencies[0] * 1000.0,
+                "last_ms": latencies[-1] * 1000.0,
+            }
+    stats["seconds"] = time.perf_counter() - start_time
+
+    return stats
+
+
+async def warm_up_and_mark_ready(bundle):
+    """Warm up a freshly loaded bundle, then report this process ready"""
+    global model_ready
+
+    # Replaced already; the reload that replaced it warmed its successor
+    if not bundle.acquire():
+        return
+
+    try:
+        stats = await warm_up(
+            bundle, WARMUP_REQUESTS, WARMUP_BATCHES, WARMUP_BATCH_SIZE
+        )
+    except Exception as e:
+        logger.error(f"Model warm-up failed, not reporting ready: {e}")
+        return
+    finally:
+        bundle.release()
+
+    WARMUP_DURATION.set(stats["seconds"])
+    model_ready = True
+
+    parts = [f"{stats['workers']} pool workers"] if "workers" in stats else []
+    parts.extend(
+        f"{stats[kind]['calls']} {kind} (first {stats[kind]['first_ms']:.2f}ms, "
+        f"last {stats[kind]['last_ms']:.2f}ms)"
+        for kind in ("single", "batch")
+        if kind in stats
+    )
+    logger.info(
+        f"Model {bundle.version} warmed up in {stats['seconds']:.3f}s: "
+        f"{', '.join(parts) or 'no calls'}"
+    )
+
+
+def _finish_timing(timer, histograms, response):
+    """Record stage durations and optionally report them to the client"""
+    timer.observe(histograms)
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+
+def _route_label(request):
+    """
+    Bounded metric label for a request
+
+    Uses the matched route template rather than the raw path, so arbitrary
+    URLs (scanners, typos, path parameters) cannot create new label values.
+    """
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
 # Middleware for logging and metrics
 @app.middleware("http")
 async def log_requests(request, call_next):
     """Middleware to log requests and track metrics"""
-    start_time = time.time()
+    start_time = time.perf_counter()
+    profiler = request_profiler.start() if request_profiler.enabled else None
 
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    except Exception:
+        status_code = 500
+        raise
+    finally:
+        duration = time.perf_counter() - start_time
+        method = request.method if request.method in KNOWN_METHODS else "OTHER"
+        route = _route_label(request)
 
-    duration = time.time() - start_time
-    REQUEST_DURATION.labels(method=request.method, endpoint=request.url.path).observe(
-        duration
-    )
+        if profiler is not None:
+            profile_path = request_profiler.stop(profiler, route)
+            logger.info(f"Profile of {request.url.path} written to {profile_path}")
 
-    REQUEST_COUNT.labels(
-        method=request.method, endpoint=request.url.path, status=response.status_code
-    ).inc()
+        REQUEST_DURATION.labels(method=method, endpoint=route).observe(duration)
+        REQUEST_COUNT.labels(method=method, endpoint=route, status=status_code).inc()
 
-    logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Duration: {duration:.4f}s"
-    )
+        if request_log_sampler.should_log(route, status_code, duration):
+            logger.log(
+                logging.ERROR if status_code >= 500 else logging.INFO,
+                f"{request.method} {request.url.path} - "
+                f"Status: {status_code} - "
+                f"Duration: {duration:.4f}s",
+                extra={
+                    "fields": {
+                        "method": request.method,
+                        "path": request.url.path,
+                        "route": route,
+                        "status": status_code,
+                        "duration_ms": round(duration * 1000.0, 3),
+                    }
+                },
+            )
 
     return response
 
 
+# Added after log_requests, so it runs first and can route around it
+app.add_middleware(
+    InfraRouteBypass,
+    router=app.router,
+    paths=INFRA_PATHS,
+    sample_rate=INFRA_SAMPLE_RATE,
+)
+
+
 # API Endpoints
 @app.get("/")
 async def root():
     """Root endpoint"""
-    REQUEST_COUNT.labels(method="GET", endpoint="/", status=200).inc()
     return {"message": "Heart Disease Prediction API", "status": "operational"}
 
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and answering requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: a model is loaded and warmed up"""
+    bundle = model_bundle
+    if bundle is None or not model_ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "model_loaded": bundle is not None},
+        )
+
+    return {"status": "ready", "model_version": bundle.version}
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    bundle = model_bundle
     health_status = {
         "status": "healthy",
-        "model_loaded": model is not None,
-        "preprocessor_loaded": preprocessor is not None,
+        "model_loaded": bundle is not None,
+        "preprocessor_loaded": bundle is not None,
+        "model_version": bundle.version if bundle is not None else None,
     }
 
     if not health_status["model_loaded"] or not health_status["preprocessor_loaded"]:
@@ -191,23 +1096,47 @@ async def health_check():
 
 
 @app.get("/metrics")
-async def metrics():
-    """Prometheus metrics endpoint"""
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+async def metrics(request: Request):
+    """
+    Prometheus metrics endpoint
+
+    The exposition is reused for METRICS_CACHE_SECONDS and gzip-compressed
+    when the scraper accepts it.
+    """
+    body, encoding = metrics_cache.get(
+        accepts_gzip(request.headers.get("accept-encoding", ""))
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST, headers=headers)
 
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(input_data: HeartDiseaseInput):
+@app.post(
+    "/predict",
+    response_model=PredictionResponse,
+    openapi_extra=_json_body(HeartDiseaseInput),
+)
+async def predict(request: Request):
     """
     Predict heart disease risk based on patient data
 
     Args:
-        input_data: Patient health data
+        request: Request whose JSON body follows HeartDiseaseInput
 
     Returns:
         Prediction result with probability and confidence
     """
-    if model is None or preprocessor is None:
+    timer = StageTimer()
+    body = await request.body()
+    timer.lap("read_body")
+
+    # Validate the body straight into a feature row in model column order
+    row = np.empty((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+    decode_record(INPUT_ADAPTER, body, row[0])
+
+    bundle = _acquire_bundle()
+    if bundle is None:
         logger.error("Model or preprocessor not loaded")
         raise HTTPException(
             status_code=503,
@@ -215,62 +1144,255 @@ async def predict(input_data: HeartDiseaseInput):
         )
 
     try:
-        # Convert input to DataFrame
-        input_dict = input_data.dict()
-        input_df = pd.DataFrame([input_dict])
-
-        # Ensure correct column order
-        feature_order = [
-            "age",
-            "sex",
-            "cp",
-            "trestbps",
-            "chol",
-            "fbs",
-            "restecg",
-            "thalach",
-            "exang",
-            "oldpeak",
-            "slope",
-            "ca",
-            "thal",
-        ]
-        input_df = input_df[feature_order]
-
-        # Preprocess
-        X_processed = preprocessor.transform(input_df)
+        X = _feature_matrix(row)
+        timer.lap("parse_validate")
 
-        # Predict
-        prediction = model.predict(X_processed)[0]
-        probability = model.predict_proba(X_processed)[0][1]
+        # Repeated inputs are answered from the cache
+        cached = None
+        if prediction_cache.enabled:
+            cache_key = prediction_cache.make_key(X[0], bundle.version)
+            cached = prediction_cache.get(cache_key)
 
-        # Determine confidence level
-        if probability < 0.3:
-            confidence = "Low"
-        elif probability < 0.7:
-            confidence = "Medium"
+        if cached is not None:
+            prediction, probability, confidence = cached
         else:
-            confidence = "High"
+            # Class, probability and confidence come from one scoring pass,
+            # coalesced with concurrent requests when enabled
+            if MICRO_BATCHING_ENABLED:
+                timer.reset()
+                scored = await micro_batcher.submit(X[0], bundle)
+                # Includes the queue wait and the shared batch's preprocessing
+                timer.lap("infer")
+            else:
+                predictions, probabilities, confidences = await run_inference(
+                    X, bundle, timer.durations
+                )
+                scored = predictions[0], probabilities[0], confidences[0]
+            prediction, probability, confidence = scored
 
-        # Log prediction
-        logger.info(
-            f"Prediction: {prediction}, "
-            f"Probability: {probability:.4f}, "
-            f"Confidence: {confidence}"
-        )
+            if prediction_cache.enabled:
+                prediction_cache.put(cache_key, scored)
+
+        # Log prediction (per-request outcomes are logged by the middleware)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Prediction: {prediction}, "
+                f"Probability: {probability:.4f}, "
+                f"Confidence: {confidence}"
+            )
 
         # Update metrics
         PREDICTION_COUNT.labels(prediction_class=str(prediction)).inc()
 
-        return PredictionResponse(
-            prediction=int(prediction),
-            probability=float(probability),
-            confidence=confidence,
+        timer.reset()
+        response = ORJSONResponse(
+            {
+                "prediction": int(prediction),
+                "probability": float(probability),
+                "confidence": confidence,
+            }
         )
+        timer.lap("serialize")
+
+        return _finish_timing(timer, PREDICT_STAGES, response)
 
     except Exception as e:
         logger.error(f"Error during prediction: {e}")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+    finally:
+        bundle.release()
+
+
+@app.post(
+    "/predict/batch",
+    response_model=BatchPredictionResponse,
+    openapi_extra=_json_body(BatchPredictionRequest),
+)
+async def predict_batch(request: Request):
+    """
+    Predict heart disease risk for many patients in one call
+
+    Valid records are stacked into a single matrix and scored with one
+    preprocessor and model pass. Invalid records are reported per item
+    without failing the rest of the batch.
+
+    Args:
+        request: Request whose JSON body is {"records": [...]}
+
+    Returns:
+        Per-record predictions or validation errors, in request order
+    """
+    timer = StageTimer()
+    body = await request.body()
+    timer.lap("read_body")
+
+    try:
+        n_records, rows, valid_indices, errors = decode_batch(
+            BATCH_ADAPTER,
+            BATCH_ENVELOPE_ADAPTER,
+            INPUT_ADAPTER,
+            body,
+            len(FEATURE_COLUMNS),
+            MAX_BATCH_SIZE,
+        )
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    bundle = _acquire_bundle()
+    if bundle is None:
+        logger.error("Model or preprocessor not loaded")
+        raise HTTPException(
+            status_code=503,
+            detail="Model not available. Please check if model files are present.",
+        )
+
+    try:
+        results = [
+            {
+                "index": i,
+                "prediction": None,
+                "probability": None,
+                "confidence": None,
+                "errors": errors.get(i),
+            }
+            for i in range(n_records)
+        ]
+
+        if len(rows):
+            X = _feature_matrix(rows)
+            timer.lap("parse_validate")
+            predictions = np.empty(len(rows), dtype=np.int64)
+            probabilities = np.empty(len(rows), dtype=np.float64)
+            confidences = np.empty(len(rows), dtype=object)
+
+            # Only rows missing from the cache go through the model
+            pending = np.arange(len(rows))
+            if prediction_cache.enabled:
+                cache_keys = [
+                    prediction_cache.make_key(row, bundle.version) for row in X
+                ]
+                misses = []
+                for j, key in enumerate(cache_keys):
+                    cached = prediction_cache.get(key)
+                    if cached is None:
+                        misses.append(j)
+                    else:
+                        predictions[j], probabilities[j], confidences[j] = cached
+                pending = np.array(misses, dtype=np.intp)
+
+            if len(pending):
+                try:
+                    scored = await run_inference(X[pending], bundle, timer.durations)
+                except Exception as e:
+                    logger.error(f"Error during batch prediction: {e}")
+                    raise HTTPException(
+                        status_code=500, detail=f"Prediction failed: {str(e)}"
+                    )
+                (
+                    predictions[pending],
+                    probabilities[pending],
+                    confidences[pending],
+                ) = scored
+
+                if prediction_cache.enabled:
+                    for j in pending:
+                        prediction_cache.put(
+                            cache_keys[j],
+                            (predictions[j], probabilities[j], confidences[j]),
+                        )
+
+            timer.reset()
+            for i, prediction, probability, confidence in zip(
+                valid_indices.tolist(),
+                predictions.tolist(),
+                probabilities.tolist(),
+                confidences.tolist(),
+            ):
+                result = results[i]
+                result["prediction"] = prediction
+                result["probability"] = probability
+                result["confidence"] = confidence
+            timer.lap("serialize")
+
+            classes, counts = np.unique(predictions, return_counts=True)
+            for prediction_class, count in zip(classes, counts):
+                PREDICTION_COUNT.labels(prediction_class=str(prediction_class)).inc(
+                    int(count)
+                )
+
+        else:
+            timer.lap("parse_validate")
+    finally:
+        bundle.release()
+
+    # Per-request outcomes are logged, sampled, by the middleware
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Batch prediction: {len(rows)} scored, {len(errors)} rejected")
+
+    timer.reset()
+    response = ORJSONResponse({"results": results})
+    timer.lap("serialize")
+
+    return _finish_timing(timer, BATCH_STAGES, response)
+
+
+@app.post("/admin/reload")
+async def admin_reload(x_admin_token: Optional[str] = Header(None)):
+    """
+    Reload the model from disk without restarting the server
+
+    Requires ADMIN_TOKEN to be set and sent in the X-Admin-Token header.
+    The new model is loaded and validated against the golden inputs in a
+    background thread, then swapped in atomically. Requests already in
+    flight finish on the previous model.
+
+    Under the prefork server, the request is passed to the supervisor as
+    SIGHUP and answered with 202: the supervisor loads the model once and
+    replaces every worker, instead of this worker reloading alone.
+
+    Returns:
+        New and previous model versions and the load duration
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=403,
+            detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them",
+        )
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode(), ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    if supervisor_pid is not None:
+        os.kill(supervisor_pid, signal.SIGHUP)
+        bundle = model_bundle
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": "reload_requested",
+                "version": bundle.version if bundle is not None else None,
+            },
+        )
+
+    try:
+        bundle, previous = await asyncio.to_thread(reload_model)
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        logger.error(f"Model reload rejected: {e}")
+        raise HTTPException(status_code=422, detail=f"Model rejected: {str(e)}")
+    except Exception as e:
+        logger.error(f"Model reload failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Reload failed: {str(e)}")
+
+    return {
+        "status": "reloaded",
+        "version": bundle.version,
+        "previous_version": previous.version if previous is not None else None,
+        "load_duration_seconds": bundle.load_duration,
+    }
 
 
 if __name__ == "__main__":
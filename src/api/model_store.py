@@ -0,0 +1,306 @@
+"""
+Model store for the prediction API
+Loads model artifacts into versioned bundles, validates them against a
+golden input set, and tracks artifact changes for hot reloading
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.models.artifacts import MANIFEST_FILE
+from src.models.compiled import CompiledModel
+from src.models.inference import DECISION_THRESHOLD, score_matrix
+from src.utils.features import FEATURE_COLUMNS
+
+# Largest difference allowed between a golden record's expected probability
+# and the one the loaded model produces (float32 scoring stays well within)
+GOLDEN_PROBABILITY_TOLERANCE = 1e-4
+
+# Used when no golden input file is available
+DEFAULT_GOLDEN_INPUT = {
+    "age": 63,
+    "sex": 1,
+    "cp": 3,
+    "trestbps": 145,
+    "chol": 233,
+    "fbs": 1,
+    "restecg": 0,
+    "thalach": 150,
+    "exang": 0,
+    "oldpeak": 2.3,
+    "slope": 0,
+    "ca": 0,
+    "thal": 1,
+}
+
+
+class ReloadInProgressError(RuntimeError):
+    """Raised when a reload is requested while another one is running"""
+
+
+class ModelBundle:
+    """
+    Model, preprocessor and metadata that are always swapped together
+
+    Requests take a reference to the current bundle when they start, so a
+    reload never mixes a new model with an old preprocessor and in-flight
+    requests finish on the bundle they started with.
+
+    Requests register with acquire() and release(). Once a replaced bundle
+    is retired, its executor is shut down when the last request using it
+    has been released, so queued work never finds its pool gone.
+    """
+
+    def __init__(
+        self, model, preprocessor, version, source, load_duration, executor=None
+    ):
+        """
+        Initialize bundle
+
+        Args:
+            model: Fitted classifier or compiled scorer
+            preprocessor: Fitted HeartDiseasePreprocessor or CompiledPreprocessor
+            version: Content hash identifying the artifacts
+            source: Paths the artifacts were loaded from
+            load_duration: Seconds spent loading and warming the bundle
+            executor: Optional InferenceExecutor bound to this bundle
+        """
+        self.model = model
+        self.preprocessor = preprocessor
+        self.version = version
+        self.source = source
+        self.load_duration = load_duration
+        self.executor = executor
+
+        self._lock = threading.Lock()
+        self._users = 0
+        self._retired = False
+
+    def acquire(self):
+        """
+        Register a request using this bundle
+
+        Returns:
+            False if the bundle has been retired; the caller should use the
+            bundle that replaced it instead
+        """
+        with self._lock:
+            if self._retired:
+                return False
+            self._users += 1
+            return True
+
+    def release(self):
+        """Unregister a request, closing a retired bundle after its last one"""
+        with self._lock:
+            self._users -= 1
+            close = self._retired and self._users == 0
+        if close:
+            self._close()
+
+    def retire(self):
+        """Stop serving new requests and close once in-flight ones finish"""
+        with self._lock:
+            self._retired = True
+            close = self._users == 0
+        if close:
+            self._close()
+
+    def _close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+
+def artifact_paths(model_format, model_path, preprocessor_path, compiled_path):
+    """
+    Resolve which artifact files will be served
+
+    Returns:
+        List of paths; the compiled artifact is preferred when requested and
+        present, otherwise the pickled model and preprocessor
+    """
+    if model_format == "compiled" and Path(compiled_path).exists():
+        return [Path(compiled_path)]
+    return [Path(model_path), Path(preprocessor_path)]
+
+
+def _artifact_files(paths):
+    """Expand artifact directories into their files, in a stable order"""
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.is_file()))
+        else:
+            files.append(path)
+    return files
+
+
+def compute_version(paths):
+    """Short SHA-256 over the contents of the artifact files"""
+    digest = hashlib.sha256()
+    for path in _artifact_files(paths):
+        digest.update(path.name.encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def manifest_path(model_path):
+    """Manifest that training renames into place after writing the artifacts"""
+    return Path(model_path).parent / MANIFEST_FILE
+
+
+def artifact_signature(paths):
+    """Cheap change detector based on file sizes and modification times"""
+    signature = []
+    for path in _artifact_files(paths):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        signature.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def load_bundle(paths, mmap=True):
+    """
+    Load artifacts into a new ModelBundle
+
+    Args:
+        paths: Output of artifact_paths
+        mmap: Memory-map compiled artifacts read-only
+
+    Returns:
+        ModelBundle
+
+    Raises:
+        FileNotFoundError: If an artifact is missing
+    """
+    start_time = time.perf_counter()
+
+    for path in paths:
+        if not path.exists():
+            raise FileNotFoundError(f"Model artifact not found at {path}")
+
+    if len(paths) == 1:
+        compiled = CompiledModel.load(paths[0], mmap_mode="r" if mmap else None)
+        model, preprocessor = compiled.scorer, compiled.preprocessor
+    else:
+        # scikit-learn and joblib are only needed to unpickle the estimators
+        import joblib
+
+        from src.utils.preprocessing import HeartDiseasePreprocessor
+
+        model = joblib.load(paths[0])
+        preprocessor = HeartDiseasePreprocessor.load(paths[1])
+
+    return ModelBundle(
+        model,
+        preprocessor,
+        version=compute_version(paths),
+        source=[str(path) for path in paths],
+        load_duration=time.perf_counter() - start_time,
+    )
+
+
+def load_golden_inputs(path):
+    """
+    Load the golden input set used to validate a model before serving it
+
+    The file holds one record or a list of records in the /predict schema.
+    Records may carry an "expected_prediction" key (hand-labeled sets) and
+    an "expected_probability" key (written by training with each model).
+
+    Returns:
+        Tuple of (feature matrix, expected predictions or None, expected
+        probabilities or None)
+    """
+    records = [DEFAULT_GOLDEN_INPUT]
+    if path is not None and Path(path).exists():
+        with open(path) as f:
+            records = json.load(f)
+        if isinstance(records, dict):
+            records = [records]
+
+    # Rounded through float32 like the features of requests
+    X = np.array(
+        [[float(record[name]) for name in FEATURE_COLUMNS] for record in records],
+        dtype=np.float32,
+    ).astype(np.float64)
+
+    expected = None
+    if all("expected_prediction" in record for record in records):
+        expected = np.array([record["expected_prediction"] for record in records])
+
+    expected_probabilities = None
+    if all("expected_probability" in record for record in records):
+        expected_probabilities = np.array(
+            [record["expected_probability"] for record in records], dtype=np.float64
+        )
+
+    return X, expected, expected_probabilities
+
+
+def validate_bundle(
+    bundle,
+    X_golden,
+    expected=None,
+    min_agreement=1.0,
+    threshold=DECISION_THRESHOLD,
+    expected_probabilities=None,
+):
+    """
+    Score the golden inputs with a bundle and check the results are sane
+
+    This also warms the bundle: the first call through the model pays the
+    one-time costs before live traffic reaches it.
+
+    Args:
+        bundle: ModelBundle to validate
+        X_golden: Raw golden feature matrix
+        expected: Optional expected predictions for the golden rows
+        min_agreement: Minimum share of expected predictions to reproduce
+        threshold: Decision threshold the bundle will be served with
+        expected_probabilities: Optional probabilities the bundle must
+            reproduce; without expected predictions, the expected classes
+            are derived from them at threshold
+
+    Raises:
+        ValueError: If the bundle produces invalid output
+    """
+    predictions, probabilities, _ = score_matrix(
+        bundle.model, bundle.preprocessor, X_golden.copy(), threshold
+    )
+
+    if len(predictions) != len(X_golden) or len(probabilities) != len(X_golden):
+        raise ValueError("Model returned the wrong number of predictions")
+    if not np.all(np.isfinite(probabilities)):
+        raise ValueError("Model returned non-finite probabilities")
+    if np.any(probabilities < 0) or np.any(probabilities > 1):
+        raise ValueError("Model returned probabilities outside [0, 1]")
+    if not np.isin(predictions, [0, 1]).all():
+        raise ValueError("Model returned classes other than 0 and 1")
+
+    if expected_probabilities is not None:
+        difference = float(np.max(np.abs(probabilities - expected_probabilities)))
+        if difference > GOLDEN_PROBABILITY_TOLERANCE:
+            raise ValueError(
+                f"Model probabilities differ from the golden ones by up to "
+                f"{difference:.4f}; the artifacts do not belong together"
+            )
+        if expected is None:
+            expected = np.where(expected_probabilities > threshold, 1, 0)
+
+    if expected is not None:
+        agreement = float(np.mean(predictions == expected))
+        if agreement < min_agreement:
+            raise ValueError(
+                f"Model agrees with {agreement:.0%} of golden predictions, "
+                f"below the required {min_agreement:.0%}"
+            )
@@ -0,0 +1,134 @@
+"""
+Request logging for the prediction API
+Structured JSON formatting, queue-based non-blocking handlers and
+per-endpoint sampling of request logs
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        # Structured fields passed as logger.info(..., extra={"fields": {...}})
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(logger, json_format=False, use_queue=False):
+    """
+    Switch a logger's handlers to JSON output and/or a background thread
+
+    With use_queue, the logger's handlers are moved behind a QueueListener
+    and replaced by a QueueHandler, so logging calls only enqueue the record
+    and formatting and I/O happen on the listener thread.
+
+    Args:
+        logger: Logger whose handlers are reconfigured (usually the root)
+        json_format: Format records as JSON lines
+        use_queue: Hand records to a background listener thread
+
+    Returns:
+        The started QueueListener, or None when use_queue is False
+    """
+    handlers = list(logger.handlers)
+
+    if json_format:
+        formatter = JsonFormatter()
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+    if not use_queue or not handlers:
+        return None
+
+    log_queue = queue.SimpleQueue()
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    return listener
+
+
+def parse_sample_rates(value):
+    """
+    Parse per-endpoint sampling rates
+
+    Args:
+        value: Comma-separated "route=rate" pairs, e.g. "/predict=0.1,/health=0"
+
+    Returns:
+        Dictionary mapping route templates to rates in [0, 1]
+
+    Raises:
+        ValueError: If a pair is malformed or a rate is out of range
+    """
+    rates = {}
+    for pair in filter(None, (part.strip() for part in (value or "").split(","))):
+        route, sep, rate = pair.rpartition("=")
+        if not sep or not route:
+            raise ValueError(f"Invalid sample rate {pair!r}, expected route=rate")
+        rate = float(rate)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Sample rate for {route} must be between 0 and 1")
+        rates[route.strip()] = rate
+    return rates
+
+
+class RequestLogSampler:
+    """
+    Decide which requests are logged
+
+    Error responses and slow requests are always logged; other requests are
+    logged with the sampling rate of their route.
+    """
+
+    def __init__(self, default_rate=1.0, rates=None, slow_threshold=None):
+        """
+        Initialize sampler
+
+        Args:
+            default_rate: Sampling rate for routes without their own rate
+            rates: Optional dictionary of route template -> sampling rate
+            slow_threshold: Requests taking at least this many seconds are
+                always logged (None disables)
+        """
+        self.default_rate = default_rate
+        self.rates = rates or {}
+        self.slow_threshold = slow_threshold
+
+    def should_log(self, route, status_code, duration):
+        """Return True if a request with this outcome should be logged"""
+        if status_code >= 400:
+            return True
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            return True
+
+        rate = self.rates.get(route, self.default_rate)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        return random.random() < rate
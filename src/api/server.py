@@ -0,0 +1,443 @@
+"""
+Production Server for the Heart Disease Prediction API
+Loads the model once, binds the listening socket, then forks worker
+processes that each run uvicorn on the shared socket. Model memory loaded
+before the fork is shared copy-on-write between the workers, and
+Prometheus metrics are aggregated across them through
+PROMETHEUS_MULTIPROC_DIR.
+
+SIGHUP reloads the model: the supervisor loads and validates the new
+artifacts once, forks a fresh set of workers from it, then drains the old
+ones. /admin/reload on any worker forwards to it.
+
+Usage:
+    python -m src.api.server --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import gc
+import logging
+import math
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Worker processes (0 = one per CPU available to the container)
+API_WORKERS = int(os.getenv("API_WORKERS", "0"))
+
+# Seconds workers get to finish in-flight requests after SIGTERM
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+# Workers that exit within this many seconds of starting are restarted
+# only after this delay, so a worker that cannot start does not fork-loop
+RESTART_DELAY = 1.0
+
+
+def cgroup_cpu_limit(cgroup_root="/sys/fs/cgroup"):
+    """
+    CPU quota of the container, from cgroup v2 or v1
+
+    Args:
+        cgroup_root: Mount point of the cgroup filesystem
+
+    Returns:
+        Number of CPUs allowed by the quota (may be fractional), or None
+        when there is no quota
+    """
+    root = Path(cgroup_root)
+
+    try:
+        quota, period = (root / "cpu.max").read_text().split()[:2]
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return quota / period
+
+
+def available_cpus(cgroup_root="/sys/fs/cgroup"):
+    """
+    CPUs this process can use
+
+    The CPU affinity mask, capped by the cgroup quota rounded up, so a pod
+    limited to 500m CPU runs one worker however many cores the node has.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    limit = cgroup_cpu_limit(cgroup_root)
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return cpus
+
+
+def prepare_metrics_dir(path=None):
+    """
+    Set up the directory workers share Prometheus metrics through
+
+    prometheus_client switches to multiprocess mode when
+    PROMETHEUS_MULTIPROC_DIR is set at import time, so this must run
+    before the app is imported. Files left by a previous run are removed.
+
+    Args:
+        path: Directory to use (default: a new temporary directory)
+
+    Returns:
+        The directory
+    """
+    path = Path(path) if path else Path(tempfile.mkdtemp(prefix="prometheus-"))
+    path.mkdir(parents=True, exist_ok=True)
+    for stale in path.glob("*.db"):
+        stale.unlink()
+
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(path)
+    return path
+
+
+def bind_socket(host, port, backlog=2048):
+    """Bind and listen on the socket every worker accepts connections from"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve_worker(sock, log_level="info", graceful_timeout=GRACEFUL_TIMEOUT):
+    """
+    Run uvicorn on an inherited socket in a forked worker
+
+    uvicorn handles SIGTERM itself: it stops accepting connections, waits
+    up to graceful_timeout seconds for in-flight requests, then runs the
+    app's shutdown handlers.
+    """
+    import uvicorn
+
+    from src.api import main as api
+
+    # /admin/reload forwards to the supervisor instead of reloading here
+    api.supervisor_pid = os.getppid()
+
+    # The background log thread of the parent does not survive the fork
+    if api.log_listener is not None:
+        api.log_listener.start()
+
+    config = uvicorn.Config(
+        api.app,
+        log_level=log_level,
+        timeout_graceful_shutdown=graceful_timeout,
+    )
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        if api.log_listener is not None:
+            api.log_listener.stop()
+
+
+class PreforkServer:
+    """
+    Supervise forked worker processes sharing one listening socket
+
+    Workers that die are replaced. SIGTERM or SIGINT is forwarded to every
+    worker as SIGTERM; workers still running graceful_timeout seconds
+    later (plus a margin) are killed.
+
+    SIGHUP, or a change in what watch_fn returns, calls reload_fn and, if
+    it succeeds, replaces every worker: the new ones are forked first and
+    the old ones then drain like on shutdown.
+    """
+
+    def __init__(
+        self,
+        sock,
+        workers,
+        worker_fn,
+        graceful_timeout=GRACEFUL_TIMEOUT,
+        on_exit=None,
+        reload_fn=None,
+        watch_fn=None,
+        watch_interval=0.0,
+    ):
+        """
+        Initialize server
+
+        Args:
+            sock: Bound, listening socket shared by the workers
+            workers: Number of worker processes
+            worker_fn: Function called with the socket in each worker
+            graceful_timeout: Seconds workers get to drain after SIGTERM
+            on_exit: Optional function called with the pid of each reaped
+                worker
+            reload_fn: Optional function run in the supervisor before the
+                workers are replaced; returning False keeps them
+            watch_fn: Optional function polled every watch_interval seconds;
+                a reload is triggered whenever its result changes
+            watch_interval: Seconds between watch_fn calls
+        """
+        self.sock = sock
+        self.workers = workers
+        self.worker_fn = worker_fn
+        self.graceful_timeout = graceful_timeout
+        self.on_exit = on_exit
+        self.reload_fn = reload_fn
+        self.watch_fn = watch_fn
+        self.watch_interval = watch_interval
+        self.children = {}
+        # Pids of replaced workers still draining, with their kill deadline
+        self.retiring = {}
+        self._stopping = False
+        self._kill_deadline = None
+        self._reload_requested = False
+        self._watched = None
+        self._next_watch = None
+
+    def spawn(self):
+        """Fork one worker process"""
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGHUP, signal.SIG_DFL)
+                self.worker_fn(self.sock)
+            except BaseException:
+                logger.exception("Worker failed")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        self.children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+        return pid
+
+    def stop(self, signum=None, frame=None):
+        """Ask every worker to drain and exit"""
+        if self._stopping:
+            return
+        self._stopping = True
+        self._kill_deadline = time.monotonic() + self.graceful_timeout + 5
+        logger.info(f"Shutting down {len(self.children)} workers")
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def request_reload(self, signum=None, frame=None):
+        """Reload from the supervisor loop (SIGHUP handler)"""
+        self._reload_requested = True
+
+    def reload(self):
+        """
+        Replace every worker with one forked after reload_fn
+
+        The new workers start before the old ones are asked to drain, so
+        the socket is served throughout.
+        """
+        if self.reload_fn is not None and not self.reload_fn():
+            logger.warning("Reload failed, keeping the current workers")
+            return
+
+        old = [pid for pid in self.children if pid not in self.retiring]
+        for _ in range(self.workers):
+            self.spawn()
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        for pid in old:
+            self.retiring[pid] = deadline
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        logger.info(f"Reloaded: replacing workers {old}")
+
+    def _poll_watch(self):
+        """Request a reload when the watched value has changed"""
+        now = time.monotonic()
+        if self.watch_fn is None or now < self._next_watch:
+            return
+        self._next_watch = now + self.watch_interval
+
+        try:
+            current = self.watch_fn()
+        except Exception as e:
+            logger.error(f"Watch check failed: {e}")
+            return
+        if current != self._watched:
+            self._watched = current
+            self._reload_requested = True
+
+    def _kill_overdue(self):
+        """SIGKILL workers still running past their drain deadline"""
+        now = time.monotonic()
+        if self._stopping and now > self._kill_deadline:
+            for child in list(self.children):
+                logger.warning(f"Killing worker {child} after drain timeout")
+                os.kill(child, signal.SIGKILL)
+            self._kill_deadline = float("inf")
+
+        for pid, deadline in list(self.retiring.items()):
+            if now > deadline:
+                logger.warning(f"Killing replaced worker {pid} after drain timeout")
+                os.kill(pid, signal.SIGKILL)
+                self.retiring[pid] = float("inf")
+
+    def run(self):
+        """Start the workers and supervise them until they have all exited"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGHUP, self.request_reload)
+
+        if self.watch_fn is not None:
+            self._watched = self.watch_fn()
+            self._next_watch = time.monotonic() + self.watch_interval
+
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            if self._reload_requested and not self._stopping:
+                self._reload_requested = False
+                self.reload()
+
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+
+            if pid == 0:
+                self._kill_overdue()
+                if not self._stopping:
+                    self._poll_watch()
+                time.sleep(0.1)
+                continue
+
+            started = self.children.pop(pid)
+            if self.on_exit is not None:
+                self.on_exit(pid)
+            if self.retiring.pop(pid, None) is not None or self._stopping:
+                continue
+
+            logger.warning(
+                f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, "
+                f"restarting"
+            )
+            if time.monotonic() - started < RESTART_DELAY:
+                time.sleep(RESTART_DELAY)
+            self.spawn()
+
+        self.sock.close()
+        logger.info("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve the prediction API with preforked workers"
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=API_WORKERS,
+        help="Worker processes (0 = one per available CPU, honoring cgroup limits)",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=GRACEFUL_TIMEOUT,
+        help="Seconds workers get to finish in-flight requests after SIGTERM",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    # Workers aggregate each other's metrics through this directory
+    own_metrics_dir = not os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    metrics_dir = prepare_metrics_dir(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+    from prometheus_client import multiprocess
+
+    from src.api import main as api
+
+    workers = args.workers or available_cpus()
+
+    # Load once here so workers share the model pages, and keep the garbage
+    # collector from touching (and so copying) them in every worker
+    api.preload_model()
+    gc.freeze()
+
+    # The supervisor serves no requests; keep its idle gauges out of /metrics
+    multiprocess.mark_process_dead(os.getpid())
+
+    sock = bind_socket(args.host, args.port)
+    logger.info(
+        f"Listening on {args.host}:{args.port} with {workers} workers "
+        f"(pid {os.getpid()})"
+    )
+
+    def worker_fn(worker_sock):
+        serve_worker(worker_sock, args.log_level, args.graceful_timeout)
+
+    def worker_exited(pid):
+        # Drop the live gauges of the worker from the aggregation
+        multiprocess.mark_process_dead(pid)
+
+    def reload_model():
+        # New workers inherit the bundle loaded here; the previous one is
+        # freed once no frozen reference keeps it alive
+        gc.unfreeze()
+        try:
+            api.reload_preloaded_model()
+        except Exception as e:
+            logger.error(f"Model reload failed: {e}")
+            return False
+        finally:
+            gc.collect()
+            gc.freeze()
+        return True
+
+    # Training publishes the manifest last, once every artifact is written
+    manifest = api.manifest_path(api.MODEL_PATH)
+
+    def manifest_signature():
+        return api.artifact_signature([manifest])
+
+    try:
+        PreforkServer(
+            sock,
+            workers,
+            worker_fn,
+            args.graceful_timeout,
+            on_exit=worker_exited,
+            reload_fn=reload_model,
+            watch_fn=manifest_signature if api.MODEL_WATCH_INTERVAL > 0 else None,
+            watch_interval=api.MODEL_WATCH_INTERVAL,
+        ).run()
+    finally:
+        if own_metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Request timing for the prediction API
+Per-stage latency spans, Server-Timing headers and sampled cProfile dumps
+"""
+
+import cProfile
+import itertools
+import os
+import random
+import time
+from pathlib import Path
+
+# Stages of the prediction pipeline, in the order a request goes through them
+STAGES = ("read_body", "parse_validate", "preprocess", "infer", "serialize")
+
+
+class StageTimer:
+    """
+    Accumulate the time a request spends in each pipeline stage
+
+    A lap closes the span that started at the previous lap (or when the
+    timer was created), so timing a stage costs one perf_counter_ns call.
+    Code that times its own stages writes nanoseconds to durations directly.
+    """
+
+    __slots__ = ("durations", "_mark")
+
+    def __init__(self):
+        self.durations = {}
+        self._mark = time.perf_counter_ns()
+
+    def lap(self, stage):
+        """Charge the time since the previous lap to a stage"""
+        now = time.perf_counter_ns()
+        self.durations[stage] = self.durations.get(stage, 0) + now - self._mark
+        self._mark = now
+
+    def reset(self):
+        """Start the next span now, leaving the time since the last lap out"""
+        self._mark = time.perf_counter_ns()
+
+    def observe(self, histograms):
+        """
+        Record the stage durations
+
+        Args:
+            histograms: Dictionary of stage -> histogram child (in seconds)
+        """
+        for stage, duration in self.durations.items():
+            histograms[stage].observe(duration / 1e9)
+
+    def server_timing(self):
+        """Server-Timing header value with the stage durations in ms"""
+        return ", ".join(
+            f"{stage};dur={duration / 1e6:.3f}"
+            for stage, duration in self.durations.items()
+        )
+
+
+def stage_histograms(histogram, endpoint):
+    """
+    Bind a stage histogram to an endpoint once, so requests skip the
+    label lookup
+
+    Args:
+        histogram: Histogram with "endpoint" and "stage" labels
+        endpoint: Endpoint label value
+
+    Returns:
+        Dictionary of stage -> histogram child
+    """
+    return {stage: histogram.labels(endpoint=endpoint, stage=stage) for stage in STAGES}
+
+
+class RequestProfiler:
+    """
+    Profile a sampled fraction of requests with cProfile
+
+    Only one request is profiled at a time: cProfile hooks the whole
+    interpreter, so concurrent requests on the event loop show up in the
+    profile of the sampled one.
+    """
+
+    def __init__(self, sample_rate=0.0, output_dir="profiles"):
+        """
+        Initialize profiler
+
+        Args:
+            sample_rate: Fraction of requests profiled (0 disables)
+            output_dir: Directory the .prof files are written to
+        """
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self._active = False
+        self._counter = itertools.count()
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0
+
+    def start(self):
+        """
+        Start profiling the current request if it is sampled
+
+        Returns:
+            Running cProfile.Profile, or None if the request is not profiled
+        """
+        if self._active or random.random() >= self.sample_rate:
+            return None
+
+        self._active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def stop(self, profiler, route):
+        """
+        Stop a profile started by start and write it to disk
+
+        Args:
+            profiler: Profile returned by start
+            route: Route template of the request, used in the file name
+
+        Returns:
+            Path of the written .prof file
+        """
+        profiler.disable()
+        self._active = False
+
+        name = route.strip("/").replace("/", "_") or "root"
+        path = self.output_dir / (
+            f"{name}-{time.time_ns()}-{os.getpid()}-{next(self._counter)}.prof"
+        )
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        return path
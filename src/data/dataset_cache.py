@@ -0,0 +1,122 @@
+"""
+Columnar Cache for the Raw Heart Disease CSV
+Parses the CSV once into an uncompressed Feather file with fixed compact
+dtypes, keyed by a content hash of the source and the storage schema, so
+later loads are a memory-mapped read instead of a text parse
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from src.utils.features import FEATURE_DTYPES, apply_feature_schema
+
+# Where converted datasets are kept ("" disables the cache)
+DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR", ".cache/datasets")
+
+# Storage dtypes: the feature schema plus small integer codes for the target
+COLUMN_DTYPES = dict(FEATURE_DTYPES)
+COLUMN_DTYPES["target"] = "int8"
+
+# Bump when the layout of cached files changes without a dtype change
+CACHE_FORMAT_VERSION = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Hex blake2b digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(source):
+    """
+    Hex digest of the source contents, the storage dtypes and the cache
+    format version, so a schema change never reads back older files
+    """
+    schema = json.dumps([CACHE_FORMAT_VERSION, COLUMN_DTYPES])
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(file_digest(source).encode())
+    digest.update(schema.encode())
+    return digest.hexdigest()
+
+
+def cache_path(source, cache_dir=DATASET_CACHE_DIR):
+    """Cache file for the current contents of source and storage schema"""
+    source = Path(source)
+    return Path(cache_dir) / f"{source.stem}-{cache_key(source)}.feather"
+
+
+def read_raw_csv(source):
+    """
+    Parse the raw CSV into the storage dtypes
+
+    "?" markers and empty cells become missing values.
+
+    Returns:
+        pyarrow Table with the feature columns and target
+    """
+    import pyarrow as pa
+
+    df = pd.read_csv(source, na_values="?", usecols=list(COLUMN_DTYPES))
+    schema = pa.schema(
+        [(name, pa.from_numpy_dtype(dtype)) for name, dtype in COLUMN_DTYPES.items()]
+    )
+    # Integer columns keep missing values as Arrow nulls
+    return pa.Table.from_pandas(
+        df[list(COLUMN_DTYPES)], schema=schema, preserve_index=False
+    )
+
+
+def to_frame(table):
+    """
+    Convert a cached table to pandas without copying where possible
+
+    Integer columns with missing values cannot stay int8 in NumPy; they are
+    returned as float32 with NaN, which the preprocessor's imputer fills.
+    """
+    df = table.to_pandas(split_blocks=True)
+    return apply_feature_schema(df)
+
+
+def load_dataset(source, cache_dir=DATASET_CACHE_DIR):
+    """
+    Load the raw dataset through the columnar cache
+
+    On a miss the CSV is parsed and written to the cache, replacing files
+    cached for earlier contents of the same source. On a hit the Feather
+    file is memory-mapped.
+
+    Args:
+        source: Raw CSV file
+        cache_dir: Cache directory (None or "" reads the CSV directly)
+
+    Returns:
+        DataFrame with the feature columns and target in storage dtypes
+    """
+    if not cache_dir:
+        return to_frame(read_raw_csv(source))
+
+    import pyarrow.feather as feather
+
+    path = cache_path(source, cache_dir)
+    if path.exists():
+        return to_frame(feather.read_table(path, memory_map=True))
+
+    table = read_raw_csv(source)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stale_pattern = f"{Path(source).stem}-{'?' * 32}.feather"
+    for stale in path.parent.glob(stale_pattern):
+        stale.unlink()
+
+    # Write under a temporary name so readers never see a partial file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+    return to_frame(table)
@@ -7,6 +7,8 @@ from pathlib import Path
 import urllib.request
 import pandas as pd
 
+from src.data.dataset_cache import load_dataset
+
 
 def download_heart_disease_dataset():
     """
@@ -60,6 +62,9 @@ def download_heart_disease_dataset():
         df.to_csv(output_file, index=False)
         print(f"Dataset saved with {len(df)} rows and {len(df.columns)} columns")
 
+        # Convert once into the columnar cache used by training
+        load_dataset(output_file)
+
         return df
 
     except Exception as e:
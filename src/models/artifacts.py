@@ -0,0 +1,120 @@
+"""
+Serving artifacts of a trained model
+Writes the files the API loads: the pickled model and preprocessor, the
+compiled scoring artifact, and the golden inputs a reloaded model is
+checked against, followed by a manifest that marks the set as complete
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.models.compiled import compile_model
+from src.models.inference import score_matrix
+from src.utils.features import FEATURE_COLUMNS
+
+GOLDEN_INPUTS_FILE = "golden_inputs.json"
+
+# Written last; the API's file watcher reloads only when it changes
+MANIFEST_FILE = "manifest.json"
+
+# Held-out records written to the golden set of each model
+GOLDEN_ROWS = 20
+
+
+def golden_records(model, preprocessor, X, n_rows=GOLDEN_ROWS):
+    """
+    Golden records for a model, in the /predict schema
+
+    Each record carries the probability the model assigns it as
+    "expected_probability". Serving reproduces those probabilities only
+    with the exact model and preprocessor written alongside them.
+
+    Args:
+        model: Fitted classifier
+        preprocessor: Fitted HeartDiseasePreprocessor
+        X: Raw feature DataFrame, ideally held-out data; rows with missing
+            values are skipped
+        n_rows: Number of records
+
+    Returns:
+        List of record dictionaries
+    """
+    # Rounded through float32 like request features are
+    values = X[FEATURE_COLUMNS].dropna().head(n_rows).to_numpy(dtype=np.float32)
+    _, probabilities, _ = score_matrix(model, preprocessor, values.astype(np.float64))
+
+    return [
+        {
+            **{name: _json_number(value) for name, value in zip(FEATURE_COLUMNS, row)},
+            "expected_probability": float(probability),
+        }
+        for row, probability in zip(values, probabilities)
+    ]
+
+
+def _json_number(value):
+    """Shortest JSON number that rounds back to a float32 value"""
+    number = float(str(value))
+    return int(number) if number.is_integer() else number
+
+
+def save_serving_artifacts(model, preprocessor, models_dir, X_golden):
+    """
+    Write everything the API serves for a model, then the manifest
+
+    Args:
+        model: Fitted classifier
+        preprocessor: Fitted HeartDiseasePreprocessor
+        models_dir: Output directory
+        X_golden: Raw held-out features the golden records are taken from
+    """
+    import joblib
+
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    paths = [
+        models_dir / "preprocessor.pkl",
+        models_dir / "production_model.pkl",
+        models_dir / "compiled_model",
+        models_dir / GOLDEN_INPUTS_FILE,
+    ]
+
+    preprocessor.save(paths[0])
+    joblib.dump(model, paths[1])
+    compile_model(model, preprocessor).save(paths[2])
+    with open(paths[3], "w") as f:
+        json.dump(golden_records(model, preprocessor, X_golden), f, indent=2)
+
+    write_manifest(models_dir, paths)
+
+
+def write_manifest(models_dir, paths):
+    """
+    Record the SHA-256 of each artifact file in models_dir/MANIFEST_FILE
+
+    The manifest is written to a temporary file and renamed into place, so
+    a reader sees either the previous manifest or the complete new one,
+    and only once every artifact has been written.
+
+    Args:
+        models_dir: Directory holding the artifacts
+        paths: Artifact files or directories of files under models_dir
+    """
+    models_dir = Path(models_dir)
+    files = {}
+    for path in map(Path, paths):
+        for file in sorted(path.iterdir()) if path.is_dir() else [path]:
+            with open(file, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            files[file.relative_to(models_dir).as_posix()] = digest
+
+    manifest = {"created_at": time.time(), "files": files}
+    tmp_path = models_dir / f".{MANIFEST_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, models_dir / MANIFEST_FILE)
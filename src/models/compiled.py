@@ -0,0 +1,357 @@
+"""
+Compiled Scoring Artifact for the Production Model
+Turns the fitted preprocessor and model into plain NumPy arrays so serving
+does not go through scikit-learn's input validation on every call
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Marker used by scikit-learn for leaf children
+TREE_LEAF = -1
+
+
+class CompiledPreprocessor:
+    """
+    Impute, and optionally scale, raw features using plain arrays
+    """
+
+    def __init__(self, medians, mean=None, scale=None):
+        """
+        Initialize compiled preprocessor
+
+        Args:
+            medians: Per-feature imputation values
+            mean: Per-feature scaler mean (omit to skip scaling)
+            scale: Per-feature scaler scale (omit to skip scaling)
+        """
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float64)
+
+    def transform_array(self, X, out=None):
+        """
+        Impute and scale a raw feature matrix
+
+        Args:
+            X: 2D array of raw features in FEATURE_COLUMNS order
+            out: Optional preallocated float64 or float32 buffer; may be X
+                itself
+
+        Returns:
+            Transformed features as an ndarray of out's dtype (float64 if
+            out is not given)
+        """
+        if out is None:
+            out = np.empty(np.shape(X), dtype=np.float64)
+        if out is not X:
+            np.copyto(out, X)
+
+        np.copyto(out, self.medians, where=np.isnan(out))
+        if self.mean is not None and out.dtype == np.float64:
+            np.subtract(out, self.mean, out=out)
+            np.divide(out, self.scale, out=out)
+        elif self.mean is not None:
+            # Round once, so float32 results equal the float64 ones cast
+            np.divide(np.subtract(out, self.mean), self.scale, out=out)
+
+        return out
+
+
+class LinearScorer:
+    """
+    Logistic regression with the scaler folded into the weights
+    """
+
+    kind = "logistic_regression"
+
+    def __init__(self, weights, bias, classes):
+        """
+        Initialize linear scorer
+
+        Args:
+            weights: Coefficients applied to raw (imputed) features
+            bias: Intercept applied after the dot product
+            classes: Class labels in predict_proba column order
+        """
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.classes_ = np.asarray(classes)
+
+    def predict_proba(self, X):
+        """Return class probabilities for imputed raw features"""
+        decision = X @ self.weights + self.bias
+        positive = 1.0 / (1.0 + np.exp(-decision))
+        return np.column_stack([1.0 - positive, positive])
+
+    def arrays(self):
+        """Arrays needed to rebuild this scorer"""
+        return {
+            "weights": self.weights,
+            "bias": np.array([self.bias]),
+            "classes": self.classes_,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["weights"], arrays["bias"][0], arrays["classes"])
+
+
+class ForestScorer:
+    """
+    Random forest flattened into node arrays and traversed for all trees at once
+
+    Leaves point to themselves, so traversal is a fixed sequence of array
+    lookups and the arrays can be used directly from a read-only memory map.
+    """
+
+    kind = "random_forest"
+
+    def __init__(self, feature, threshold, left, right, is_leaf, value, roots, classes):
+        """
+        Initialize forest scorer
+
+        Args:
+            feature: Split feature per node (0 for leaves)
+            threshold: Split threshold per node
+            left: Global index of the left child per node (itself for leaves)
+            right: Global index of the right child per node (itself for leaves)
+            is_leaf: Boolean leaf marker per node
+            value: Class probabilities per node, shape (n_nodes, n_classes)
+            roots: Global index of each tree's root node
+            classes: Class labels in predict_proba column order
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.is_leaf = is_leaf
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+
+    def predict_proba(self, X):
+        """Return class probabilities for scaled features"""
+        # Trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.repeat(self.roots[None, :], X.shape[0], axis=0)
+
+        while not self.is_leaf[nodes].all():
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes].mean(axis=1)
+
+    def arrays(self):
+        """Arrays needed to rebuild this scorer"""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "is_leaf": self.is_leaf,
+            "value": self.value,
+            "roots": self.roots,
+            "classes": self.classes_,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            arrays["feature"],
+            arrays["threshold"],
+            arrays["left"],
+            arrays["right"],
+            arrays["is_leaf"],
+            arrays["value"],
+            arrays["roots"],
+            arrays["classes"],
+        )
+
+
+SCORERS = {scorer.kind: scorer for scorer in (LinearScorer, ForestScorer)}
+
+
+class CompiledModel:
+    """
+    Compiled preprocessor and scorer saved together as one artifact
+    """
+
+    def __init__(self, preprocessor, scorer):
+        self.preprocessor = preprocessor
+        self.scorer = scorer
+
+    def _arrays(self):
+        """All arrays of the artifact keyed by their stored name"""
+        arrays = {f"model_{key}": value for key, value in self.scorer.arrays().items()}
+        arrays["kind"] = np.array(self.scorer.kind)
+        arrays["pre_medians"] = self.preprocessor.medians
+        if self.preprocessor.mean is not None:
+            arrays["pre_mean"] = self.preprocessor.mean
+            arrays["pre_scale"] = self.preprocessor.scale
+        return arrays
+
+    def save(self, filepath):
+        """
+        Save the compiled artifact
+
+        A path ending in .npz is written as a single archive. Any other path
+        is written as a directory of .npy files, which load() can memory-map.
+        """
+        filepath = Path(filepath)
+        arrays = self._arrays()
+
+        if filepath.suffix == ".npz":
+            with open(filepath, "wb") as f:
+                np.savez(f, **arrays)
+            return
+
+        filepath.mkdir(parents=True, exist_ok=True)
+        for stale in filepath.glob("*.npy"):
+            stale.unlink()
+        for key, value in arrays.items():
+            np.save(filepath / f"{key}.npy", value, allow_pickle=False)
+
+    @classmethod
+    def load(cls, filepath, mmap_mode=None):
+        """
+        Load a compiled artifact saved with save()
+
+        Args:
+            filepath: .npz archive or .npy directory
+            mmap_mode: For directory artifacts, passed to np.load; "r" maps the
+                arrays read-only so processes loading the same files share
+                their physical pages instead of each holding a copy
+        """
+        filepath = Path(filepath)
+
+        if filepath.is_dir():
+            arrays = {
+                path.stem: np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+                for path in filepath.glob("*.npy")
+            }
+        else:
+            with np.load(filepath, allow_pickle=False) as data:
+                arrays = {key: data[key] for key in data.files}
+
+        preprocessor = CompiledPreprocessor(
+            arrays["pre_medians"], arrays.get("pre_mean"), arrays.get("pre_scale")
+        )
+        scorer_arrays = {
+            key[len("model_") :]: value
+            for key, value in arrays.items()
+            if key.startswith("model_")
+        }
+        scorer = SCORERS[str(arrays["kind"])].from_arrays(scorer_arrays)
+
+        return cls(preprocessor, scorer)
+
+
+def compile_model(model, preprocessor):
+    """
+    Compile a fitted model and HeartDiseasePreprocessor into a CompiledModel
+
+    Args:
+        model: Fitted binary LogisticRegression or RandomForestClassifier
+        preprocessor: Fitted HeartDiseasePreprocessor
+
+    Returns:
+        CompiledModel whose outputs match model.predict_proba
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    if not preprocessor.is_compiled and not preprocessor.compile():
+        raise ValueError("Preprocessor cannot be compiled to plain arrays")
+    medians, mean, scale = preprocessor.compiled_arrays
+
+    if len(model.classes_) != 2:
+        raise ValueError("Only binary classifiers can be compiled")
+
+    if isinstance(model, LogisticRegression):
+        coef = model.coef_[0]
+        weights = coef / scale
+        bias = model.intercept_[0] - np.dot(mean / scale, coef)
+        scorer = LinearScorer(weights, bias, model.classes_)
+        return CompiledModel(CompiledPreprocessor(medians), scorer)
+
+    if isinstance(model, RandomForestClassifier):
+        scorer = _flatten_forest(model)
+        return CompiledModel(CompiledPreprocessor(medians, mean, scale), scorer)
+
+    raise ValueError(f"Cannot compile model of type {type(model).__name__}")
+
+
+def _flatten_forest(model):
+    """Concatenate every tree of a forest into global node arrays"""
+    features, thresholds, lefts, rights, leaves, values, roots = (
+        [],
+        [],
+        [],
+        [],
+        [],
+        [],
+        [],
+    )
+    offset = 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(offset, offset + tree.node_count)
+        leaf = tree.children_left == TREE_LEAF
+
+        value = tree.value[:, 0, :].astype(np.float64)
+        value /= value.sum(axis=1, keepdims=True)
+
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(leaf, node_ids, tree.children_left + offset))
+        rights.append(np.where(leaf, node_ids, tree.children_right + offset))
+        leaves.append(leaf)
+        values.append(value)
+        roots.append(offset)
+        offset += tree.node_count
+
+    # int32 indices halve the footprint of the node arrays
+    return ForestScorer(
+        np.concatenate(features).astype(np.int32),
+        np.concatenate(thresholds).astype(np.float64),
+        np.concatenate(lefts).astype(np.int32),
+        np.concatenate(rights).astype(np.int32),
+        np.concatenate(leaves),
+        np.concatenate(values),
+        np.array(roots, dtype=np.int32),
+        model.classes_,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export the production model as a compiled scoring artifact"
+    )
+    parser.add_argument("--model", default="models/production_model.pkl")
+    parser.add_argument("--preprocessor", default="models/preprocessor.pkl")
+    parser.add_argument(
+        "--output",
+        default="models/compiled_model",
+        help="Directory of .npy files (memory-mappable) or a path ending in .npz",
+    )
+    args = parser.parse_args()
+
+    import joblib
+
+    from src.utils.preprocessing import HeartDiseasePreprocessor
+
+    model = joblib.load(args.model)
+    preprocessor = HeartDiseasePreprocessor.load(args.preprocessor)
+
+    compiled = compile_model(model, preprocessor)
+    compiled.save(Path(args.output))
+    print(f"Compiled {compiled.scorer.kind} saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Incremental Retraining on Newly Arrived Data
+Updates the production model with only the new data partition, compares
+the result against a full retrain on a holdout, and promotes the winner
+"""
+
+import argparse
+import copy
+import time
+from pathlib import Path
+
+import joblib
+import mlflow
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from src.models.artifacts import save_serving_artifacts
+from src.models.tracking import AsyncMlflowLogger
+from src.models.train import build_pipeline
+from src.utils.preprocessing import HeartDiseasePreprocessor, load_and_preprocess_data
+
+
+def update_scaler(preprocessor, X_new):
+    """
+    Update the preprocessor's scaler with new rows via partial_fit
+
+    The median imputer is kept as is: medians cannot be updated
+    incrementally, and the imputed values only need to be plausible.
+
+    Args:
+        preprocessor: Fitted HeartDiseasePreprocessor (left unchanged)
+        X_new: Raw features of the new partition
+
+    Returns:
+        Updated copy of the preprocessor
+    """
+    updated = copy.deepcopy(preprocessor)
+    X_imputed = updated.imputer.transform(X_new)
+    if not isinstance(X_imputed, pd.DataFrame):
+        X_imputed = pd.DataFrame(X_imputed, columns=X_new.columns)
+    updated.scaler.partial_fit(X_imputed)
+    updated.compile()
+    return updated
+
+
+def rebase_linear_model(coef, intercept, old_scaler, new_scaler):
+    """
+    Re-express linear weights for a new scaler without changing predictions
+
+    With z = (x - m0) / s0 and z' = (x - m1) / s1, the decision function
+    w.z + b equals (w * s1 / s0).z' + b + w.(m1 - m0) / s0.
+
+    Returns:
+        Tuple of (coef, intercept) for inputs scaled by new_scaler
+    """
+    ratio = new_scaler.scale_ / old_scaler.scale_
+    shift = (new_scaler.mean_ - old_scaler.mean_) / old_scaler.scale_
+    return coef * ratio, intercept + coef @ shift
+
+
+def update_logistic_regression(model, X_new, y_new, n_samples_seen, epochs=5):
+    """
+    Continue training a logistic regression on new rows only
+
+    Runs a few epochs of SGD on the log loss, starting from the current
+    weights, with the L2 penalty matched to the model's C over all samples
+    seen so far. The result is stored back in a LogisticRegression so that
+    serving and compile_model treat it like any other.
+
+    Args:
+        model: Fitted LogisticRegression whose weights already match the
+            scaling of X_new
+        X_new: Scaled features of the new partition
+        y_new: Labels of the new partition
+        n_samples_seen: Samples the scaler has seen, used for the penalty
+        epochs: Passes over the new partition
+
+    Returns:
+        Updated LogisticRegression
+    """
+    sgd = SGDClassifier(
+        loss="log_loss",
+        alpha=1.0 / (model.C * n_samples_seen),
+        learning_rate="constant",
+        eta0=0.01,
+        max_iter=epochs,
+        tol=None,
+        class_weight=model.class_weight,
+        random_state=42,
+    )
+    sgd.fit(X_new, y_new, coef_init=model.coef_, intercept_init=model.intercept_)
+
+    updated = copy.deepcopy(model)
+    updated.coef_ = sgd.coef_.copy()
+    updated.intercept_ = sgd.intercept_.copy()
+    return updated
+
+
+def update_random_forest(model, X_new, y_new, n_new_trees=50):
+    """
+    Grow extra trees on new rows with warm_start, keeping existing trees
+
+    Returns:
+        Updated RandomForestClassifier
+    """
+    updated = copy.deepcopy(model)
+    updated.set_params(
+        warm_start=True, n_estimators=len(model.estimators_) + n_new_trees
+    )
+    updated.fit(X_new, y_new)
+    updated.set_params(warm_start=False)
+    return updated
+
+
+def incremental_update(model, preprocessor, X_new, y_new, n_new_trees=50, epochs=5):
+    """
+    Update a fitted model and preprocessor with a new data partition
+
+    Logistic regression: the scaler is updated with partial_fit, the weights
+    are rebased onto the new scaling, then trained further with SGD.
+    Random forest: the scaler is kept frozen, because the thresholds of the
+    existing trees are expressed in its scaled space, and new trees are
+    grown on the new rows.
+
+    Args:
+        model: Fitted LogisticRegression or RandomForestClassifier
+        preprocessor: Fitted HeartDiseasePreprocessor
+        X_new: Raw features of the new partition
+        y_new: Labels of the new partition
+        n_new_trees: Trees added to a random forest
+        epochs: SGD passes for logistic regression
+
+    Returns:
+        Tuple of (updated model, updated preprocessor)
+
+    Raises:
+        ValueError: If the model type is not supported, or if y_new does
+            not contain exactly the model's classes (new trees or SGD fit
+            on a single-class partition would not match the model)
+    """
+    new_classes = np.unique(y_new)
+    if not np.array_equal(new_classes, model.classes_):
+        raise ValueError(
+            f"New partition has classes {new_classes.tolist()}, the model "
+            f"{model.classes_.tolist()}; retrain on all data instead"
+        )
+
+    if isinstance(model, LogisticRegression):
+        updated_preprocessor = update_scaler(preprocessor, X_new)
+        coef, intercept = rebase_linear_model(
+            model.coef_,
+            model.intercept_,
+            preprocessor.scaler,
+            updated_preprocessor.scaler,
+        )
+        rebased = copy.deepcopy(model)
+        rebased.coef_, rebased.intercept_ = coef, intercept
+
+        X_scaled = updated_preprocessor.transform_array(
+            X_new.to_numpy(dtype=np.float64)
+        )
+        updated_model = update_logistic_regression(
+            rebased,
+            X_scaled,
+            np.asarray(y_new),
+            n_samples_seen=int(np.max(updated_preprocessor.scaler.n_samples_seen_)),
+            epochs=epochs,
+        )
+        return updated_model, updated_preprocessor
+
+    if isinstance(model, RandomForestClassifier):
+        X_scaled = preprocessor.transform_array(X_new.to_numpy(dtype=np.float64))
+        updated_model = update_random_forest(
+            model, X_scaled, np.asarray(y_new), n_new_trees
+        )
+        return updated_model, preprocessor
+
+    raise ValueError(f"Cannot update {type(model).__name__} incrementally")
+
+
+def full_retrain(model, X, y, memory=None):
+    """
+    Retrain the model's configuration from scratch on all data
+
+    Returns:
+        Tuple of (model, preprocessor)
+    """
+    pipeline = build_pipeline(clone(model), memory=memory).fit(X, y)
+    return (
+        pipeline.named_steps["model"],
+        HeartDiseasePreprocessor.from_pipeline(pipeline),
+    )
+
+
+def holdout_roc_auc(model, preprocessor, X, y):
+    """ROC AUC of a model and preprocessor on holdout data"""
+    X_scaled = preprocessor.transform_array(X.to_numpy(dtype=np.float64))
+    return roc_auc_score(y, model.predict_proba(X_scaled)[:, 1])
+
+
+def promote(model, preprocessor, models_dir, X_holdout):
+    """Write the serving artifacts, with golden records from the holdout"""
+    save_serving_artifacts(model, preprocessor, models_dir, X_holdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Update the production model with newly arrived data"
+    )
+    parser.add_argument("new_data", help="CSV of new labeled rows")
+    parser.add_argument(
+        "--base-data",
+        default="data/raw/heart_disease_cleveland.csv",
+        help="Data the current model was trained on (for the full retrain)",
+    )
+    parser.add_argument(
+        "--holdout",
+        help="Holdout CSV (default: 20%% of the new data, stratified)",
+    )
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--new-trees", type=int, default=50)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.01,
+        help="Holdout ROC AUC the incremental model may lose against a full retrain",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Compare without promoting"
+    )
+    args = parser.parse_args()
+
+    models_dir = Path(args.models_dir)
+    model = joblib.load(models_dir / "production_model.pkl")
+    preprocessor = HeartDiseasePreprocessor.load(models_dir / "preprocessor.pkl")
+
+    X_new, y_new = load_and_preprocess_data(args.new_data)
+    if args.holdout:
+        X_holdout, y_holdout = load_and_preprocess_data(args.holdout)
+    else:
+        X_new, X_holdout, y_new, y_holdout = train_test_split(
+            X_new, y_new, test_size=0.2, random_state=42, stratify=y_new
+        )
+    X_base, y_base = load_and_preprocess_data(args.base_data)
+
+    print(f"Updating {type(model).__name__} with {len(X_new)} new rows")
+
+    start_time = time.perf_counter()
+    try:
+        inc_model, inc_preprocessor = incremental_update(
+            model, preprocessor, X_new, y_new, args.new_trees, args.epochs
+        )
+    except ValueError as e:
+        print(f"Incremental update not possible, using a full retrain: {e}")
+        inc_model = inc_preprocessor = None
+    incremental_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    full_model, full_preprocessor = full_retrain(
+        model,
+        pd.concat([X_base, X_new], ignore_index=True),
+        pd.concat([y_base, y_new], ignore_index=True),
+    )
+    full_seconds = time.perf_counter() - start_time
+
+    metrics = {
+        "current_roc_auc": holdout_roc_auc(model, preprocessor, X_holdout, y_holdout),
+        "full_retrain_roc_auc": holdout_roc_auc(
+            full_model, full_preprocessor, X_holdout, y_holdout
+        ),
+        "full_retrain_seconds": full_seconds,
+    }
+    if inc_model is not None:
+        metrics["incremental_roc_auc"] = holdout_roc_auc(
+            inc_model, inc_preprocessor, X_holdout, y_holdout
+        )
+        metrics["incremental_seconds"] = incremental_seconds
+
+    if (
+        inc_model is not None
+        and metrics["incremental_roc_auc"]
+        >= metrics["full_retrain_roc_auc"] - args.tolerance
+    ):
+        decision = "incremental"
+        chosen = (inc_model, inc_preprocessor)
+    else:
+        decision = "full_retrain"
+        chosen = (full_model, full_preprocessor)
+
+    print("\nHoldout comparison:")
+    for key, value in metrics.items():
+        print(f"  {key}: {value:.4f}")
+    print(f"Selected: {decision}")
+
+    mlflow.set_tracking_uri("file:./mlruns")
+    experiment = mlflow.set_experiment("heart_disease_prediction")
+    with AsyncMlflowLogger(experiment.experiment_id) as tracker:
+        run_id = tracker.start_run("incremental_update")
+        tracker.log_params(
+            run_id,
+            {
+                "model": type(model).__name__,
+                "new_rows": len(X_new),
+                "holdout_rows": len(X_holdout),
+                "tolerance": args.tolerance,
+                "decision": decision,
+                "promoted": not args.dry_run,
+            },
+        )
+        tracker.log_metrics(run_id, metrics)
+        if not args.dry_run:
+            tracker.log_model(run_id, chosen[0])
+        tracker.end_run(run_id)
+
+    if args.dry_run:
+        print("Dry run: production model left unchanged")
+        return
+
+    promote(*chosen, models_dir, X_holdout)
+    print(f"Promoted {decision} model to {models_dir}")
+
+
+if __name__ == "__main__":
+    main()
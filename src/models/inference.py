@@ -0,0 +1,130 @@
+"""
+Inference helpers shared by the API and its worker processes
+Keeps the scoring core importable without the FastAPI application
+"""
+
+import os
+import time
+
+import numpy as np
+
+# Model and preprocessor held by each inference pool worker process
+_worker_model = None
+_worker_preprocessor = None
+
+
+# Default probability of disease above which the positive class is predicted;
+# predicting "p > 0.5" reproduces scikit-learn's predict, which breaks ties
+# towards the first class
+DECISION_THRESHOLD = 0.5
+
+# Probability bands reported as Low (< CONFIDENCE_LOW), Medium and High
+# (>= CONFIDENCE_HIGH)
+CONFIDENCE_LOW = 0.3
+CONFIDENCE_HIGH = 0.7
+
+
+def check_threshold(threshold):
+    """Validate a decision threshold and return it as a float"""
+    threshold = float(threshold)
+    if not 0.0 <= threshold <= 1.0:
+        raise ValueError(f"Decision threshold must be in [0, 1], got {threshold}")
+    return threshold
+
+
+def get_confidence_level(probability):
+    """Map a disease probability to a Low/Medium/High confidence label"""
+    if probability < CONFIDENCE_LOW:
+        return "Low"
+    elif probability < CONFIDENCE_HIGH:
+        return "Medium"
+    return "High"
+
+
+def confidence_levels(probabilities):
+    """Vectorized get_confidence_level for an array of probabilities"""
+    probabilities = np.asarray(probabilities)
+    return np.where(
+        probabilities < CONFIDENCE_LOW,
+        "Low",
+        np.where(probabilities < CONFIDENCE_HIGH, "Medium", "High"),
+    ).astype(object)
+
+
+def score_matrix(model, preprocessor, X, threshold=DECISION_THRESHOLD, timings=None):
+    """
+    Run the preprocessor and model once over a feature matrix
+
+    The class, the probability and the confidence band all come from a
+    single predict_proba pass; predict is never called.
+
+    Args:
+        model: Fitted binary classifier or compiled scorer exposing
+            predict_proba and classes_
+        preprocessor: Fitted HeartDiseasePreprocessor or CompiledPreprocessor
+        X: 2D float64 or float32 array of raw features in FEATURE_COLUMNS
+            order; it is preprocessed in place
+        threshold: Probability of disease above which the positive class
+            is predicted
+        timings: Optional dictionary that receives the nanoseconds spent in
+            the "preprocess" and "infer" stages
+
+    Returns:
+        Tuple of (predicted classes, probabilities of disease, confidence
+        labels)
+    """
+    start = time.perf_counter_ns()
+    X_processed = preprocessor.transform_array(X, out=X)
+    preprocessed = time.perf_counter_ns()
+    probabilities = model.predict_proba(X_processed)[:, 1]
+
+    negative, positive = model.classes_
+    predictions = np.where(probabilities > threshold, positive, negative)
+    confidences = confidence_levels(probabilities)
+
+    if timings is not None:
+        timings["preprocess"] = preprocessed - start
+        timings["infer"] = time.perf_counter_ns() - preprocessed
+
+    return predictions, probabilities, confidences
+
+
+def init_worker(model_path, preprocessor_path, compiled_path=None):
+    """
+    Load the model and preprocessor once per pool worker process
+
+    Args:
+        model_path: Path to the joblib model file
+        preprocessor_path: Path to the pickled preprocessor
+        compiled_path: Optional compiled artifact used instead when present
+    """
+    global _worker_model, _worker_preprocessor
+
+    from pathlib import Path
+
+    if compiled_path is not None and Path(compiled_path).exists():
+        from src.models.compiled import CompiledModel
+
+        compiled = CompiledModel.load(compiled_path, mmap_mode="r")
+        _worker_model, _worker_preprocessor = compiled.scorer, compiled.preprocessor
+        return
+
+    import joblib
+
+    from src.utils.preprocessing import HeartDiseasePreprocessor
+
+    _worker_model = joblib.load(model_path)
+    _worker_preprocessor = HeartDiseasePreprocessor.load(preprocessor_path)
+
+
+def worker_score_matrix(X, threshold=DECISION_THRESHOLD):
+    """Score a feature matrix with the model preloaded in this worker"""
+    if _worker_model is None or _worker_preprocessor is None:
+        raise RuntimeError("Inference worker has no model loaded")
+    return score_matrix(_worker_model, _worker_preprocessor, X, threshold)
+
+
+def worker_warm_up(X, threshold=DECISION_THRESHOLD):
+    """Score once with this worker's model and return the worker's pid"""
+    worker_score_matrix(X, threshold)
+    return os.getpid()
@@ -0,0 +1,264 @@
+"""
+Streaming Bulk Scoring for Offline Cohorts
+Scores a CSV or Parquet file chunk by chunk with the production model and
+writes predictions incrementally, so memory stays bounded by the chunk size
+rather than the file size
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.models.inference import (
+    DECISION_THRESHOLD,
+    check_threshold,
+    init_worker,
+    worker_score_matrix,
+)
+from src.utils.features import FEATURE_COLUMNS, MATRIX_DTYPES, check_matrix_dtype
+from src.utils.tabular_io import ChunkWriter, is_parquet
+
+
+def iter_chunks(path, chunksize):
+    """
+    Read a CSV or Parquet file in fixed-size chunks
+
+    Args:
+        path: Input file; Parquet is detected by its suffix
+        chunksize: Rows per chunk
+
+    Yields:
+        DataFrames of at most chunksize rows
+    """
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def chunk_features(chunk, dtype="float64"):
+    """
+    Extract the raw feature matrix from a chunk
+
+    Non-numeric markers such as "?" become NaN and are imputed by the
+    preprocessor.
+
+    Args:
+        chunk: DataFrame containing the feature columns
+        dtype: Matrix dtype, "float64" or "float32"
+
+    Returns:
+        2D array in FEATURE_COLUMNS order
+    """
+    missing = [name for name in FEATURE_COLUMNS if name not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing feature columns: {missing}")
+
+    X = np.empty((len(chunk), len(FEATURE_COLUMNS)), dtype=check_matrix_dtype(dtype))
+    for j, name in enumerate(FEATURE_COLUMNS):
+        X[:, j] = pd.to_numeric(chunk[name], errors="coerce")
+    return X
+
+
+def score_chunk(
+    chunk, keep_columns=None, dtype="float64", threshold=DECISION_THRESHOLD
+):
+    """
+    Score one chunk with the model loaded by init_worker
+
+    Args:
+        chunk: DataFrame containing the feature columns
+        keep_columns: Input columns copied to the output (default: all)
+        dtype: Dtype the chunk is preprocessed and scored in
+        threshold: Probability of disease above which class 1 is predicted
+
+    Returns:
+        DataFrame of the kept columns plus prediction, probability and
+        confidence
+    """
+    predictions, probabilities, confidences = worker_score_matrix(
+        chunk_features(chunk, dtype), threshold
+    )
+
+    output = chunk if keep_columns is None else chunk[keep_columns]
+    output = output.reset_index(drop=True)
+    output["prediction"] = predictions
+    output["probability"] = probabilities
+    output["confidence"] = confidences
+    return output
+
+
+def _score_chunk_in_worker(chunk, keep_columns, csv_header, dtype, threshold):
+    """
+    Score a chunk in a pool worker
+
+    For CSV output the worker also renders the text, since formatting is
+    usually the most expensive step and would otherwise serialize on the
+    parent process.
+    """
+    output = score_chunk(chunk, keep_columns, dtype, threshold)
+    if csv_header is None:
+        return output
+    return output.to_csv(index=False, header=csv_header)
+
+
+def score_file(
+    input_path,
+    output_path,
+    model_path="models/production_model.pkl",
+    preprocessor_path="models/preprocessor.pkl",
+    compiled_path=None,
+    chunksize=50000,
+    workers=1,
+    keep_columns=None,
+    dtype="float64",
+    threshold=DECISION_THRESHOLD,
+):
+    """
+    Score every row of a CSV or Parquet file
+
+    With workers > 1, chunks are scored in a process pool whose workers load
+    the model once; at most two chunks per worker are in flight, and results
+    are written in input order.
+
+    Args:
+        input_path: CSV or Parquet file with the feature columns
+        output_path: CSV or Parquet file to write
+        model_path: Path to the joblib model file
+        preprocessor_path: Path to the pickled preprocessor
+        compiled_path: Optional compiled artifact used instead when present
+        chunksize: Rows per chunk
+        workers: Number of scoring processes (1 scores in this process,
+            0 uses every core)
+        keep_columns: Input columns copied to the output (default: all)
+        dtype: Dtype chunks are scored in; "float32" halves their size
+        threshold: Probability of disease above which class 1 is predicted
+
+    Returns:
+        Dictionary with rows scored, elapsed seconds and rows per second
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    threshold = check_threshold(threshold)
+
+    start_time = time.perf_counter()
+    initargs = (model_path, preprocessor_path, compiled_path)
+    writer = ChunkWriter(output_path)
+    rows = 0
+
+    try:
+        if workers > 1:
+            csv_output = not is_parquet(output_path)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=initargs,
+            ) as pool:
+                pending = deque()
+                for i, chunk in enumerate(iter_chunks(input_path, chunksize)):
+                    csv_header = (i == 0) if csv_output else None
+                    future = pool.submit(
+                        _score_chunk_in_worker,
+                        chunk,
+                        keep_columns,
+                        csv_header,
+                        dtype,
+                        threshold,
+                    )
+                    pending.append((len(chunk), future))
+
+                    # Bound memory by the number of chunks in flight
+                    while len(pending) >= 2 * workers:
+                        n_rows, done = pending.popleft()
+                        writer.write(done.result())
+                        rows += n_rows
+
+                while pending:
+                    n_rows, done = pending.popleft()
+                    writer.write(done.result())
+                    rows += n_rows
+        else:
+            init_worker(*initargs)
+            for chunk in iter_chunks(input_path, chunksize):
+                writer.write(score_chunk(chunk, keep_columns, dtype, threshold))
+                rows += len(chunk)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed > 0 else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score a CSV or Parquet file with the production model"
+    )
+    parser.add_argument("input", help="Input CSV or Parquet file")
+    parser.add_argument("output", help="Output CSV or Parquet file")
+    parser.add_argument("--model", default="models/production_model.pkl")
+    parser.add_argument("--preprocessor", default="models/preprocessor.pkl")
+    parser.add_argument(
+        "--compiled",
+        help="Compiled model artifact to score with instead of the pickles",
+    )
+    parser.add_argument("--chunksize", type=int, default=50000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Scoring processes (1 = serial, 0 = one per core)",
+    )
+    parser.add_argument(
+        "--keep-columns",
+        nargs="+",
+        help="Input columns to copy to the output (default: all)",
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=MATRIX_DTYPES,
+        default="float64",
+        help="Dtype features are preprocessed and scored in",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DECISION_THRESHOLD,
+        help="Probability of disease above which class 1 is predicted",
+    )
+    args = parser.parse_args()
+
+    stats = score_file(
+        args.input,
+        args.output,
+        model_path=args.model,
+        preprocessor_path=args.preprocessor,
+        compiled_path=args.compiled,
+        chunksize=args.chunksize,
+        workers=args.workers,
+        keep_columns=args.keep_columns,
+        dtype=args.dtype,
+        threshold=args.threshold,
+    )
+
+    print(
+        f"Scored {stats['rows']} rows in {stats['seconds']:.2f}s "
+        f"({stats['rows_per_second']:.0f} rows/sec) -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
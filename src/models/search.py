@@ -0,0 +1,264 @@
+"""
+Hyperparameter Search for the Heart Disease Models
+Evaluates configurations in parallel on cross-validation folds that are
+split and scaled once, and prunes weak configurations by successive halving
+"""
+
+import itertools
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from src.utils.preprocessing import HeartDiseasePreprocessor
+
+# Grids searched for each model family
+SEARCH_SPACE = {
+    "logistic_regression": {
+        "C": [0.001, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 100.0],
+        "class_weight": [None, "balanced"],
+    },
+    "random_forest": {
+        "n_estimators": [50, 100, 200, 400],
+        "max_depth": [None, 3, 5, 8],
+        "min_samples_leaf": [1, 2, 4],
+        "max_features": ["sqrt", 0.5],
+    },
+}
+
+# Cross-validation folds held by each search worker process
+_search_folds = None
+
+
+def build_estimator(model_name, params, n_jobs=None):
+    """
+    Create an unfitted estimator for a model family
+
+    Args:
+        model_name: "logistic_regression" or "random_forest"
+        params: Hyperparameters for the estimator
+        n_jobs: Threads for random forest fitting
+
+    Returns:
+        Unfitted scikit-learn classifier
+    """
+    if model_name == "logistic_regression":
+        return LogisticRegression(max_iter=1000, random_state=42, **params)
+    if model_name == "random_forest":
+        return RandomForestClassifier(random_state=42, n_jobs=n_jobs, **params)
+    raise ValueError(f"Unknown model: {model_name}")
+
+
+def expand_grid(space):
+    """Turn {param: [values]} into a list of parameter dictionaries"""
+    names = list(space)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(space[name] for name in names))
+    ]
+
+
+def precompute_folds(X, y, n_splits=5, random_state=42):
+    """
+    Split the training data and scale every fold once
+
+    The preprocessor is fit on each fold's training part only, so the
+    validation part never leaks into imputation or scaling. The resulting
+    matrices are shared by every configuration in the search.
+
+    Args:
+        X: Training features DataFrame
+        y: Training labels
+        n_splits: Number of stratified folds
+        random_state: Seed for the fold split
+
+    Returns:
+        List of (X_train, y_train, X_val, y_val) NumPy tuples, one per fold
+    """
+    y = np.asarray(y)
+    splitter = StratifiedKFold(
+        n_splits=n_splits, shuffle=True, random_state=random_state
+    )
+
+    folds = []
+    for train_idx, val_idx in splitter.split(X, y):
+        preprocessor = HeartDiseasePreprocessor()
+        X_fold_train = preprocessor.fit_transform(X.iloc[train_idx])
+        X_fold_val = preprocessor.transform(X.iloc[val_idx])
+        folds.append(
+            (
+                np.asarray(X_fold_train, dtype=np.float64),
+                y[train_idx],
+                np.asarray(X_fold_val, dtype=np.float64),
+                y[val_idx],
+            )
+        )
+    return folds
+
+
+def init_search_worker(folds):
+    """Receive the precomputed folds once per worker process"""
+    global _search_folds
+    _search_folds = folds
+
+
+def evaluate_trial(model_name, params, fold_ids):
+    """
+    Fit and score one configuration on some of the precomputed folds
+
+    Args:
+        model_name: Model family
+        params: Hyperparameters
+        fold_ids: Indices of the folds to evaluate
+
+    Returns:
+        Tuple of ([(fold, roc_auc, fit_seconds), ...], elapsed seconds)
+    """
+    start_time = time.perf_counter()
+    results = []
+    for i in fold_ids:
+        X_train, y_train, X_val, y_val = _search_folds[i]
+
+        fit_start = time.perf_counter()
+        model = build_estimator(model_name, params, n_jobs=1).fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - fit_start
+
+        score = roc_auc_score(y_val, model.predict_proba(X_val)[:, 1])
+        results.append((i, float(score), fit_seconds))
+
+    return results, time.perf_counter() - start_time
+
+
+def halving_budgets(n_folds, eta=3, min_folds=1):
+    """
+    Number of folds evaluated at each successive-halving rung
+
+    Example: 5 folds with eta=2 gives [1, 2, 5].
+    """
+    if eta <= 1:
+        return [n_folds]
+
+    budgets = [n_folds]
+    while budgets[-1] > min_folds:
+        budgets.append(max(min_folds, budgets[-1] // eta))
+    return budgets[::-1]
+
+
+def run_search(folds, candidates, n_workers=None, eta=3, min_folds=1):
+    """
+    Evaluate candidate configurations with successive halving
+
+    Every candidate is scored on the first rung's folds; within each model
+    family only the best 1/eta advance to the next rung, where they are
+    scored on additional folds, until the survivors have seen every fold.
+
+    Args:
+        folds: Output of precompute_folds
+        candidates: List of (model_name, params) tuples
+        n_workers: Worker processes (None = CPU count, 1 = serial)
+        eta: Halving rate; 1 disables pruning
+        min_folds: Folds evaluated at the first rung
+
+    Returns:
+        Tuple of (list of trial dictionaries, wall-clock seconds)
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    budgets = halving_budgets(len(folds), eta, min_folds)
+
+    trials = [
+        {
+            "model": model_name,
+            "params": params,
+            "scores": {},
+            "fit_seconds": {},
+            "task_seconds": 0.0,
+            "rung": 0,
+            "pruned": False,
+        }
+        for model_name, params in candidates
+    ]
+
+    start_time = time.perf_counter()
+    pool = None
+    if n_workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_search_worker,
+            initargs=(folds,),
+        )
+    else:
+        init_search_worker(folds)
+
+    try:
+        active = list(trials)
+        for rung, budget in enumerate(budgets):
+            jobs = []
+            for trial in active:
+                fold_ids = [i for i in range(budget) if i not in trial["scores"]]
+                args = (trial["model"], trial["params"], fold_ids)
+                if pool is not None:
+                    jobs.append((trial, pool.submit(evaluate_trial, *args)))
+                else:
+                    jobs.append((trial, evaluate_trial(*args)))
+
+            for trial, job in jobs:
+                results, elapsed = job.result() if pool is not None else job
+                for fold, score, fit_seconds in results:
+                    trial["scores"][fold] = score
+                    trial["fit_seconds"][fold] = fit_seconds
+                trial["task_seconds"] += elapsed
+                trial["rung"] = rung
+
+            if rung == len(budgets) - 1:
+                break
+
+            # Keep the best 1/eta of each model family for the next rung
+            survivors = []
+            for model_name in dict.fromkeys(trial["model"] for trial in active):
+                family = [trial for trial in active if trial["model"] == model_name]
+                family.sort(key=mean_score, reverse=True)
+                keep = max(1, math.ceil(len(family) / eta))
+                for trial in family[keep:]:
+                    trial["pruned"] = True
+                survivors.extend(family[:keep])
+            active = survivors
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return trials, time.perf_counter() - start_time
+
+
+def mean_score(trial):
+    """Mean validation ROC AUC over the folds a trial was scored on"""
+    return float(np.mean(list(trial["scores"].values())))
+
+
+def best_trials(trials):
+    """Best fully evaluated trial of each model family"""
+    best = {}
+    for trial in trials:
+        if trial["pruned"]:
+            continue
+        current = best.get(trial["model"])
+        if current is None or mean_score(trial) > mean_score(current):
+            best[trial["model"]] = trial
+    return best
+
+
+def search_candidates(space=None):
+    """All (model_name, params) combinations of a search space"""
+    space = space or SEARCH_SPACE
+    return [
+        (model_name, params)
+        for model_name, grid in space.items()
+        for params in expand_grid(grid)
+    ]
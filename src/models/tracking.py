@@ -0,0 +1,253 @@
+"""
+Asynchronous MLflow Logging for Training
+Buffers params, metrics and tags per run and writes them with log_batch,
+and serializes model artifacts on a background thread so the next model
+can train while the previous one is being saved
+"""
+
+import atexit
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.tracking import MlflowClient
+from mlflow.tracking.context.registry import resolve_tags
+from mlflow.utils.mlflow_tags import MLFLOW_LOGGED_MODELS
+
+# Per-request limits of the MLflow log_batch API (at most 1000 entities)
+MAX_METRICS_PER_BATCH = 800
+MAX_PARAMS_PER_BATCH = 100
+MAX_TAGS_PER_BATCH = 100
+
+
+class AsyncMlflowLogger:
+    """
+    Non-blocking MLflow run logger
+
+    All writes go through one background thread, so the writes of a run are
+    applied in the order they were requested and a run is only marked
+    finished after its data and artifacts are stored. Failures are collected
+    and raised from close(); when closing after an error, or on interpreter
+    exit, pending work is still flushed and failures are printed.
+    """
+
+    def __init__(self, experiment_id, client=None):
+        """
+        Initialize logger
+
+        Args:
+            experiment_id: MLflow experiment the runs are created in
+            client: Optional MlflowClient (defaults to the current tracking URI)
+        """
+        self.experiment_id = experiment_id
+        self.client = client or MlflowClient()
+
+        self._buffers = {}
+        self._open_runs = set()
+        self._pending = []
+        self._errors = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="mlflow-logger"
+        )
+        self._closed = False
+        atexit.register(self._close_at_exit)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Runs left open by an exception are marked as failed
+        for run_id in list(self._open_runs):
+            self.end_run(run_id, status="FAILED" if exc_type else "FINISHED")
+        self.close(raise_errors=exc_type is None)
+        return False
+
+    def start_run(self, run_name, parent_run_id=None, tags=None):
+        """
+        Create a run (synchronously, so its id can be used right away)
+
+        Args:
+            run_name: Display name of the run
+            parent_run_id: Optional parent run for nested runs
+            tags: Optional dictionary of tags
+
+        Returns:
+            Run id
+        """
+        # Source, user and git tags mlflow.start_run would set; explicit
+        # tags win
+        run_tags = resolve_tags(tags)
+        if parent_run_id is not None:
+            run_tags["mlflow.parentRunId"] = parent_run_id
+
+        run = self.client.create_run(
+            self.experiment_id, run_name=run_name, tags=run_tags
+        )
+        run_id = run.info.run_id
+        self._open_runs.add(run_id)
+        return run_id
+
+    def _buffer(self, run_id):
+        return self._buffers.setdefault(
+            run_id, {"metrics": [], "params": [], "tags": []}
+        )
+
+    def log_params(self, run_id, params):
+        """Buffer a dictionary of params"""
+        with self._lock:
+            self._buffer(run_id)["params"].extend(
+                Param(key, str(value)) for key, value in params.items()
+            )
+
+    def log_metrics(self, run_id, metrics, step=0):
+        """Buffer a dictionary of metrics"""
+        timestamp = int(time.time() * 1000)
+        with self._lock:
+            self._buffer(run_id)["metrics"].extend(
+                Metric(key, float(value), timestamp, step)
+                for key, value in metrics.items()
+            )
+
+    def log_metric(self, run_id, key, value, step=0):
+        """Buffer a single metric"""
+        self.log_metrics(run_id, {key: value}, step=step)
+
+    def set_tags(self, run_id, tags):
+        """Buffer a dictionary of tags"""
+        with self._lock:
+            self._buffer(run_id)["tags"].extend(
+                RunTag(key, str(value)) for key, value in tags.items()
+            )
+
+    def log_model(self, run_id, model, artifact_path="model"):
+        """
+        Serialize a scikit-learn model and upload it in the background
+
+        The model must not be modified after this call.
+        """
+        self.flush(run_id)
+        self._submit(run_id, self._save_model, run_id, model, artifact_path)
+
+    def _save_model(self, run_id, model, artifact_path):
+        import mlflow.sklearn
+        from mlflow.models import Model
+
+        # What mlflow.sklearn.log_model does, against this run: the run id
+        # goes into the MLmodel file and the mlflow.log-model.history tag
+        mlflow_model = Model(artifact_path=artifact_path, run_id=run_id)
+        with tempfile.TemporaryDirectory() as tmp:
+            local_path = Path(tmp) / artifact_path
+            mlflow.sklearn.save_model(model, str(local_path), mlflow_model=mlflow_model)
+            self.client.log_artifacts(run_id, str(local_path), artifact_path)
+        self._record_logged_model(run_id, mlflow_model)
+
+    def _record_logged_model(self, run_id, mlflow_model):
+        """
+        Append a model to the run's mlflow.log-model.history tag
+
+        Uses only the public client API. Safe to read-modify-write here
+        because every write to a run goes through the one logger thread.
+        """
+        history = self.client.get_run(run_id).data.tags.get(MLFLOW_LOGGED_MODELS)
+        models = json.loads(history) if history else []
+        models.append(mlflow_model.to_dict())
+        self.client.set_tag(run_id, MLFLOW_LOGGED_MODELS, json.dumps(models))
+
+    def end_run(self, run_id, status="FINISHED"):
+        """Flush a run's buffered data and mark it terminated after its writes"""
+        self.flush(run_id)
+        self._open_runs.discard(run_id)
+        self._submit(run_id, self.client.set_terminated, run_id, status)
+
+    def flush(self, run_id=None):
+        """
+        Hand buffered data to the background thread as log_batch calls
+
+        Args:
+            run_id: Flush only this run (default: every run)
+        """
+        with self._lock:
+            run_ids = [run_id] if run_id is not None else list(self._buffers)
+            batches = [(rid, self._buffers.pop(rid, None)) for rid in run_ids]
+
+        for rid, buffer in batches:
+            if buffer is None:
+                continue
+            for metrics, params, tags in _split_batch(buffer):
+                self._submit(
+                    rid,
+                    self.client.log_batch,
+                    rid,
+                    metrics=metrics,
+                    params=params,
+                    tags=tags,
+                )
+
+    def _submit(self, run_id, fn, *args, **kwargs):
+        future = self._executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._pending.append((run_id, fn.__name__, future))
+
+    def wait(self):
+        """
+        Block until every submitted write has completed
+
+        Returns:
+            List of (run_id, operation, exception) for the writes that failed
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for run_id, name, future in pending:
+            exc = future.exception()
+            if exc is not None:
+                self._errors.append((run_id, name, exc))
+
+        return list(self._errors)
+
+    def close(self, raise_errors=True):
+        """
+        Flush everything, wait for it to be written, and stop the thread
+
+        Raises:
+            RuntimeError: If any write failed and raise_errors is True
+        """
+        if self._closed:
+            return
+        self.flush()
+        errors = self.wait()
+        self._executor.shutdown(wait=True)
+        self._closed = True
+        atexit.unregister(self._close_at_exit)
+
+        if not errors:
+            return
+        if raise_errors:
+            details = "; ".join(
+                f"{name} for run {run_id}: {exc}" for run_id, name, exc in errors
+            )
+            raise RuntimeError(f"{len(errors)} MLflow write(s) failed: {details}")
+        for run_id, name, exc in errors:
+            print(f"MLflow {name} failed for run {run_id}: {exc}")
+
+    def _close_at_exit(self):
+        self.close(raise_errors=False)
+
+
+def _split_batch(buffer):
+    """Split buffered entities into chunks that respect log_batch limits"""
+    metrics, params, tags = buffer["metrics"], buffer["params"], buffer["tags"]
+    while metrics or params or tags:
+        yield (
+            metrics[:MAX_METRICS_PER_BATCH],
+            params[:MAX_PARAMS_PER_BATCH],
+            tags[:MAX_TAGS_PER_BATCH],
+        )
+        metrics = metrics[MAX_METRICS_PER_BATCH:]
+        params = params[MAX_PARAMS_PER_BATCH:]
+        tags = tags[MAX_TAGS_PER_BATCH:]
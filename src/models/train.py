@@ -3,17 +3,30 @@ Model Training Script with MLflow Integration
 Trains Logistic Regression and Random Forest models with experiment tracking
 """
 
+import argparse
 import sys
 from pathlib import Path
 
 import joblib
 import mlflow
-import mlflow.sklearn
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
-from sklearn.model_selection import cross_val_score, train_test_split
-
+from sklearn.model_selection import cross_validate, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.models.artifacts import save_serving_artifacts
+from src.models.search import (
+    best_trials,
+    mean_score,
+    precompute_folds,
+    run_search,
+    search_candidates,
+)
+from src.models.tracking import AsyncMlflowLogger
 from src.utils.preprocessing import (
     HeartDiseasePreprocessor,
     load_and_preprocess_data,
@@ -38,29 +51,94 @@ def evaluate_model(y_true, y_pred, y_pred_proba=None):
     return metrics
 
 
-def train_logistic_regression(X_train, y_train, X_val, y_val, C=1.0, max_iter=1000):
-    print("\n" + "=" * 50)
-    print("Training Logistic Regression Model")
-    print(f"Parameters: C={C}, max_iter={max_iter}")
-    print("=" * 50)
+def build_pipeline(model, memory=None):
+    """
+    Wrap a model in the training Pipeline: median imputation, scaling, model
+
+    Args:
+        model: Unfitted classifier
+        memory: Optional joblib Memory (or cache directory) for the fitted
+            preprocessing steps; folds and configurations that see the same
+            data reuse the cached imputer and scaler instead of refitting
+
+    Returns:
+        Unfitted Pipeline
+    """
+    return Pipeline(
+        [
+            # Pandas output keeps feature names on the scaler; the model
+            # is fit on the plain array the scaler returns
+            (
+                "imputer",
+                SimpleImputer(strategy="median").set_output(transform="pandas"),
+            ),
+            ("scaler", StandardScaler()),
+            ("model", model),
+        ],
+        memory=memory,
+    )
+
 
-    model = LogisticRegression(C=C, max_iter=max_iter, random_state=42)
-    model.fit(X_train, y_train)
+def fit_and_evaluate(pipeline, X_train, y_train, X_val, y_val, cv=5):
+    """
+    Cross-validate a pipeline, fit it on the training split and evaluate it
 
-    y_pred = model.predict(X_val)
-    y_pred_proba = model.predict_proba(X_val)[:, 1]
+    Preprocessing is fit inside each fold, so validation folds never leak
+    into imputation or scaling statistics.
 
-    metrics = evaluate_model(y_val, y_pred, y_pred_proba)
+    Returns:
+        Tuple of (metrics, per-fold fit seconds)
+    """
+    cv_results = cross_validate(pipeline, X_train, y_train, cv=cv, scoring="accuracy")
+    fold_fit_seconds = [float(t) for t in cv_results["fit_time"]]
 
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring="accuracy")
-    metrics["cv_mean_accuracy"] = cv_scores.mean()
-    metrics["cv_std_accuracy"] = cv_scores.std()
+    pipeline.fit(X_train, y_train)
+
+    y_pred_proba_all = pipeline.predict_proba(X_val)
+    y_pred = pipeline.classes_.take(y_pred_proba_all.argmax(axis=1))
+    metrics = evaluate_model(y_val, y_pred, y_pred_proba_all[:, 1])
+
+    metrics["cv_mean_accuracy"] = cv_results["test_score"].mean()
+    metrics["cv_std_accuracy"] = cv_results["test_score"].std()
+    metrics["cv_mean_fit_seconds"] = float(np.mean(fold_fit_seconds))
 
     print("\nValidation Metrics:")
     for key, value in metrics.items():
         print(f"  {key}: {value:.4f}")
+    print(
+        "  fold fit seconds: "
+        + ", ".join(f"{seconds:.3f}" for seconds in fold_fit_seconds)
+    )
 
-    return model, metrics
+    return metrics, fold_fit_seconds
+
+
+def train_logistic_regression(
+    X_train,
+    y_train,
+    X_val,
+    y_val,
+    C=1.0,
+    max_iter=1000,
+    class_weight=None,
+    memory=None,
+):
+    print("\n" + "=" * 50)
+    print("Training Logistic Regression Model")
+    print(f"Parameters: C={C}, max_iter={max_iter}, class_weight={class_weight}")
+    print("=" * 50)
+
+    pipeline = build_pipeline(
+        LogisticRegression(
+            C=C, max_iter=max_iter, class_weight=class_weight, random_state=42
+        ),
+        memory=memory,
+    )
+    metrics, fold_fit_seconds = fit_and_evaluate(
+        pipeline, X_train, y_train, X_val, y_val
+    )
+
+    return pipeline, metrics, fold_fit_seconds
 
 
 def train_random_forest(
@@ -70,39 +148,164 @@ def train_random_forest(
     y_val,
     n_estimators=100,
     max_depth=None,
+    min_samples_leaf=1,
+    max_features="sqrt",
     random_state=42,
+    memory=None,
 ):
     print("\n" + "=" * 50)
     print("Training Random Forest Model")
-    print(f"Parameters: n_estimators={n_estimators}, max_depth={max_depth}")
+    print(
+        f"Parameters: n_estimators={n_estimators}, max_depth={max_depth}, "
+        f"min_samples_leaf={min_samples_leaf}, max_features={max_features}"
+    )
     print("=" * 50)
 
-    model = RandomForestClassifier(
-        n_estimators=n_estimators,
-        max_depth=max_depth,
-        random_state=random_state,
-        n_jobs=-1,
+    pipeline = build_pipeline(
+        RandomForestClassifier(
+            n_estimators=n_estimators,
+            max_depth=max_depth,
+            min_samples_leaf=min_samples_leaf,
+            max_features=max_features,
+            random_state=random_state,
+            n_jobs=-1,
+        ),
+        memory=memory,
+    )
+    metrics, fold_fit_seconds = fit_and_evaluate(
+        pipeline, X_train, y_train, X_val, y_val
     )
-    model.fit(X_train, y_train)
 
-    y_pred = model.predict(X_val)
-    y_pred_proba = model.predict_proba(X_val)[:, 1]
+    return pipeline, metrics, fold_fit_seconds
 
-    metrics = evaluate_model(y_val, y_pred, y_pred_proba)
 
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring="accuracy")
-    metrics["cv_mean_accuracy"] = cv_scores.mean()
-    metrics["cv_std_accuracy"] = cv_scores.std()
+def log_fold_fit_times(tracker, run_id, fold_fit_seconds):
+    """Log per-fold fit times to an MLflow run"""
+    for fold, seconds in enumerate(fold_fit_seconds):
+        tracker.log_metric(run_id, "cv_fold_fit_seconds", seconds, step=fold)
 
-    print("\nValidation Metrics:")
-    for key, value in metrics.items():
-        print(f"  {key}: {value:.4f}")
 
-    return model, metrics
+def hyperparameter_search(
+    X_train, y_train, tracker, n_workers=None, eta=3, compare_serial=False
+):
+    """
+    Search LR and RF hyperparameters and log every trial to MLflow
+
+    Fold indices and scaled fold matrices are computed once and shared by
+    all configurations, which are evaluated in a process pool with
+    successive-halving pruning. Each trial is logged as a child run of a
+    "hyperparameter_search" run.
+
+    Args:
+        X_train: Raw training features
+        y_train: Training labels
+        tracker: AsyncMlflowLogger the trials are logged with
+        n_workers: Search processes (None = CPU count)
+        eta: Successive-halving rate (1 disables pruning)
+        compare_serial: Also run the search serially to measure the speedup
+
+    Returns:
+        Dictionary of model family -> best hyperparameters
+    """
+    print("\n" + "=" * 50)
+    print("Hyperparameter Search")
+    print("=" * 50)
+
+    folds = precompute_folds(X_train, y_train)
+    candidates = search_candidates()
+    trials, wall_seconds = run_search(folds, candidates, n_workers=n_workers, eta=eta)
+
+    # Time spent inside trials is what a single process would have needed
+    serial_seconds = sum(trial["task_seconds"] for trial in trials)
+    if compare_serial:
+        _, serial_seconds = run_search(folds, candidates, n_workers=1, eta=eta)
+    speedup = serial_seconds / wall_seconds
+
+    n_pruned = sum(trial["pruned"] for trial in trials)
+    best = best_trials(trials)
+
+    search_run = tracker.start_run("hyperparameter_search")
+    tracker.log_params(search_run, {"n_candidates": len(candidates), "eta": eta})
+    tracker.log_metrics(
+        search_run,
+        {
+            "search_wall_seconds": wall_seconds,
+            "search_serial_seconds": serial_seconds,
+            "search_speedup": speedup,
+            "n_pruned": n_pruned,
+        },
+    )
+
+    for i, trial in enumerate(trials):
+        trial_run = tracker.start_run(f"{trial['model']}_{i}", parent_run_id=search_run)
+        tracker.log_params(trial_run, {"model": trial["model"], **trial["params"]})
+        tracker.log_metrics(
+            trial_run,
+            {
+                "cv_mean_roc_auc": mean_score(trial),
+                "folds_evaluated": len(trial["scores"]),
+                "rung": trial["rung"],
+                "fit_seconds": sum(trial["fit_seconds"].values()),
+            },
+        )
+        tracker.set_tags(trial_run, {"pruned": trial["pruned"]})
+        tracker.end_run(trial_run)
+
+    tracker.end_run(search_run)
+
+    print(f"\nEvaluated {len(trials)} configurations, pruned {n_pruned}")
+    for model_name, trial in best.items():
+        print(f"  best {model_name}: {trial['params']} ROC AUC={mean_score(trial):.4f}")
+    print(
+        f"Search took {wall_seconds:.1f}s vs {serial_seconds:.1f}s serial "
+        f"({'measured' if compare_serial else 'estimated'}), "
+        f"speedup {speedup:.2f}x"
+    )
+
+    return {model_name: trial["params"] for model_name, trial in best.items()}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train heart disease models")
+    parser.add_argument(
+        "--data",
+        default="data/raw/heart_disease_cleveland.csv",
+        help="Training CSV (e.g. a dataset from src.data.synthetic)",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Search hyperparameters instead of using the fixed baselines",
+    )
+    parser.add_argument(
+        "--search-workers",
+        type=int,
+        default=0,
+        help="Processes for the search (0 = one per core, 1 = serial)",
+    )
+    parser.add_argument(
+        "--search-eta",
+        type=int,
+        default=3,
+        help="Successive-halving rate (1 disables pruning)",
+    )
+    parser.add_argument(
+        "--compare-serial",
+        action="store_true",
+        help="Rerun the search serially to measure the parallel speedup",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=".cache/pipeline",
+        help="joblib Memory cache for fitted preprocessing steps ('' disables)",
+    )
+    return parser.parse_args()
 
 
 def main():
-    data_path = Path("data/raw/heart_disease_cleveland.csv")
+    args = parse_args()
+
+    data_path = Path(args.data)
     models_dir = Path("models")
     models_dir.mkdir(exist_ok=True)
 
@@ -113,46 +316,74 @@ def main():
     X, y = load_and_preprocess_data(data_path)
 
     mlflow.set_tracking_uri("file:./mlruns")
-    mlflow.set_experiment("heart_disease_prediction")
+    experiment = mlflow.set_experiment("heart_disease_prediction")
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
     )
 
-    preprocessor = HeartDiseasePreprocessor()
-    X_train_scaled = preprocessor.fit_transform(X_train)
-    X_test_scaled = preprocessor.transform(X_test)
-
-    preprocessor_path = models_dir / "preprocessor.pkl"
-    preprocessor.save(preprocessor_path)
-
-    with mlflow.start_run(run_name="lr_baseline_80_20_split"):
-        model_lr, metrics_lr = train_logistic_regression(
-            X_train_scaled, y_train, X_test_scaled, y_test
+    # Params and metrics are written in batches and models are serialized
+    # in the background; leaving the block flushes everything
+    with AsyncMlflowLogger(experiment.experiment_id) as tracker:
+        # Fitted imputers and scalers are cached here and reused across models
+        memory = joblib.Memory(args.cache_dir, verbose=0) if args.cache_dir else None
+
+        best_params = {}
+        if args.search:
+            best_params = hyperparameter_search(
+                X_train,
+                y_train,
+                tracker,
+                n_workers=args.search_workers or None,
+                eta=args.search_eta,
+                compare_serial=args.compare_serial,
+            )
+
+        lr_params = best_params.get("logistic_regression", {})
+        run_lr = tracker.start_run("lr_baseline_80_20_split")
+        pipeline_lr, metrics_lr, fold_times_lr = train_logistic_regression(
+            X_train, y_train, X_test, y_test, memory=memory, **lr_params
         )
-        mlflow.log_metrics(metrics_lr)
-        mlflow.sklearn.log_model(model_lr, "model")
-
-    with mlflow.start_run(run_name="rf_baseline_80_20_split"):
-        model_rf, metrics_rf = train_random_forest(
-            X_train_scaled, y_train, X_test_scaled, y_test
+        tracker.log_params(run_lr, lr_params)
+        tracker.log_metrics(run_lr, metrics_lr)
+        log_fold_fit_times(tracker, run_lr, fold_times_lr)
+        # Serialized in the background while the random forest trains
+        tracker.log_model(run_lr, pipeline_lr)
+        tracker.end_run(run_lr)
+
+        rf_params = best_params.get("random_forest", {})
+        run_rf = tracker.start_run("rf_baseline_80_20_split")
+        pipeline_rf, metrics_rf, fold_times_rf = train_random_forest(
+            X_train, y_train, X_test, y_test, memory=memory, **rf_params
         )
-        mlflow.log_metrics(metrics_rf)
-        mlflow.sklearn.log_model(model_rf, "model")
-
-    if metrics_lr.get("roc_auc", 0) > metrics_rf.get("roc_auc", 0):
-        best_model = model_lr
-        best_name = "logistic_regression"
-    else:
-        best_model = model_rf
-        best_name = "random_forest"
-
-    production_model_path = models_dir / "production_model.pkl"
-    joblib.dump(best_model, production_model_path)
-
-    with mlflow.start_run(run_name="production_model"):
-        mlflow.log_param("model", best_name)
-        mlflow.sklearn.log_model(best_model, "model")
+        tracker.log_params(run_rf, rf_params)
+        tracker.log_metrics(run_rf, metrics_rf)
+        log_fold_fit_times(tracker, run_rf, fold_times_rf)
+        tracker.log_model(run_rf, pipeline_rf)
+        tracker.end_run(run_rf)
+
+        if metrics_lr.get("roc_auc", 0) > metrics_rf.get("roc_auc", 0):
+            best_pipeline = pipeline_lr
+            best_name = "logistic_regression"
+        else:
+            best_pipeline = pipeline_rf
+            best_name = "random_forest"
+
+        # Serve the pipeline as the model step plus a preprocessor built from
+        # the same fitted imputer and scaler
+        best_model = best_pipeline.named_steps["model"]
+        preprocessor = HeartDiseasePreprocessor.from_pipeline(best_pipeline)
+
+        # Golden records come from the test split the model never saw
+        save_serving_artifacts(best_model, preprocessor, models_dir, X_test)
+        print(f"Serving artifacts saved to {models_dir}")
+
+        run_production = tracker.start_run("production_model")
+        tracker.log_params(run_production, {"model": best_name})
+        tracker.log_model(run_production, best_pipeline)
+        tracker.end_run(run_production)
+
+        print("\nWaiting for MLflow logging to finish...")
 
     print("\nTRAINING COMPLETED SUCCESSFULLY!")
 
@@ -0,0 +1,75 @@
+"""
+Feature definitions for the Heart Disease dataset
+Kept free of heavy imports so the serving path can use them cheaply
+"""
+
+# Fixed column order expected by the preprocessor and model
+FEATURE_COLUMNS = [
+    "age",
+    "sex",
+    "cp",
+    "trestbps",
+    "chol",
+    "fbs",
+    "restecg",
+    "thalach",
+    "exang",
+    "oldpeak",
+    "slope",
+    "ca",
+    "thal",
+]
+
+# Small integer codes
+CATEGORICAL_FEATURES = ["sex", "cp", "fbs", "restecg", "exang", "slope", "ca", "thal"]
+
+# Measurements
+CONTINUOUS_FEATURES = [
+    name for name in FEATURE_COLUMNS if name not in CATEGORICAL_FEATURES
+]
+
+# Compact dtype of every feature
+FEATURE_DTYPES = {
+    name: "int8" if name in CATEGORICAL_FEATURES else "float32"
+    for name in FEATURE_COLUMNS
+}
+
+# Dtype of feature matrices (all columns together); "float32" halves memory
+MATRIX_DTYPES = ("float64", "float32")
+
+
+def apply_feature_schema(df):
+    """
+    Cast the feature columns of a DataFrame to FEATURE_DTYPES
+
+    A categorical column with missing values cannot be int8 and is cast to
+    float32 instead, keeping NaN for the imputer. Columns outside the schema
+    are left as they are.
+
+    Args:
+        df: DataFrame containing the feature columns
+
+    Returns:
+        New DataFrame with compact feature dtypes
+
+    Raises:
+        ValueError: If a categorical column holds non-integer codes or codes
+            outside the int8 range
+    """
+    dtypes = {}
+    for name, dtype in FEATURE_DTYPES.items():
+        column = df[name]
+        if dtype == "int8":
+            if column.isna().any():
+                dtype = "float32"
+            elif not (column.between(-128, 127) & (column % 1 == 0)).all():
+                raise ValueError(f"Column {name} must hold small integer codes")
+        dtypes[name] = dtype
+    return df.astype(dtypes, copy=False)
+
+
+def check_matrix_dtype(dtype):
+    """Validate a feature matrix dtype name"""
+    if dtype not in MATRIX_DTYPES:
+        raise ValueError(f"dtype must be one of {MATRIX_DTYPES}, got {dtype!r}")
+    return dtype
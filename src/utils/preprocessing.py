@@ -1,14 +1,20 @@
 """
 Preprocessing Pipeline for Heart Disease Dataset
 Ensures reproducibility and consistency in data preprocessing
+
+pandas and scikit-learn are imported where they are used, so a fitted
+preprocessor can serve through transform_array without loading pandas.
 """
 
-import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.impute import SimpleImputer
 import pickle
 
+from src.utils.features import (  # noqa: F401 (FEATURE_COLUMNS re-exported)
+    FEATURE_COLUMNS,
+    apply_feature_schema,
+    check_matrix_dtype,
+)
+
 
 class HeartDiseasePreprocessor:
     """
@@ -16,18 +22,30 @@ class HeartDiseasePreprocessor:
     Handles missing values, encoding, and scaling
     """
 
-    def __init__(self, scaler=None, imputer=None):
+    def __init__(self, scaler=None, imputer=None, dtype="float64"):
         """
         Initialize preprocessor
 
         Args:
             scaler: StandardScaler instance (optional, for inference)
             imputer: SimpleImputer instance (optional, for inference)
+            dtype: Dtype of transformed features, "float64" or "float32"
         """
-        self.scaler = scaler if scaler else StandardScaler()
-        self.imputer = imputer if imputer else SimpleImputer(strategy="median")
+        if scaler is None:
+            from sklearn.preprocessing import StandardScaler
+
+            scaler = StandardScaler()
+        if imputer is None:
+            from sklearn.impute import SimpleImputer
+
+            imputer = SimpleImputer(strategy="median")
+
+        self.scaler = scaler
+        self.imputer = imputer
+        self.dtype = check_matrix_dtype(dtype)
         self.feature_names = None
         self.is_fitted = False
+        self._compiled = None
 
     def fit_transform(self, X):
         """
@@ -39,6 +57,8 @@ class HeartDiseasePreprocessor:
         Returns:
             Transformed features
         """
+        import pandas as pd
+
         # Convert to DataFrame if numpy array
         if isinstance(X, np.ndarray):
             X = pd.DataFrame(X)
@@ -52,9 +72,12 @@ class HeartDiseasePreprocessor:
 
         # Scale features
         X_scaled = self.scaler.fit_transform(X_imputed)
-        X_scaled = pd.DataFrame(X_scaled, columns=self.feature_names)
+        X_scaled = pd.DataFrame(
+            X_scaled.astype(self.dtype, copy=False), columns=self.feature_names
+        )
 
         self.is_fitted = True
+        self.compile()
 
         return X_scaled
 
@@ -71,6 +94,8 @@ class HeartDiseasePreprocessor:
         if not self.is_fitted:
             raise ValueError("Preprocessor must be fitted before transform")
 
+        import pandas as pd
+
         # Convert to DataFrame if numpy array
         if isinstance(X, np.ndarray):
             X = pd.DataFrame(X)
@@ -81,10 +106,126 @@ class HeartDiseasePreprocessor:
 
         # Scale features
         X_scaled = self.scaler.transform(X_imputed)
-        X_scaled = pd.DataFrame(X_scaled, columns=X.columns)
+        X_scaled = pd.DataFrame(
+            X_scaled.astype(self.dtype, copy=False), columns=X.columns
+        )
 
         return X_scaled
 
+    def compile(self):
+        """
+        Extract fitted statistics into plain float64 arrays for fast inference
+
+        Once compiled, transform_array applies imputation and scaling with
+        NumPy only. Imputers that do not use NaN as the missing marker, or
+        that dropped all-missing columns during fit, are left uncompiled and
+        transform_array falls back to transform.
+
+        Returns:
+            True if the fast path is available
+        """
+        if not self.is_fitted:
+            raise ValueError("Preprocessor must be fitted before compile")
+
+        self._compiled = None
+
+        missing_values = self.imputer.missing_values
+        if not (isinstance(missing_values, float) and np.isnan(missing_values)):
+            return False
+
+        medians = np.asarray(self.imputer.statistics_, dtype=np.float64)
+        if np.isnan(medians).any():
+            return False
+
+        n_features = medians.shape[0]
+        mean = self.scaler.mean_ if self.scaler.with_mean else None
+        scale = self.scaler.scale_ if self.scaler.with_std else None
+        mean = np.zeros(n_features) if mean is None else mean
+        scale = np.ones(n_features) if scale is None else scale
+
+        self._compiled = (
+            medians,
+            np.ascontiguousarray(mean, dtype=np.float64),
+            np.ascontiguousarray(scale, dtype=np.float64),
+        )
+        return True
+
+    @property
+    def is_compiled(self):
+        """Whether the NumPy fast path is available"""
+        return self._compiled is not None
+
+    @property
+    def compiled_arrays(self):
+        """Tuple of (medians, mean, scale) float64 arrays, or None if not compiled"""
+        return self._compiled
+
+    def transform_array(self, X, out=None):
+        """
+        Transform a raw feature matrix without building DataFrames
+
+        Args:
+            X: 2D array of raw features in the fitted column order
+            out: Optional preallocated float buffer of the same shape;
+                may be X itself to transform in place, in X's dtype
+
+        Returns:
+            Transformed features as an ndarray of the preprocessor's dtype,
+            or of out's dtype when out is given
+        """
+        if not self.is_fitted:
+            raise ValueError("Preprocessor must be fitted before transform")
+
+        if self._compiled is None:
+            import pandas as pd
+
+            X = pd.DataFrame(X, columns=self.feature_names)
+            X_scaled = self.transform(X).to_numpy()
+            if out is None:
+                return X_scaled
+            np.copyto(out, X_scaled)
+            return out
+
+        medians, mean, scale = self._compiled
+        if out is None:
+            out = np.empty(np.shape(X), dtype=self.dtype)
+        if out is not X:
+            np.copyto(out, X)
+
+        # Impute and scale in place on the buffer
+        np.copyto(out, medians, where=np.isnan(out))
+        if out.dtype == np.float64:
+            np.subtract(out, mean, out=out)
+            np.divide(out, scale, out=out)
+        else:
+            # Round once, so float32 results equal the float64 ones cast
+            np.divide(np.subtract(out, mean), scale, out=out)
+
+        return out
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """
+        Build a fitted preprocessor from a fitted training Pipeline
+
+        Reuses the pipeline's "imputer" and "scaler" steps, so a model trained
+        inside a Pipeline is served with exactly the statistics it saw.
+
+        Args:
+            pipeline: Fitted Pipeline with "imputer" and "scaler" steps
+
+        Returns:
+            Fitted HeartDiseasePreprocessor
+        """
+        imputer = pipeline.named_steps["imputer"]
+        preprocessor = cls(scaler=pipeline.named_steps["scaler"], imputer=imputer)
+        preprocessor.feature_names = list(
+            getattr(imputer, "feature_names_in_", FEATURE_COLUMNS)
+        )
+        preprocessor.is_fitted = True
+        preprocessor.compile()
+        return preprocessor
+
     def save(self, filepath):
         """Save preprocessor to disk"""
         preprocessor_data = {
@@ -92,6 +233,7 @@ class HeartDiseasePreprocessor:
             "imputer": self.imputer,
             "feature_names": self.feature_names,
             "is_fitted": self.is_fitted,
+            "dtype": self.dtype,
         }
 
         with open(filepath, "wb") as f:
@@ -104,50 +246,48 @@ class HeartDiseasePreprocessor:
             preprocessor_data = pickle.load(f)
 
         preprocessor = cls(
-            scaler=preprocessor_data["scaler"], imputer=preprocessor_data["imputer"]
+            scaler=preprocessor_data["scaler"],
+            imputer=preprocessor_data["imputer"],
+            dtype=preprocessor_data.get("dtype", "float64"),
         )
         preprocessor.feature_names = preprocessor_data["feature_names"]
         preprocessor.is_fitted = preprocessor_data["is_fitted"]
 
+        if preprocessor.is_fitted:
+            preprocessor.compile()
+
         return preprocessor
 
 
-def load_and_preprocess_data(data_path="data/raw/heart_disease_cleveland.csv"):
+def load_and_preprocess_data(
+    data_path="data/raw/heart_disease_cleveland.csv", cache_dir=None
+):
     """
     Load and preprocess heart disease dataset
 
+    The CSV is read through the columnar dataset cache, so only the first
+    load after the file changes parses text.
+
     Args:
         data_path: Path to raw data file
+        cache_dir: Dataset cache directory (default: DATASET_CACHE_DIR,
+            "" to read the CSV directly)
 
     Returns:
         X: Features DataFrame
         y: Target Series
     """
+    from src.data.dataset_cache import DATASET_CACHE_DIR, load_dataset
+
     # Load data
-    df = pd.read_csv(data_path)
+    df = load_dataset(data_path, DATASET_CACHE_DIR if cache_dir is None else cache_dir)
 
     # Convert target to binary (0 = no disease, 1 = disease)
     # Original dataset: 0 = no disease, 1-4 = disease
     df["target"] = (df["target"] > 0).astype(int)
 
-    # Separate features and target
-    feature_columns = [
-        "age",
-        "sex",
-        "cp",
-        "trestbps",
-        "chol",
-        "fbs",
-        "restecg",
-        "thalach",
-        "exang",
-        "oldpeak",
-        "slope",
-        "ca",
-        "thal",
-    ]
-
-    X = df[feature_columns].copy()
+    # Separate features and target, with the compact feature dtypes
+    X = apply_feature_schema(df[FEATURE_COLUMNS].copy())
     y = df["target"].copy()
 
     return X, y
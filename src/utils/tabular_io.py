@@ -0,0 +1,55 @@
+"""
+Tabular file output shared by the data and model layers
+Appends DataFrame chunks to CSV or Parquet, so writers of large files keep
+memory bounded by the chunk size
+"""
+
+from pathlib import Path
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def is_parquet(path):
+    """Whether a path names a Parquet file, judged by its suffix"""
+    return Path(path).suffix.lower() in PARQUET_SUFFIXES
+
+
+class ChunkWriter:
+    """Append DataFrame chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._parquet_writer = None
+        self._schema = None
+        self._csv_header = True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()
+
+    def write(self, df):
+        """Append a chunk, or CSV text already rendered elsewhere"""
+        if isinstance(df, str):
+            with open(self.path, "a", newline="") as f:
+                f.write(df)
+        elif is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._schema = table.schema
+                self._parquet_writer = pq.ParquetWriter(self.path, self._schema)
+            else:
+                table = pa.Table.from_pandas(
+                    df, schema=self._schema, preserve_index=False
+                )
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a", header=self._csv_header, index=False)
+        self._csv_header = False
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
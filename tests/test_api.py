@@ -8,6 +8,10 @@ from sklearn.linear_model import LogisticRegression
 import pytest
 from fastapi.testclient import TestClient
 from pathlib import Path
+import asyncio
+import time
+import json
+import logging
 import sys
 import joblib
 import pandas as pd
@@ -22,6 +26,14 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    """Render /metrics from scratch in every test instead of reusing it"""
+    import src.api.main as api_module
+
+    api_module.metrics_cache.clear()
+
+
 @pytest.fixture
 def sample_model_and_preprocessor(tmp_path):
     """Create sample model and preprocessor for testing"""
@@ -157,3 +169,808 @@ class TestAPIEndpoints:
 
         response = client.post("/predict", json=invalid_data)
         assert response.status_code == 422  # Validation error
+
+
+ADMIN_HEADERS = {"X-Admin-Token": "test-token"}
+
+
+@pytest.fixture
+def loaded_model(sample_model_and_preprocessor, monkeypatch):
+    """Load the sample model and preprocessor into the API module"""
+    import src.api.main as api_module
+
+    model_path, preprocessor_path = sample_model_and_preprocessor
+    monkeypatch.setattr(api_module, "MODEL_PATH", model_path)
+    monkeypatch.setattr(api_module, "PREPROCESSOR_PATH", preprocessor_path)
+    monkeypatch.setattr(
+        api_module, "GOLDEN_INPUTS_PATH", model_path.parent / "golden_inputs.json"
+    )
+    monkeypatch.setattr(api_module, "ADMIN_TOKEN", ADMIN_HEADERS["X-Admin-Token"])
+    api_module.load_model()
+    # Cached results would answer requests without reaching the code under test
+    api_module.prediction_cache.clear()
+
+    return api_module
+
+
+VALID_INPUT = {
+    "age": 63,
+    "sex": 1,
+    "cp": 3,
+    "trestbps": 145,
+    "chol": 233,
+    "fbs": 1,
+    "restecg": 0,
+    "thalach": 150,
+    "exang": 0,
+    "oldpeak": 2.3,
+    "slope": 0,
+    "ca": 0,
+    "thal": 1,
+}
+
+
+class TestBatchPrediction:
+    """Test cases for the batch prediction endpoint"""
+
+    def test_batch_matches_single_predictions(self, client, loaded_model):
+        """Test batch results are in input order and match /predict"""
+        records = [
+            VALID_INPUT,
+            {**VALID_INPUT, "age": 40, "cp": 0},
+            {**VALID_INPUT, "chol": 180, "thal": 3},
+        ]
+
+        response = client.post("/predict/batch", json={"records": records})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [item["index"] for item in results] == [0, 1, 2]
+
+        for record, item in zip(records, results):
+            single = client.post("/predict", json=record).json()
+            assert item["prediction"] == single["prediction"]
+            assert item["probability"] == pytest.approx(single["probability"])
+            assert item["confidence"] == single["confidence"]
+            assert item["errors"] is None
+
+    def test_batch_reports_invalid_records_per_item(self, client, loaded_model):
+        """Test one bad record does not fail the whole batch"""
+        records = [VALID_INPUT, {**VALID_INPUT, "age": 200}, "not a record"]
+
+        response = client.post("/predict/batch", json={"records": records})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0]["prediction"] in [0, 1]
+        assert results[1]["prediction"] is None
+        assert results[1]["errors"][0]["loc"] == ["age"]
+        assert results[2]["errors"]
+
+    def test_batch_size_limit(self, client, loaded_model, monkeypatch):
+        """Test batches above the configured maximum are rejected"""
+        monkeypatch.setattr(loaded_model, "MAX_BATCH_SIZE", 2)
+
+        response = client.post("/predict/batch", json={"records": [VALID_INPUT] * 3})
+
+        assert response.status_code == 413
+
+
+class TestMicroBatching:
+    """Test cases for micro-batched /predict"""
+
+    def test_predict_with_micro_batching(self, client, loaded_model, monkeypatch):
+        """Test /predict returns the same result through the micro-batcher"""
+        from prometheus_client import REGISTRY
+
+        expected = client.post("/predict", json=VALID_INPUT).json()
+        loaded_model.prediction_cache.clear()
+        batches = REGISTRY.get_sample_value("micro_batch_size_count")
+
+        monkeypatch.setattr(loaded_model, "MICRO_BATCHING_ENABLED", True)
+        response = client.post("/predict", json=VALID_INPUT)
+
+        assert response.status_code == 200
+        assert REGISTRY.get_sample_value("micro_batch_size_count") == batches + 1
+        data = response.json()
+        assert data["prediction"] == expected["prediction"]
+        assert data["probability"] == pytest.approx(expected["probability"])
+
+    def test_micro_batch_metrics_exported(self, client):
+        """Test micro-batch histograms appear in /metrics"""
+        response = client.get("/metrics")
+
+        assert "micro_batch_size" in response.text
+        assert "micro_batch_queue_wait_seconds" in response.text
+
+
+class TestInferenceExecutorIntegration:
+    """Test cases for dispatching API inference to a worker pool"""
+
+    def test_predict_in_thread_pool(self, client, loaded_model, monkeypatch):
+        """Test /predict and /predict/batch work with the thread executor"""
+        from src.api.executor import InferenceExecutor
+
+        expected = client.post("/predict", json=VALID_INPUT).json()
+        loaded_model.prediction_cache.clear()
+        executor = InferenceExecutor(mode="thread", max_workers=2)
+        monkeypatch.setattr(loaded_model, "inference_executor", executor)
+
+        calls = []
+        run = executor.run
+
+        async def counting_run(*args):
+            calls.append(args[0])
+            return await run(*args)
+
+        monkeypatch.setattr(executor, "run", counting_run)
+
+        try:
+            single = client.post("/predict", json=VALID_INPUT)
+            loaded_model.prediction_cache.clear()
+            batch = client.post("/predict/batch", json={"records": [VALID_INPUT]})
+        finally:
+            executor.shutdown()
+
+        assert single.status_code == 200
+        assert single.json()["probability"] == pytest.approx(expected["probability"])
+        assert batch.json()["results"][0]["prediction"] == expected["prediction"]
+        assert len(calls) == 2
+
+    def test_pool_metrics_exported(self, client):
+        """Test pool gauges appear in /metrics"""
+        response = client.get("/metrics")
+
+        assert "inference_pool_queue_depth" in response.text
+        assert "inference_pool_utilization" in response.text
+
+
+class TestCompiledModelServing:
+    """Test cases for serving the compiled scoring artifact"""
+
+    def test_predict_with_compiled_model(
+        self, client, loaded_model, sample_model_and_preprocessor, monkeypatch
+    ):
+        """Test /predict gives the same answer from the compiled artifact"""
+        from src.models.compiled import compile_model
+
+        expected = client.post("/predict", json=VALID_INPUT).json()
+
+        model_path, _ = sample_model_and_preprocessor
+        compiled_path = model_path.parent / "compiled_model.npz"
+        bundle = loaded_model.model_bundle
+        compile_model(bundle.model, bundle.preprocessor).save(compiled_path)
+        monkeypatch.setattr(loaded_model, "MODEL_FORMAT", "compiled")
+        monkeypatch.setattr(loaded_model, "COMPILED_MODEL_PATH", compiled_path)
+        loaded_model.load_model()
+
+        response = client.post("/predict", json=VALID_INPUT)
+
+        assert type(loaded_model.model_bundle.model).__name__ == "LinearScorer"
+        assert response.status_code == 200
+        assert response.json()["probability"] == pytest.approx(expected["probability"])
+        assert response.json()["prediction"] == expected["prediction"]
+
+
+class TestRequestDecoding:
+    """Test cases for decoding request bodies into feature matrices"""
+
+    def test_decode_record_in_feature_order(self):
+        """Test a JSON record fills the row in FEATURE_COLUMNS order"""
+        from src.api.main import INPUT_ADAPTER
+        from src.api.decoding import decode_record
+        from src.utils.features import FEATURE_COLUMNS
+
+        row = np.empty(len(FEATURE_COLUMNS), dtype=np.float32)
+        body = json.dumps(dict(reversed(list(VALID_INPUT.items())))).encode()
+        decode_record(INPUT_ADAPTER, body, row)
+
+        expected = [VALID_INPUT[name] for name in FEATURE_COLUMNS]
+        np.testing.assert_array_equal(row, np.array(expected, dtype=np.float32))
+
+    def test_decode_batch_fallback(self):
+        """Test invalid records fall back to per-record validation"""
+        import src.api.main as api_module
+        from src.api.decoding import decode_batch
+
+        records = [VALID_INPUT, {**VALID_INPUT, "cp": 9}, {**VALID_INPUT, "age": 40}]
+        n, X, valid, errors = decode_batch(
+            api_module.BATCH_ADAPTER,
+            api_module.BATCH_ENVELOPE_ADAPTER,
+            api_module.INPUT_ADAPTER,
+            json.dumps({"records": records}).encode(),
+            13,
+            10,
+        )
+
+        assert n == 3
+        assert list(valid) == [0, 2]
+        assert X.shape == (2, 13)
+        assert X[1, 0] == 40
+        assert errors[1][0]["loc"] == ["cp"]
+
+    def test_decode_batch_limit_checked_before_records(self):
+        """Test an oversized batch is refused without validating its records"""
+        from typing import List
+
+        from pydantic import BaseModel, Field, TypeAdapter
+
+        import src.api.main as api_module
+        from src.api.decoding import BatchTooLargeError, decode_batch
+
+        class SmallBatch(BaseModel):
+            records: List[api_module.HeartDiseaseInput] = Field(..., max_length=2)
+
+        class Envelope:
+            def validate_json(self, body):
+                raise AssertionError("The fallback pass must not run")
+
+        # Invalid records would otherwise send the batch to the fallback
+        records = [{**VALID_INPUT, "cp": 9}] * 3
+        with pytest.raises(BatchTooLargeError) as excinfo:
+            decode_batch(
+                TypeAdapter(SmallBatch),
+                Envelope(),
+                api_module.INPUT_ADAPTER,
+                json.dumps({"records": records}).encode(),
+                13,
+                2,
+            )
+
+        assert (excinfo.value.size, excinfo.value.max_size) == (3, 2)
+
+    def test_malformed_json_rejected(self, client):
+        """Test a body that is not JSON gets a 422"""
+        response = client.post(
+            "/predict",
+            content=b"{not json",
+            headers={"content-type": "application/json"},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["type"] == "json_invalid"
+
+    def test_openapi_documents_request_bodies(self, client):
+        """Test the raw-body endpoints still publish their input schema"""
+        paths = client.get("/openapi.json").json()["paths"]
+        schema = paths["/predict"]["post"]["requestBody"]["content"][
+            "application/json"
+        ]["schema"]
+
+        assert schema["example"]["age"] == 63
+        assert "records" in (
+            paths["/predict/batch"]["post"]["requestBody"]["content"][
+                "application/json"
+            ]["schema"]["properties"]
+        )
+
+
+class TestFeatureDtype:
+    """Test cases for the feature matrix dtype at the API boundary"""
+
+    def test_predict_in_float32(self, client, loaded_model, monkeypatch):
+        """Test float32 scoring agrees with float64 for single and batch"""
+        expected = client.post("/predict", json=VALID_INPUT).json()
+
+        monkeypatch.setattr(loaded_model, "MODEL_DTYPE", "float32")
+        loaded_model.prediction_cache.clear()
+        single = client.post("/predict", json=VALID_INPUT)
+        batch = client.post("/predict/batch", json={"records": [VALID_INPUT]})
+
+        assert single.json()["prediction"] == expected["prediction"]
+        assert single.json()["probability"] == pytest.approx(
+            expected["probability"], abs=1e-5
+        )
+        assert batch.json()["results"][0]["probability"] == pytest.approx(
+            expected["probability"], abs=1e-5
+        )
+
+    def test_feature_matrix_dtype(self, loaded_model, monkeypatch):
+        """Test records are rounded through float32 and held in MODEL_DTYPE"""
+        row = [list(VALID_INPUT.values())]
+
+        X = loaded_model._feature_matrix(row)
+        assert X.dtype == np.float64
+        assert X[0, 9] == np.float32(2.3)
+
+        monkeypatch.setattr(loaded_model, "MODEL_DTYPE", "float32")
+        assert loaded_model._feature_matrix(row).dtype == np.float32
+
+
+class TestDecisionThreshold:
+    """Test cases for the configurable decision threshold"""
+
+    def test_threshold_decides_class(self, client, loaded_model, monkeypatch):
+        """Test the configured threshold decides the class, not the band"""
+        expected = client.post("/predict", json=VALID_INPUT).json()
+
+        monkeypatch.setattr(loaded_model, "DECISION_THRESHOLD", 1.0)
+        loaded_model.prediction_cache.clear()
+        single = client.post("/predict", json=VALID_INPUT).json()
+        batch = client.post("/predict/batch", json={"records": [VALID_INPUT]}).json()
+
+        assert single["prediction"] == 0
+        assert batch["results"][0]["prediction"] == 0
+        assert single["probability"] == expected["probability"]
+        assert single["confidence"] == expected["confidence"]
+
+
+def _retrain_sample_model(model_path, seed):
+    """Overwrite the sample model file with a model fit on different data"""
+    rng = np.random.RandomState(seed)
+    model = LogisticRegression(random_state=42, max_iter=1000)
+    model.fit(rng.randn(100, 13), rng.randint(0, 2, 100))
+    joblib.dump(model, model_path)
+
+
+class TestHotReload:
+    """Test cases for reloading the model without a restart"""
+
+    def test_reload_swaps_model_version(
+        self, client, loaded_model, sample_model_and_preprocessor
+    ):
+        """Test /admin/reload serves a new model and keeps the old bundle intact"""
+        old_bundle = loaded_model.model_bundle
+        model_path, _ = sample_model_and_preprocessor
+        _retrain_sample_model(model_path, seed=7)
+
+        response = client.post("/admin/reload", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["previous_version"] == old_bundle.version
+        assert data["version"] != old_bundle.version
+        assert loaded_model.model_bundle.version == data["version"]
+        assert client.get("/health").json()["model_version"] == data["version"]
+
+        # A request holding the old bundle can still finish on it
+        assert old_bundle.model is not loaded_model.model_bundle.model
+        assert old_bundle.model.predict_proba(np.zeros((1, 13))).shape == (1, 2)
+
+    def test_retired_bundle_closed_after_last_request(
+        self, loaded_model, sample_model_and_preprocessor
+    ):
+        """Test a replaced bundle keeps its pool until its last user releases it"""
+        from src.api.executor import InferenceExecutor
+
+        old_bundle = loaded_model._acquire_bundle()
+        old_bundle.executor = InferenceExecutor(mode="thread", max_workers=1)
+        old_bundle.executor.start()
+        model_path, _ = sample_model_and_preprocessor
+        _retrain_sample_model(model_path, seed=7)
+
+        loaded_model.reload_model()
+
+        # Still in use: the pool stays up, but no new request can take it
+        assert old_bundle.executor._pool is not None
+        assert not old_bundle.acquire()
+        assert asyncio.run(old_bundle.executor.run(sum, [1, 2])) == 3
+
+        old_bundle.release()
+        assert old_bundle.executor._pool is None
+        with pytest.raises(RuntimeError, match="shut down"):
+            asyncio.run(old_bundle.executor.run(sum, [1, 2]))
+
+    def test_reload_rejects_model_failing_golden_set(
+        self, client, loaded_model, tmp_path, monkeypatch
+    ):
+        """Test a model that disagrees with the golden set is not swapped in"""
+        old_version = loaded_model.model_bundle.version
+        prediction = client.post("/predict", json=VALID_INPUT).json()["prediction"]
+        golden_path = tmp_path / "golden.json"
+        golden_path.write_text(
+            json.dumps([{**VALID_INPUT, "expected_prediction": 1 - prediction}])
+        )
+        monkeypatch.setattr(loaded_model, "GOLDEN_INPUTS_PATH", golden_path)
+
+        response = client.post("/admin/reload", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 422
+        assert loaded_model.model_bundle.version == old_version
+
+    def test_reload_uses_serving_threshold(
+        self, client, loaded_model, tmp_path, monkeypatch
+    ):
+        """Test golden predictions are checked at the configured threshold"""
+        prediction = client.post("/predict", json=VALID_INPUT).json()["prediction"]
+        golden_path = tmp_path / "golden.json"
+        golden_path.write_text(
+            json.dumps([{**VALID_INPUT, "expected_prediction": 1 - prediction}])
+        )
+        monkeypatch.setattr(loaded_model, "GOLDEN_INPUTS_PATH", golden_path)
+        # A threshold of 1 predicts class 0 only, one of 0 class 1 only
+        monkeypatch.setattr(loaded_model, "DECISION_THRESHOLD", float(prediction))
+
+        assert client.post("/admin/reload", headers=ADMIN_HEADERS).status_code == 200
+
+    def test_reload_rejects_mismatched_artifacts(
+        self, client, loaded_model, sample_model_and_preprocessor
+    ):
+        """Test a model must reproduce the golden probabilities written with it"""
+        from src.models.artifacts import golden_records
+        from src.utils.features import FEATURE_COLUMNS
+
+        model_path, _ = sample_model_and_preprocessor
+        bundle = loaded_model.model_bundle
+        # Rows from the sample models' training distribution; far outside
+        # it, both models saturate to the same probabilities
+        X = pd.DataFrame(
+            np.random.RandomState(0).randn(20, 13), columns=FEATURE_COLUMNS
+        )
+        loaded_model.GOLDEN_INPUTS_PATH.write_text(
+            json.dumps(golden_records(bundle.model, bundle.preprocessor, X))
+        )
+
+        # A new model file next to the previous model's golden records
+        _retrain_sample_model(model_path, seed=7)
+        response = client.post("/admin/reload", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 422
+        assert "do not belong together" in response.json()["detail"]
+        assert loaded_model.model_bundle is bundle
+
+    def test_reload_requires_admin_token(self, client, loaded_model, monkeypatch):
+        """Test the reload endpoint honours ADMIN_TOKEN"""
+        monkeypatch.setattr(loaded_model, "ADMIN_TOKEN", "secret")
+
+        assert client.post("/admin/reload").status_code == 403
+        wrong = {"X-Admin-Token": "secreT"}
+        assert client.post("/admin/reload", headers=wrong).status_code == 403
+        response = client.post("/admin/reload", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+
+    def test_reload_disabled_without_admin_token(
+        self, client, loaded_model, monkeypatch
+    ):
+        """Test the reload endpoint is closed when no ADMIN_TOKEN is configured"""
+        monkeypatch.setattr(loaded_model, "ADMIN_TOKEN", None)
+
+        response = client.post("/admin/reload", headers={"X-Admin-Token": ""})
+
+        assert response.status_code == 403
+        assert "disabled" in response.json()["detail"]
+
+    def test_reload_forwarded_to_prefork_supervisor(
+        self, client, loaded_model, monkeypatch
+    ):
+        """Test a prefork worker asks its supervisor to reload instead of itself"""
+        signals = []
+        monkeypatch.setattr(loaded_model, "supervisor_pid", 4242)
+        monkeypatch.setattr(
+            loaded_model.os, "kill", lambda pid, sig: signals.append((pid, sig))
+        )
+        version = loaded_model.model_bundle.version
+
+        response = client.post("/admin/reload", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 202
+        assert response.json() == {"status": "reload_requested", "version": version}
+        assert signals == [(4242, loaded_model.signal.SIGHUP)]
+        assert loaded_model.model_bundle.version == version
+
+    def test_reload_preloaded_model(self, loaded_model, monkeypatch):
+        """Test the supervisor reload replaces only the bundle new workers get"""
+        monkeypatch.setattr(loaded_model, "preloaded_bundle", None)
+        serving = loaded_model.model_bundle
+
+        bundle, previous = loaded_model.reload_preloaded_model()
+
+        assert previous is None
+        assert loaded_model.preloaded_bundle is bundle
+        assert loaded_model.model_bundle is serving
+
+    def test_watcher_reloads_on_manifest_change(
+        self, loaded_model, sample_model_and_preprocessor
+    ):
+        """Test the watcher reloads once the manifest is written, not before"""
+        from src.models.artifacts import write_manifest
+
+        old_version = loaded_model.model_bundle.version
+        model_path, preprocessor_path = sample_model_and_preprocessor
+
+        async def wait_for_reload():
+            for _ in range(30):
+                await asyncio.sleep(0.01)
+                if loaded_model.model_bundle.version != old_version:
+                    return True
+            return False
+
+        async def run():
+            task = asyncio.create_task(loaded_model.watch_model_files(0.01))
+            await asyncio.sleep(0.05)
+            # A partly written artifact set is not picked up
+            _retrain_sample_model(model_path, seed=11)
+            reloaded_early = await wait_for_reload()
+            write_manifest(model_path.parent, [model_path, preprocessor_path])
+            reloaded = await wait_for_reload()
+            task.cancel()
+            return reloaded_early, reloaded
+
+        reloaded_early, reloaded = asyncio.run(run())
+
+        assert not reloaded_early
+        assert reloaded
+        assert loaded_model.model_bundle.version != old_version
+
+    def test_model_metrics_exported(self, client, loaded_model):
+        """Test model version and load duration appear in /metrics"""
+        response = client.get("/metrics")
+
+        assert f'model_info{{version="{loaded_model.model_bundle.version}"}}' in (
+            response.text
+        )
+        assert "model_load_duration_seconds" in response.text
+
+
+class TestPredictionCache:
+    """Test cases for the in-process prediction cache"""
+
+    def test_repeated_input_served_from_cache(self, client, loaded_model, monkeypatch):
+        """Test a repeated input skips inference and returns the same result"""
+        calls = []
+        run_inference = loaded_model.run_inference
+
+        async def counting_run_inference(X, bundle, timings=None):
+            calls.append(len(X))
+            return await run_inference(X, bundle, timings)
+
+        monkeypatch.setattr(loaded_model, "run_inference", counting_run_inference)
+
+        first = client.post("/predict", json=VALID_INPUT).json()
+        second = client.post("/predict", json=VALID_INPUT).json()
+        batch = client.post(
+            "/predict/batch",
+            json={"records": [VALID_INPUT, {**VALID_INPUT, "age": 40}]},
+        ).json()
+
+        assert first == second
+        assert batch["results"][0]["probability"] == first["probability"]
+        assert calls == [1, 1]
+
+    def test_cache_cleared_on_reload(
+        self, client, loaded_model, sample_model_and_preprocessor
+    ):
+        """Test a reload drops predictions cached for the previous model"""
+        model_path, _ = sample_model_and_preprocessor
+        client.post("/predict", json=VALID_INPUT)
+        assert len(loaded_model.prediction_cache) > 0
+
+        _retrain_sample_model(model_path, seed=7)
+        assert client.post("/admin/reload", headers=ADMIN_HEADERS).status_code == 200
+
+        assert len(loaded_model.prediction_cache) == 0
+
+    def test_cache_metrics_exported(self, client):
+        """Test cache counters appear in /metrics"""
+        response = client.get("/metrics")
+
+        assert "prediction_cache_hits_total" in response.text
+        assert "prediction_cache_misses_total" in response.text
+        assert "prediction_cache_evictions_total" in response.text
+
+
+class TestRequestLogging:
+    """Test cases for request logging and metrics middleware"""
+
+    def test_metrics_use_route_template(self, client):
+        """Test unknown paths share one bounded metric label"""
+        client.get("/no-such-page-12345")
+
+        response = client.get("/metrics")
+
+        assert 'endpoint="unmatched"' in response.text
+        assert "no-such-page-12345" not in response.text
+
+    def test_sampled_out_requests_not_logged(self, client, monkeypatch, caplog):
+        """Test sampling drops successful requests but keeps errors"""
+        from src.api import main
+        from src.api.request_logging import RequestLogSampler
+
+        monkeypatch.setattr(
+            main, "request_log_sampler", RequestLogSampler(default_rate=0.0)
+        )
+
+        with caplog.at_level(logging.INFO, logger="src.api.main"):
+            client.get("/")
+            client.post("/predict", json={"age": 63})
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert not any(message.startswith("GET / ") for message in messages)
+        assert any("POST /predict - Status: 422" in message for message in messages)
+
+
+class TestStageTiming:
+    """Test cases for per-stage timing of prediction requests"""
+
+    def test_stage_histograms(self, client, loaded_model):
+        """Test every stage of an uncached prediction is observed"""
+        from prometheus_client import REGISTRY
+
+        def count(stage):
+            labels = {"endpoint": "/predict", "stage": stage}
+            return REGISTRY.get_sample_value("api_stage_duration_seconds_count", labels)
+
+        loaded_model.prediction_cache.clear()
+        before = {stage: count(stage) or 0 for stage in loaded_model.PREDICT_STAGES}
+        response = client.post("/predict", json=VALID_INPUT)
+
+        assert response.status_code == 200
+        assert "server-timing" not in response.headers
+        for stage in before:
+            assert count(stage) == before[stage] + 1
+
+    def test_server_timing_header(self, client, loaded_model, monkeypatch):
+        """Test stage durations are reported when Server-Timing is enabled"""
+        monkeypatch.setattr(loaded_model, "SERVER_TIMING_ENABLED", True)
+        loaded_model.prediction_cache.clear()
+
+        single = client.post("/predict", json=VALID_INPUT)
+        batch = client.post(
+            "/predict/batch", json={"records": [{**VALID_INPUT, "age": 41}]}
+        )
+
+        for response in (single, batch):
+            stages = [
+                entry.split(";")[0]
+                for entry in response.headers["server-timing"].split(", ")
+            ]
+            assert stages == [
+                "read_body",
+                "parse_validate",
+                "preprocess",
+                "infer",
+                "serialize",
+            ]
+
+    def test_sampled_profiles(self, client, loaded_model, monkeypatch, tmp_path):
+        """Test sampled requests are profiled to disk"""
+        from src.api.timing import RequestProfiler
+
+        monkeypatch.setattr(
+            loaded_model,
+            "request_profiler",
+            RequestProfiler(sample_rate=1.0, output_dir=tmp_path / "profiles"),
+        )
+
+        client.post("/predict", json=VALID_INPUT)
+
+        profiles = list((tmp_path / "profiles").iterdir())
+        assert [path.name.split("-")[0] for path in profiles] == ["predict"]
+
+
+class TestPreloadedModel:
+    """Test cases for models preloaded by the prefork server"""
+
+    def test_startup_activates_preloaded_bundle(
+        self, sample_model_and_preprocessor, monkeypatch
+    ):
+        """Test workers serve the bundle loaded before fork instead of reloading"""
+        import src.api.main as api_module
+
+        model_path, preprocessor_path = sample_model_and_preprocessor
+        monkeypatch.setattr(api_module, "MODEL_PATH", model_path)
+        monkeypatch.setattr(api_module, "PREPROCESSOR_PATH", preprocessor_path)
+        monkeypatch.setattr(api_module, "preloaded_bundle", None)
+
+        bundle = api_module.preload_model()
+        assert bundle is not None
+
+        def fail_load(*args, **kwargs):
+            raise AssertionError("Worker loaded its own copy of the model")
+
+        monkeypatch.setattr(api_module, "load_bundle", fail_load)
+        with TestClient(app) as client:
+            response = client.post("/predict", json=VALID_INPUT)
+
+        assert response.status_code == 200
+        assert api_module.model_bundle is bundle
+
+
+class TestReadiness:
+    """Test cases for warm-up and the liveness/readiness probes"""
+
+    def test_not_ready_until_warmed_up(self, client, loaded_model, monkeypatch):
+        """Test a loaded but cold model is live and healthy but not ready"""
+        monkeypatch.setattr(loaded_model, "model_ready", False)
+
+        assert client.get("/health/live").json() == {"status": "alive"}
+        assert client.get("/health").status_code == 200
+
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "not_ready", "model_loaded": True}
+
+    def test_warm_up_runs_single_and_batch(self, loaded_model):
+        """Test warm-up scores the requested synthetic calls"""
+        stats = asyncio.run(
+            loaded_model.warm_up(loaded_model.model_bundle, 3, 2, batch_size=4)
+        )
+
+        assert stats["single"]["calls"] == 3
+        assert stats["batch"]["calls"] == 2
+        assert stats["seconds"] > 0
+
+    def test_warm_up_spawns_pool_workers_first(self, loaded_model, monkeypatch):
+        """Test every process pool worker is warmed before the timed calls"""
+        from src.models.inference import score_matrix
+
+        bundle = loaded_model.model_bundle
+        calls = []
+
+        class FakePool:
+            def warm_workers(self, fn, *args):
+                calls.append("warm")
+                return 4
+
+            async def run(self, fn, X, threshold):
+                calls.append("run")
+                return score_matrix(bundle.model, bundle.preprocessor, X, threshold)
+
+        monkeypatch.setattr(bundle, "executor", FakePool())
+
+        stats = asyncio.run(loaded_model.warm_up(bundle, 2, 1, batch_size=4))
+
+        assert stats["workers"] == 4
+        assert calls == ["warm", "run", "run", "run"]
+
+    def test_ready_after_startup_warm_up(
+        self, sample_model_and_preprocessor, monkeypatch
+    ):
+        """Test startup warms the model up and then reports ready"""
+        import src.api.main as api_module
+
+        model_path, preprocessor_path = sample_model_and_preprocessor
+        monkeypatch.setattr(api_module, "MODEL_PATH", model_path)
+        monkeypatch.setattr(api_module, "PREPROCESSOR_PATH", preprocessor_path)
+        monkeypatch.setattr(api_module, "model_ready", False)
+
+        with TestClient(app) as client:
+            for _ in range(100):
+                response = client.get("/health/ready")
+                if response.status_code == 200:
+                    break
+                time.sleep(0.05)
+
+        assert response.status_code == 200
+        assert response.json()["model_version"] == api_module.model_bundle.version
+
+
+class TestInfraEndpoints:
+    """Test cases for the lightweight probe and scrape endpoints"""
+
+    def _count(self, endpoint):
+        from prometheus_client import REGISTRY
+
+        labels = {"method": "GET", "endpoint": endpoint, "status": "200"}
+        return REGISTRY.get_sample_value("api_requests_total", labels) or 0
+
+    def test_probes_skip_request_metrics(self, client, caplog):
+        """Test probes and scrapes are neither counted nor logged"""
+        before = {path: self._count(path) for path in ("/health/live", "/metrics")}
+
+        with caplog.at_level(logging.INFO, logger="src.api.main"):
+            assert client.get("/health/live").status_code == 200
+            assert client.get("/metrics").status_code == 200
+
+        for path, count in before.items():
+            assert self._count(path) == count
+        assert not any("/health" in record.getMessage() for record in caplog.records)
+
+    def test_root_counted_once(self, client):
+        """Test the root endpoint is counted by the middleware only"""
+        before = self._count("/")
+
+        client.get("/")
+
+        assert self._count("/") == before + 1
+
+    def test_metrics_gzip(self, client):
+        """Test the exposition is gzip-compressed when the scraper accepts it"""
+        plain = client.get("/metrics", headers={"Accept-Encoding": "identity"})
+        compressed = client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in plain.headers
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["vary"] == "Accept-Encoding"
+        # Within the cache window both scrapes see the same snapshot
+        assert compressed.text == plain.text
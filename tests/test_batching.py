@@ -0,0 +1,153 @@
+"""
+Unit tests for the micro-batching scheduler
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.api.batching import MicroBatcher
+
+
+class TestMicroBatcher:
+    """Test cases for MicroBatcher"""
+
+    def test_concurrent_rows_share_one_flush(self):
+        """Test rows submitted together are scored in a single call"""
+        calls = []
+
+        def score(X, context):
+            calls.append(X.shape[0])
+            return X[:, 0] * 10
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=1000)
+            rows = [np.array([float(i), 0.0]) for i in range(4)]
+            results = await asyncio.gather(*(batcher.submit(row) for row in rows))
+            await batcher.close()
+            return results
+
+        results = asyncio.run(run())
+
+        assert calls == [4]
+        assert results == [0.0, 10.0, 20.0, 30.0]
+
+    def test_flushes_partial_batch_after_wait(self):
+        """Test a lone row is flushed once max_wait_ms elapses"""
+        calls = []
+
+        def score(X, context):
+            calls.append(X.shape[0])
+            return list(X[:, 0])
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=32, max_wait_ms=5)
+            result = await asyncio.wait_for(batcher.submit(np.array([7.0])), 1.0)
+            await batcher.close()
+            return result
+
+        assert asyncio.run(run()) == 7.0
+        assert calls == [1]
+
+    def test_async_score_function(self):
+        """Test coroutine score functions are awaited"""
+
+        async def score(X, context):
+            return list(X[:, 0] + 1)
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=2, max_wait_ms=5)
+            results = await asyncio.gather(
+                batcher.submit(np.array([1.0])), batcher.submit(np.array([2.0]))
+            )
+            await batcher.close()
+            return results
+
+        assert asyncio.run(run()) == [2.0, 3.0]
+
+    def test_errors_propagate_to_every_caller(self):
+        """Test a failing flush raises in each waiting caller"""
+
+        def score(X, context):
+            raise RuntimeError("model exploded")
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=2, max_wait_ms=5)
+            results = await asyncio.gather(
+                batcher.submit(np.array([1.0])),
+                batcher.submit(np.array([2.0])),
+                return_exceptions=True,
+            )
+            await batcher.close()
+            return results
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_rows_grouped_by_context(self):
+        """Test rows with different contexts are scored separately"""
+        calls = []
+
+        def score(X, context):
+            calls.append((context, X.shape[0]))
+            return [context] * X.shape[0]
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=3, max_wait_ms=1000)
+            results = await asyncio.gather(
+                batcher.submit(np.array([1.0]), context="old"),
+                batcher.submit(np.array([2.0]), context="new"),
+                batcher.submit(np.array([3.0]), context="old"),
+            )
+            await batcher.close()
+            return results
+
+        assert asyncio.run(run()) == ["old", "new", "old"]
+        assert sorted(calls) == [("new", 1), ("old", 2)]
+
+    def test_close_scores_rows_being_collected(self):
+        """Test rows taken off the queue before close() still get a result"""
+
+        def score(X, context):
+            return list(X[:, 0])
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=10_000)
+            pending = [
+                asyncio.ensure_future(batcher.submit(np.array([float(i)])))
+                for i in range(2)
+            ]
+            # Let the flush loop collect both rows and wait for more
+            await asyncio.sleep(0.01)
+            await batcher.close()
+            return await asyncio.wait_for(asyncio.gather(*pending), 1.0)
+
+        assert asyncio.run(run()) == [0.0, 1.0]
+
+    def test_no_row_lost_at_wait_timeouts(self):
+        """Test rows arriving around flush timeouts are all scored"""
+
+        def score(X, context):
+            return list(X[:, 0])
+
+        async def submit_later(batcher, value):
+            await asyncio.sleep(value % 7 * 0.0002)
+            return await batcher.submit(np.array([value]))
+
+        async def run():
+            batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=0.1)
+            results = await asyncio.wait_for(
+                asyncio.gather(*(submit_later(batcher, float(i)) for i in range(500))),
+                5.0,
+            )
+            await batcher.close()
+            return results
+
+        assert asyncio.run(run()) == [float(i) for i in range(500)]
+
+    def test_invalid_batch_size(self):
+        """Test max_batch_size must be positive"""
+        with pytest.raises(ValueError):
+            MicroBatcher(lambda X, context: X, max_batch_size=0)
@@ -0,0 +1,85 @@
+"""
+Unit tests for the prediction cache
+"""
+
+import numpy as np
+
+from src.api.cache import PredictionCache
+
+
+class _Counter:
+    """Minimal stand-in for a Prometheus counter"""
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class TestPredictionCache:
+    """Test cases for PredictionCache"""
+
+    def test_key_is_canonical(self):
+        """Test equal feature values hash equally regardless of dtype or sign"""
+        as_ints = PredictionCache.make_key(np.array([1, 0, 3]), "v1")
+        as_floats = PredictionCache.make_key(np.array([1.0, -0.0, 3.0]), "v1")
+
+        assert as_ints == as_floats
+
+    def test_key_depends_on_model_version(self):
+        """Test the same features under another model version miss"""
+        row = np.array([63.0, 1.0, 3.0])
+
+        assert PredictionCache.make_key(row, "v1") != PredictionCache.make_key(
+            row, "v2"
+        )
+
+    def test_hits_and_misses_are_counted(self):
+        """Test get returns stored values and updates the counters"""
+        hits, misses = _Counter(), _Counter()
+        cache = PredictionCache(max_size=4, hits_counter=hits, misses_counter=misses)
+
+        assert cache.get(b"a") is None
+        cache.put(b"a", (1, 0.9))
+
+        assert cache.get(b"a") == (1, 0.9)
+        assert hits.value == 1
+        assert misses.value == 1
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted when full"""
+        evictions = _Counter()
+        cache = PredictionCache(max_size=2, evictions_counter=evictions)
+
+        cache.put(b"a", 1)
+        cache.put(b"b", 2)
+        cache.get(b"a")
+        cache.put(b"c", 3)
+
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") == 1
+        assert cache.get(b"c") == 3
+        assert len(cache) == 2
+        assert evictions.value == 1
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        """Test entries older than the TTL are treated as misses"""
+        now = [100.0]
+        monkeypatch.setattr("src.api.cache.time.monotonic", lambda: now[0])
+        cache = PredictionCache(max_size=4, ttl_seconds=10)
+
+        cache.put(b"a", 1)
+        now[0] += 5
+        assert cache.get(b"a") == 1
+        now[0] += 10
+        assert cache.get(b"a") is None
+        assert len(cache) == 0
+
+    def test_zero_size_disables_cache(self):
+        """Test a cache of size 0 stores nothing"""
+        cache = PredictionCache(max_size=0)
+        cache.put(b"a", 1)
+
+        assert not cache.enabled
+        assert len(cache) == 0
@@ -0,0 +1,100 @@
+"""Tests for the columnar dataset cache"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.dataset_cache import COLUMN_DTYPES, load_dataset
+from src.utils.preprocessing import load_and_preprocess_data
+
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    path = tmp_path / "heart.csv"
+    pd.DataFrame(
+        {
+            "age": [63, 67, 41],
+            "sex": [1, 1, 0],
+            "cp": [3, 2, 1],
+            "trestbps": [145, 160, 130],
+            "chol": [233, 286, 204],
+            "fbs": [1, 0, 0],
+            "restecg": [0, 0, 2],
+            "thalach": [150, 108, 172],
+            "exang": [0, 1, 0],
+            "oldpeak": [2.3, 1.5, 1.4],
+            "slope": [0, 2, 1],
+            "ca": ["0", "3", "?"],
+            "thal": [1, 2, 3],
+            "target": [1, 0, 2],
+        }
+    ).to_csv(path, index=False)
+    return path
+
+
+class TestDatasetCache:
+    """Test cases for load_dataset"""
+
+    def test_dtypes_and_missing_values(self, raw_csv, tmp_path):
+        """Test columns get storage dtypes and "?" becomes NaN"""
+        df = load_dataset(raw_csv, tmp_path / "cache")
+
+        assert df["sex"].dtype == np.int8
+        assert df["age"].dtype == np.float32
+        assert df["target"].dtype == np.int8
+        # An integer column with missing values is widened to float32
+        assert df["ca"].dtype == np.float32
+        assert np.isnan(df["ca"].iloc[2])
+        assert list(df.columns) == list(COLUMN_DTYPES)
+
+    def test_second_load_reads_cache(self, raw_csv, tmp_path):
+        """Test the cached file is reused while the source is unchanged"""
+        cache_dir = tmp_path / "cache"
+        first = load_dataset(raw_csv, cache_dir)
+        cached = list(cache_dir.glob("*.feather"))
+        mtime = cached[0].stat().st_mtime_ns
+
+        second = load_dataset(raw_csv, cache_dir)
+
+        pd.testing.assert_frame_equal(first, second)
+        assert len(cached) == 1
+        assert cached[0].stat().st_mtime_ns == mtime
+
+    def test_source_change_invalidates_cache(self, raw_csv, tmp_path):
+        """Test editing the source replaces the cached file"""
+        cache_dir = tmp_path / "cache"
+        load_dataset(raw_csv, cache_dir)
+        old_files = set(cache_dir.glob("*.feather"))
+
+        df = pd.read_csv(raw_csv)
+        df.loc[0, "age"] = 70
+        df.to_csv(raw_csv, index=False)
+        reloaded = load_dataset(raw_csv, cache_dir)
+
+        assert reloaded["age"].iloc[0] == 70
+        new_files = set(cache_dir.glob("*.feather"))
+        assert len(new_files) == 1
+        assert new_files.isdisjoint(old_files)
+
+    def test_schema_change_invalidates_cache(self, raw_csv, tmp_path, monkeypatch):
+        """Test a change to the storage dtypes is not served from old files"""
+        import src.data.dataset_cache as dataset_cache
+
+        cache_dir = tmp_path / "cache"
+        load_dataset(raw_csv, cache_dir)
+        old_files = set(cache_dir.glob("*.feather"))
+
+        monkeypatch.setitem(dataset_cache.COLUMN_DTYPES, "age", "float64")
+        load_dataset(raw_csv, cache_dir)
+
+        new_files = set(cache_dir.glob("*.feather"))
+        assert len(new_files) == 1
+        assert new_files.isdisjoint(old_files)
+
+    def test_load_and_preprocess_uses_cache(self, raw_csv, tmp_path):
+        """Test training data loads through the cache with a binary target"""
+        X, y = load_and_preprocess_data(str(raw_csv), cache_dir=tmp_path / "c")
+
+        assert list(y) == [1, 0, 1]
+        assert X.shape == (3, 13)
+        assert len(list((tmp_path / "c").glob("*.feather"))) == 1
@@ -0,0 +1,138 @@
+"""
+Unit tests for the inference executor
+"""
+
+import asyncio
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from prometheus_client import CollectorRegistry, Gauge
+from sklearn.linear_model import LogisticRegression
+
+from src.api.executor import InferenceExecutor
+from src.models.inference import (
+    init_worker,
+    score_matrix,
+    worker_score_matrix,
+    worker_warm_up,
+)
+from src.utils.preprocessing import HeartDiseasePreprocessor
+
+
+def _square(x):
+    return x * x
+
+
+def _saved_model(tmp_path):
+    """Fit a small model and save it where process pool workers can load it"""
+    X_train = pd.DataFrame(np.random.randn(60, 13))
+    y_train = np.random.randint(0, 2, 60)
+    preprocessor = HeartDiseasePreprocessor()
+    model = LogisticRegression(max_iter=1000).fit(
+        preprocessor.fit_transform(X_train), y_train
+    )
+    model_path = tmp_path / "model.pkl"
+    preprocessor_path = tmp_path / "preprocessor.pkl"
+    joblib.dump(model, model_path)
+    preprocessor.save(preprocessor_path)
+    return model, preprocessor, model_path, preprocessor_path
+
+
+class TestInferenceExecutor:
+    """Test cases for InferenceExecutor"""
+
+    def test_invalid_mode(self):
+        """Test unknown execution modes are rejected"""
+        with pytest.raises(ValueError, match="Unknown execution mode"):
+            InferenceExecutor(mode="gpu")
+
+    def test_inline_mode_runs_directly(self):
+        """Test inline mode calls the function without a pool"""
+        executor = InferenceExecutor(mode="inline")
+
+        assert asyncio.run(executor.run(_square, 3)) == 9
+        assert executor._pool is None
+
+    def test_thread_mode_updates_gauges(self):
+        """Test thread mode runs off the loop and resets pool gauges"""
+        registry = CollectorRegistry()
+        queue_depth = Gauge("queue_depth", "queue depth", registry=registry)
+        utilization = Gauge("utilization", "utilization", registry=registry)
+        executor = InferenceExecutor(
+            mode="thread",
+            max_workers=2,
+            queue_depth_gauge=queue_depth,
+            utilization_gauge=utilization,
+        )
+
+        async def run():
+            return await asyncio.gather(*(executor.run(_square, i) for i in range(5)))
+
+        try:
+            assert asyncio.run(run()) == [0, 1, 4, 9, 16]
+        finally:
+            executor.shutdown()
+
+        assert registry.get_sample_value("queue_depth") == 0
+        assert registry.get_sample_value("utilization") == 0
+
+    def test_run_after_shutdown_raises(self):
+        """Test a shut down pool is not silently recreated by run()"""
+        executor = InferenceExecutor(mode="thread", max_workers=1)
+        assert asyncio.run(executor.run(_square, 2)) == 4
+        executor.shutdown()
+
+        with pytest.raises(RuntimeError, match="shut down"):
+            asyncio.run(executor.run(_square, 2))
+        assert executor._pool is None
+
+        executor.start()
+        try:
+            assert asyncio.run(executor.run(_square, 3)) == 9
+        finally:
+            executor.shutdown()
+
+    def test_process_mode_preloads_model(self, tmp_path):
+        """Test process workers score with their own preloaded model"""
+        model, preprocessor, model_path, preprocessor_path = _saved_model(tmp_path)
+
+        executor = InferenceExecutor(
+            mode="process",
+            max_workers=1,
+            initializer=init_worker,
+            initargs=(str(model_path), str(preprocessor_path)),
+        )
+        X = np.random.randn(4, 13)
+
+        try:
+            predictions, probabilities, _ = asyncio.run(
+                executor.run(worker_score_matrix, X.copy())
+            )
+        finally:
+            executor.shutdown()
+
+        expected_predictions, expected_probabilities, _ = score_matrix(
+            model, preprocessor, X.copy()
+        )
+        np.testing.assert_array_equal(predictions, expected_predictions)
+        np.testing.assert_allclose(probabilities, expected_probabilities)
+
+    def test_warm_workers_spawns_every_worker(self, tmp_path):
+        """Test warming runs a call in each process worker before any request"""
+        _, _, model_path, preprocessor_path = _saved_model(tmp_path)
+        executor = InferenceExecutor(
+            mode="process",
+            max_workers=2,
+            initializer=init_worker,
+            initargs=(str(model_path), str(preprocessor_path)),
+        )
+
+        try:
+            assert executor.warm_workers(worker_warm_up, np.zeros((1, 13))) == 2
+            assert len(executor._pool._processes) == 2
+        finally:
+            executor.shutdown()
+
+        assert InferenceExecutor(mode="thread").warm_workers(worker_warm_up) == 0
@@ -0,0 +1,20 @@
+"""
+Import-time budget for the serving path
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT = Path(__file__).parent.parent / "scripts" / "benchmark_import_time.py"
+
+
+def test_api_import_within_budget():
+    """Test src.api.main imports fast and without training-only libraries"""
+    result = subprocess.run(
+        [sys.executable, str(SCRIPT), "--repeat", "2"],
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
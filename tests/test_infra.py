@@ -0,0 +1,111 @@
+"""
+Unit tests for the infrastructure endpoint helpers
+"""
+
+import asyncio
+import gzip
+
+from prometheus_client import CollectorRegistry, Counter
+
+from src.api.infra import InfraRouteBypass, MetricsCache, accepts_gzip
+
+
+def _recording_app(name, calls):
+    async def app(scope, receive, send):
+        calls.append(name)
+
+    return app
+
+
+class TestInfraRouteBypass:
+    """Test cases for InfraRouteBypass"""
+
+    def _call(self, middleware, scope):
+        asyncio.run(middleware(scope, None, None))
+
+    def test_infra_paths_go_to_router(self):
+        """Test probe paths skip the stack and other requests do not"""
+        calls = []
+        middleware = InfraRouteBypass(
+            _recording_app("stack", calls),
+            router=_recording_app("router", calls),
+            paths=["/health", "/metrics"],
+        )
+
+        self._call(middleware, {"type": "http", "path": "/health"})
+        self._call(middleware, {"type": "http", "path": "/predict"})
+        self._call(middleware, {"type": "http", "path": "/health/extra"})
+        self._call(middleware, {"type": "lifespan"})
+
+        assert calls == ["router", "stack", "stack", "stack"]
+
+    def test_sampled_requests_use_stack(self):
+        """Test sampled infrastructure requests still go through the stack"""
+        calls = []
+        middleware = InfraRouteBypass(
+            _recording_app("stack", calls),
+            router=_recording_app("router", calls),
+            paths=["/metrics"],
+            sample_rate=1.0,
+        )
+
+        self._call(middleware, {"type": "http", "path": "/metrics"})
+
+        assert calls == ["stack"]
+
+
+class TestAcceptsGzip:
+    """Test cases for accepts_gzip"""
+
+    def test_header_values(self):
+        """Test gzip is detected, including q-values and wildcards"""
+        assert accepts_gzip("gzip")
+        assert accepts_gzip("deflate, GZIP;q=0.5")
+        assert accepts_gzip("*")
+        assert not accepts_gzip("")
+        assert not accepts_gzip("identity")
+        assert not accepts_gzip("gzip;q=0")
+        assert not accepts_gzip("gzip;q=bad")
+
+
+class TestMetricsCache:
+    """Test cases for MetricsCache"""
+
+    def test_reused_within_window(self):
+        """Test scrapes within the window share one rendering"""
+        registry = CollectorRegistry()
+        counter = Counter("events", "Events", registry=registry)
+        cache = MetricsCache(ttl_seconds=60, registry=registry)
+
+        first, encoding = cache.get()
+        counter.inc()
+        second, _ = cache.get()
+
+        assert encoding is None
+        assert second is first
+
+        cache.clear()
+        assert b"events_total 1.0" in cache.get()[0]
+
+    def test_disabled_renders_every_scrape(self):
+        """Test a zero window always renders the current values"""
+        registry = CollectorRegistry()
+        counter = Counter("events", "Events", registry=registry)
+        cache = MetricsCache(ttl_seconds=0, registry=registry)
+
+        cache.get()
+        counter.inc()
+
+        assert b"events_total 1.0" in cache.get()[0]
+
+    def test_gzip_body(self):
+        """Test the gzip body decompresses to the plain exposition"""
+        registry = CollectorRegistry()
+        Counter("events", "Events", registry=registry)
+        cache = MetricsCache(ttl_seconds=60, registry=registry)
+
+        body, encoding = cache.get(gzip_encoding=True)
+
+        assert encoding == "gzip"
+        assert gzip.decompress(body) == cache.get()[0]
+        assert cache.get(gzip_encoding=True)[0] is body
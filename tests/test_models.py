@@ -2,6 +2,7 @@
 Unit tests for model training and inference
 """
 
+from src.models.compiled import CompiledModel, compile_model
 from src.utils.preprocessing import HeartDiseasePreprocessor
 import pytest
 import pandas as pd
@@ -9,6 +10,7 @@ import numpy as np
 from pathlib import Path
 import sys
 import joblib
+import json
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 
@@ -97,3 +99,588 @@ class TestModelInference:
         assert len(predictions) == len(X_test)
         assert probabilities.shape == (20, 2)
         assert all(pred in [0, 1] for pred in predictions)
+
+    def test_single_pass_matches_predict(self):
+        """Test class, probability and confidence come from one predict_proba"""
+        from src.models.inference import confidence_levels, score_matrix
+
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(200, 13))
+        y = (X[:, 0] + rng.normal(0, 0.5, 200) > 0).astype(int)
+        preprocessor = HeartDiseasePreprocessor()
+        X_processed = np.asarray(preprocessor.fit_transform(pd.DataFrame(X)))
+
+        for model in [
+            LogisticRegression(max_iter=1000),
+            RandomForestClassifier(n_estimators=20, random_state=0),
+        ]:
+            model.fit(X_processed, y)
+            predictions, probabilities, confidences = score_matrix(
+                model, preprocessor, X.copy()
+            )
+
+            np.testing.assert_array_equal(predictions, model.predict(X_processed))
+            np.testing.assert_array_equal(
+                probabilities, model.predict_proba(X_processed)[:, 1]
+            )
+            np.testing.assert_array_equal(confidences, confidence_levels(probabilities))
+
+    def test_decision_threshold(self):
+        """Test the threshold moves the class boundary and ties predict 0"""
+        from src.models.inference import check_threshold, score_matrix
+
+        class FixedScorer:
+            classes_ = np.array([0, 1])
+
+            def predict_proba(self, X):
+                return np.column_stack([1 - X[:, 0], X[:, 0]])
+
+        class Identity:
+            def transform_array(self, X, out=None):
+                return X
+
+        X = np.array([[0.2], [0.5], [0.6], [0.9]])
+
+        predictions, _, confidences = score_matrix(FixedScorer(), Identity(), X)
+        np.testing.assert_array_equal(predictions, [0, 0, 1, 1])
+        assert list(confidences) == ["Low", "Medium", "Medium", "High"]
+
+        predictions, _, _ = score_matrix(FixedScorer(), Identity(), X, threshold=0.2)
+        np.testing.assert_array_equal(predictions, [0, 1, 1, 1])
+
+        with pytest.raises(ValueError, match="threshold"):
+            check_threshold(1.5)
+
+
+class TestCompiledModel:
+    """Test cases for the compiled NumPy scoring artifact"""
+
+    @pytest.fixture
+    def training_data(self):
+        rng = np.random.default_rng(42)
+        X = pd.DataFrame(rng.normal(50, 10, size=(200, 13)))
+        X.iloc[::9, 3] = np.nan
+        y = (X[0] + rng.normal(0, 5, 200) > 50).astype(int)
+        X_test = rng.normal(50, 10, size=(40, 13))
+        X_test[::5, 3] = np.nan
+        return X, y, X_test
+
+    def _reference_proba(self, model, preprocessor, X_test):
+        X_processed = preprocessor.transform(pd.DataFrame(X_test))
+        return model.predict_proba(X_processed)
+
+    def _compiled_proba(self, compiled, X_test):
+        X = compiled.preprocessor.transform_array(X_test)
+        return compiled.scorer.predict_proba(X)
+
+    def test_logistic_regression_parity(self, training_data):
+        """Test compiled LR matches sklearn predict_proba"""
+        X, y, X_test = training_data
+        preprocessor = HeartDiseasePreprocessor()
+        model = LogisticRegression(max_iter=1000).fit(preprocessor.fit_transform(X), y)
+
+        compiled = compile_model(model, preprocessor)
+
+        np.testing.assert_allclose(
+            self._compiled_proba(compiled, X_test),
+            self._reference_proba(model, preprocessor, X_test),
+            rtol=1e-9,
+            atol=1e-12,
+        )
+
+    def test_random_forest_parity(self, training_data):
+        """Test compiled RF matches sklearn predict_proba"""
+        X, y, X_test = training_data
+        preprocessor = HeartDiseasePreprocessor()
+        model = RandomForestClassifier(n_estimators=25, random_state=0).fit(
+            preprocessor.fit_transform(X), y
+        )
+
+        compiled = compile_model(model, preprocessor)
+
+        np.testing.assert_allclose(
+            self._compiled_proba(compiled, X_test),
+            self._reference_proba(model, preprocessor, X_test),
+            rtol=1e-9,
+            atol=1e-12,
+        )
+
+    def test_float32_matches_float64(self, training_data):
+        """Test scoring float32 matrices gives the float64 RF results"""
+        from src.models.inference import score_matrix
+
+        X, y, X_test = training_data
+        preprocessor = HeartDiseasePreprocessor()
+        model = RandomForestClassifier(n_estimators=25, random_state=0).fit(
+            preprocessor.fit_transform(X), y
+        )
+        compiled = compile_model(model, preprocessor)
+
+        for scorer, scorer_preprocessor in [
+            (model, preprocessor),
+            (compiled.scorer, compiled.preprocessor),
+        ]:
+            _, expected, _ = score_matrix(scorer, scorer_preprocessor, X_test.copy())
+            _, result, _ = score_matrix(
+                scorer, scorer_preprocessor, X_test.astype(np.float32)
+            )
+            np.testing.assert_array_equal(result, expected)
+
+    def test_save_and_load(self, training_data, tmp_path):
+        """Test the artifact round-trips through disk"""
+        X, y, X_test = training_data
+        preprocessor = HeartDiseasePreprocessor()
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(
+            preprocessor.fit_transform(X), y
+        )
+        compiled = compile_model(model, preprocessor)
+
+        filepath = tmp_path / "compiled_model.npz"
+        compiled.save(filepath)
+        loaded = CompiledModel.load(filepath)
+
+        assert loaded.scorer.kind == "random_forest"
+        np.testing.assert_array_equal(loaded.scorer.classes_, model.classes_)
+        np.testing.assert_allclose(
+            self._compiled_proba(loaded, X_test),
+            self._compiled_proba(compiled, X_test),
+        )
+
+    def test_memory_mapped_directory(self, training_data, tmp_path):
+        """Test directory artifacts load as read-only memory maps"""
+        X, y, X_test = training_data
+        preprocessor = HeartDiseasePreprocessor()
+        model = RandomForestClassifier(n_estimators=5, random_state=0).fit(
+            preprocessor.fit_transform(X), y
+        )
+        compiled = compile_model(model, preprocessor)
+
+        directory = tmp_path / "compiled_model"
+        compiled.save(directory)
+        loaded = CompiledModel.load(directory, mmap_mode="r")
+
+        assert isinstance(loaded.scorer.value, np.memmap)
+        assert not loaded.scorer.value.flags.writeable
+        np.testing.assert_allclose(
+            self._compiled_proba(loaded, X_test),
+            self._reference_proba(model, preprocessor, X_test),
+            rtol=1e-9,
+            atol=1e-12,
+        )
+
+    def test_unsupported_model(self, training_data):
+        """Test models other than LR/RF are rejected"""
+        from sklearn.tree import DecisionTreeClassifier
+
+        X, y, _ = training_data
+        preprocessor = HeartDiseasePreprocessor()
+        model = DecisionTreeClassifier().fit(preprocessor.fit_transform(X), y)
+
+        with pytest.raises(ValueError, match="Cannot compile"):
+            compile_model(model, preprocessor)
+
+
+@pytest.fixture
+def scoring_artifacts(tmp_path):
+    """Fitted model and preprocessor saved to disk, plus an input CSV"""
+    from src.utils.features import FEATURE_COLUMNS
+
+    rng = np.random.default_rng(7)
+    X = pd.DataFrame(rng.normal(50, 10, size=(200, 13)), columns=FEATURE_COLUMNS)
+    y = (X["age"] + rng.normal(0, 5, 200) > 50).astype(int)
+    X_test = pd.DataFrame(rng.normal(50, 10, size=(33, 13)), columns=FEATURE_COLUMNS)
+    X_test.iloc[::4, 4] = np.nan
+
+    preprocessor = HeartDiseasePreprocessor()
+    model = LogisticRegression(max_iter=1000).fit(
+        np.asarray(preprocessor.fit_transform(X)), y
+    )
+
+    model_path = tmp_path / "production_model.pkl"
+    preprocessor_path = tmp_path / "preprocessor.pkl"
+    joblib.dump(model, model_path)
+    preprocessor.save(preprocessor_path)
+
+    df = X_test.copy()
+    df.insert(0, "patient_id", range(len(df)))
+    input_path = tmp_path / "cohort.csv"
+    df.to_csv(input_path, index=False)
+
+    expected = model.predict_proba(np.asarray(preprocessor.transform(X_test)))[:, 1]
+    return model_path, preprocessor_path, input_path, expected
+
+
+class TestBulkScoring:
+    """Test cases for the streaming bulk scoring CLI"""
+
+    def test_csv_scored_in_chunks(self, tmp_path, scoring_artifacts):
+        """Test chunked scoring matches scoring the whole file at once"""
+        from src.models.score_batch import score_file
+
+        model_path, preprocessor_path, input_path, expected = scoring_artifacts
+        output_path = tmp_path / "scored.csv"
+
+        stats = score_file(
+            input_path,
+            output_path,
+            model_path=model_path,
+            preprocessor_path=preprocessor_path,
+            chunksize=7,
+        )
+        scored = pd.read_csv(output_path)
+
+        assert stats["rows"] == len(expected)
+        assert list(scored["patient_id"]) == list(range(len(expected)))
+        np.testing.assert_allclose(scored["probability"], expected, rtol=1e-9)
+        assert set(scored["confidence"]) <= {"Low", "Medium", "High"}
+
+    def test_parallel_parquet_matches_serial(self, tmp_path, scoring_artifacts):
+        """Test scoring across processes preserves row order and results"""
+        from src.models.score_batch import score_file
+
+        model_path, preprocessor_path, input_path, expected = scoring_artifacts
+        parquet_input = tmp_path / "cohort.parquet"
+        pd.read_csv(input_path).to_parquet(parquet_input)
+        output_path = tmp_path / "scored.parquet"
+
+        score_file(
+            parquet_input,
+            output_path,
+            model_path=model_path,
+            preprocessor_path=preprocessor_path,
+            chunksize=5,
+            workers=2,
+            keep_columns=["patient_id"],
+        )
+        scored = pd.read_parquet(output_path)
+
+        assert list(scored.columns) == [
+            "patient_id",
+            "prediction",
+            "probability",
+            "confidence",
+        ]
+        assert list(scored["patient_id"]) == list(range(len(expected)))
+        np.testing.assert_allclose(scored["probability"], expected, rtol=1e-9)
+
+    def test_threshold(self, tmp_path, scoring_artifacts):
+        """Test offline predictions follow the decision threshold"""
+        from src.models.score_batch import score_file
+
+        model_path, preprocessor_path, input_path, expected = scoring_artifacts
+        output_path = tmp_path / "scored.csv"
+
+        score_file(
+            input_path,
+            output_path,
+            model_path=model_path,
+            preprocessor_path=preprocessor_path,
+            threshold=0.8,
+        )
+        scored = pd.read_csv(output_path)
+
+        np.testing.assert_array_equal(
+            scored["prediction"], (expected > 0.8).astype(int)
+        )
+
+    def test_missing_feature_column(self, tmp_path, scoring_artifacts):
+        """Test inputs without every feature column are rejected"""
+        from src.models.score_batch import score_file
+
+        model_path, preprocessor_path, input_path, _ = scoring_artifacts
+        pd.read_csv(input_path).drop(columns=["chol"]).to_csv(input_path, index=False)
+
+        with pytest.raises(ValueError, match="chol"):
+            score_file(
+                input_path,
+                tmp_path / "scored.csv",
+                model_path=model_path,
+                preprocessor_path=preprocessor_path,
+            )
+
+
+class TestHyperparameterSearch:
+    """Test cases for the parallel hyperparameter search"""
+
+    @pytest.fixture
+    def search_data(self):
+        from src.utils.features import FEATURE_COLUMNS
+
+        rng = np.random.default_rng(3)
+        X = pd.DataFrame(rng.normal(50, 10, size=(150, 13)), columns=FEATURE_COLUMNS)
+        y = (X["age"] + rng.normal(0, 5, 150) > 50).astype(int)
+        return X, y
+
+    def test_halving_budgets(self):
+        """Test fold budgets grow geometrically up to every fold"""
+        from src.models.search import halving_budgets
+
+        assert halving_budgets(5, eta=2) == [1, 2, 5]
+        assert halving_budgets(5, eta=3) == [1, 5]
+        assert halving_budgets(5, eta=1) == [5]
+
+    def test_folds_scaled_on_training_part_only(self, search_data):
+        """Test each fold's scaler is fit without its validation rows"""
+        from src.models.search import precompute_folds
+
+        X, y = search_data
+        folds = precompute_folds(X, y, n_splits=3)
+
+        assert len(folds) == 3
+        for X_train, y_train, X_val, y_val in folds:
+            np.testing.assert_allclose(X_train.mean(axis=0), 0, atol=1e-9)
+            assert len(X_train) + len(X_val) == len(X)
+            assert len(y_train) == len(X_train)
+
+    def test_successive_halving_prunes_per_family(self, search_data):
+        """Test weak configs stop early and survivors see every fold"""
+        from src.models.search import best_trials, precompute_folds, run_search
+
+        X, y = search_data
+        folds = precompute_folds(X, y, n_splits=4)
+        candidates = [("logistic_regression", {"C": c}) for c in (1e-4, 0.1, 1.0)]
+        candidates += [("random_forest", {"n_estimators": n}) for n in (5, 10)]
+
+        trials, _ = run_search(folds, candidates, n_workers=1, eta=2)
+
+        survivors = [trial for trial in trials if not trial["pruned"]]
+        assert all(len(trial["scores"]) == 4 for trial in survivors)
+        assert all(len(trial["scores"]) < 4 for trial in trials if trial["pruned"])
+        assert set(best_trials(trials)) == {"logistic_regression", "random_forest"}
+
+    def test_parallel_search_matches_serial(self, search_data):
+        """Test the process pool produces the same scores as a serial run"""
+        from src.models.search import precompute_folds, run_search
+
+        X, y = search_data
+        folds = precompute_folds(X, y, n_splits=3)
+        candidates = [("logistic_regression", {"C": c}) for c in (0.01, 1.0)]
+
+        serial, _ = run_search(folds, candidates, n_workers=1, eta=1)
+        parallel, _ = run_search(folds, candidates, n_workers=2, eta=1)
+
+        assert [t["scores"] for t in serial] == [t["scores"] for t in parallel]
+
+
+class TestTrainingPipeline:
+    """Test cases for pipeline-based training"""
+
+    @pytest.fixture
+    def split_data(self):
+        from src.utils.features import FEATURE_COLUMNS
+
+        rng = np.random.default_rng(5)
+        X = pd.DataFrame(rng.normal(50, 10, size=(160, 13)), columns=FEATURE_COLUMNS)
+        X.iloc[::7, 2] = np.nan
+        y = (X["age"] + rng.normal(0, 5, 160) > 50).astype(int)
+        return X.iloc[:120], y.iloc[:120], X.iloc[120:], y.iloc[120:]
+
+    def test_train_reports_fold_fit_times(self, split_data):
+        """Test training returns a fitted pipeline and per-fold fit times"""
+        from src.models.train import train_logistic_regression
+
+        X_train, y_train, X_val, y_val = split_data
+        pipeline, metrics, fold_fit_seconds = train_logistic_regression(
+            X_train, y_train, X_val, y_val
+        )
+
+        assert len(fold_fit_seconds) == 5
+        assert all(seconds > 0 for seconds in fold_fit_seconds)
+        assert 0 <= metrics["cv_mean_accuracy"] <= 1
+        assert pipeline.predict_proba(X_val).shape == (len(X_val), 2)
+
+    def test_served_artifacts_match_pipeline(self, split_data):
+        """Test the model step plus from_pipeline reproduce the pipeline"""
+        from src.models.train import train_random_forest
+
+        X_train, y_train, X_val, y_val = split_data
+        pipeline, _, _ = train_random_forest(
+            X_train, y_train, X_val, y_val, n_estimators=10
+        )
+        model = pipeline.named_steps["model"]
+        preprocessor = HeartDiseasePreprocessor.from_pipeline(pipeline)
+
+        served = model.predict_proba(
+            preprocessor.transform_array(X_val.to_numpy(dtype=np.float64))
+        )
+
+        np.testing.assert_allclose(served, pipeline.predict_proba(X_val))
+        assert preprocessor.feature_names == list(X_train.columns)
+
+    def test_preprocessing_cached_across_models(self, split_data, tmp_path):
+        """Test a second model reuses the cached fold transforms"""
+        from src.models.train import train_logistic_regression, train_random_forest
+
+        X_train, y_train, X_val, y_val = split_data
+        memory = joblib.Memory(tmp_path / "cache", verbose=0)
+
+        def cached_outputs():
+            return len(list((tmp_path / "cache").rglob("output.pkl")))
+
+        train_logistic_regression(X_train, y_train, X_val, y_val, memory=memory)
+        after_first = cached_outputs()
+        train_random_forest(
+            X_train, y_train, X_val, y_val, n_estimators=5, memory=memory
+        )
+
+        # Imputer and scaler for 5 folds plus the final fit
+        assert after_first == 12
+        assert cached_outputs() == after_first
+
+
+class TestServingArtifacts:
+    """Test cases for the artifacts written for the API"""
+
+    @pytest.mark.parametrize("model_format", ["pickle", "compiled"])
+    def test_golden_records_validate_saved_model(self, tmp_path, model_format):
+        """Test the saved artifacts reproduce the golden records written with them"""
+        from src.api.model_store import (
+            artifact_paths,
+            load_bundle,
+            load_golden_inputs,
+            validate_bundle,
+        )
+        from src.models.artifacts import GOLDEN_INPUTS_FILE, save_serving_artifacts
+        from src.utils.features import FEATURE_COLUMNS
+
+        rng = np.random.default_rng(3)
+        X = pd.DataFrame(rng.normal(50, 10, size=(80, 13)), columns=FEATURE_COLUMNS)
+        X.iloc[0, 3] = np.nan
+        y = (X["age"] + rng.normal(0, 5, 80) > 50).astype(int)
+        preprocessor = HeartDiseasePreprocessor()
+        model = RandomForestClassifier(n_estimators=10, random_state=0).fit(
+            preprocessor.fit_transform(X), y
+        )
+
+        save_serving_artifacts(model, preprocessor, tmp_path, X)
+        X_golden, expected, probabilities = load_golden_inputs(
+            tmp_path / GOLDEN_INPUTS_FILE
+        )
+        bundle = load_bundle(
+            artifact_paths(
+                model_format,
+                tmp_path / "production_model.pkl",
+                tmp_path / "preprocessor.pkl",
+                tmp_path / "compiled_model",
+            )
+        )
+
+        # Rows with missing values are not valid requests
+        assert len(X_golden) == 20
+        assert not np.isnan(X_golden).any()
+        assert expected is None
+        validate_bundle(bundle, X_golden, expected_probabilities=probabilities)
+
+        with pytest.raises(ValueError, match="do not belong together"):
+            validate_bundle(bundle, X_golden, expected_probabilities=1 - probabilities)
+
+        manifest = json.loads((tmp_path / "manifest.json").read_text())
+        assert set(manifest["files"]) >= {
+            "production_model.pkl",
+            "preprocessor.pkl",
+            "compiled_model/kind.npy",
+            GOLDEN_INPUTS_FILE,
+        }
+
+
+class TestIncrementalUpdate:
+    """Test cases for incremental retraining"""
+
+    @pytest.fixture
+    def partitions(self):
+        from src.utils.features import FEATURE_COLUMNS
+
+        rng = np.random.default_rng(11)
+        X = pd.DataFrame(rng.normal(50, 10, size=(300, 13)), columns=FEATURE_COLUMNS)
+        y = (X["age"] - X["chol"] + rng.normal(0, 5, 300) > 0).astype(int)
+        return X.iloc[:200], y.iloc[:200], X.iloc[200:], y.iloc[200:]
+
+    @staticmethod
+    def fit_base(model, X, y):
+        from src.models.train import build_pipeline
+
+        pipeline = build_pipeline(model).fit(X, y)
+        return (
+            pipeline.named_steps["model"],
+            HeartDiseasePreprocessor.from_pipeline(pipeline),
+        )
+
+    def test_rebase_preserves_predictions(self, partitions):
+        """Test rebasing LR weights onto an updated scaler is exact"""
+        from src.models.incremental import rebase_linear_model, update_scaler
+
+        X_base, y_base, X_new, _ = partitions
+        model, preprocessor = self.fit_base(LogisticRegression(), X_base, y_base)
+        updated = update_scaler(preprocessor, X_new)
+        coef, intercept = rebase_linear_model(
+            model.coef_, model.intercept_, preprocessor.scaler, updated.scaler
+        )
+
+        X_raw = X_new.to_numpy(dtype=np.float64)
+        before = preprocessor.transform_array(X_raw) @ model.coef_.T
+        after = updated.transform_array(X_raw) @ coef.T
+
+        np.testing.assert_allclose(
+            after + intercept, before + model.intercept_, atol=1e-8
+        )
+        assert updated.scaler.n_samples_seen_ == len(X_base) + len(X_new)
+        # The original preprocessor is left untouched
+        assert preprocessor.scaler.n_samples_seen_ == len(X_base)
+
+    def test_logistic_regression_update(self, partitions):
+        """Test an LR update stays a compilable LogisticRegression"""
+        from src.models.incremental import incremental_update
+
+        X_base, y_base, X_new, y_new = partitions
+        model, preprocessor = self.fit_base(LogisticRegression(), X_base, y_base)
+        updated, updated_preprocessor = incremental_update(
+            model, preprocessor, X_new, y_new
+        )
+
+        assert isinstance(updated, LogisticRegression)
+        assert not np.allclose(updated.coef_, model.coef_)
+        compiled = compile_model(updated, updated_preprocessor)
+        X_raw = X_new.to_numpy(dtype=np.float64)
+        np.testing.assert_allclose(
+            compiled.scorer.predict_proba(compiled.preprocessor.transform_array(X_raw)),
+            updated.predict_proba(updated_preprocessor.transform_array(X_raw)),
+            rtol=1e-9,
+        )
+
+    def test_random_forest_grows_trees(self, partitions):
+        """Test an RF update keeps existing trees and the frozen scaler"""
+        from src.models.incremental import incremental_update
+
+        X_base, y_base, X_new, y_new = partitions
+        model, preprocessor = self.fit_base(
+            RandomForestClassifier(n_estimators=10, random_state=42), X_base, y_base
+        )
+        updated, updated_preprocessor = incremental_update(
+            model, preprocessor, X_new, y_new, n_new_trees=5
+        )
+
+        assert len(updated.estimators_) == 15
+        for old, kept in zip(model.estimators_, updated.estimators_):
+            np.testing.assert_array_equal(old.tree_.threshold, kept.tree_.threshold)
+        assert updated.warm_start is False
+        assert updated_preprocessor is preprocessor
+        assert len(model.estimators_) == 10
+
+    @pytest.mark.parametrize(
+        "estimator",
+        [
+            LogisticRegression(),
+            RandomForestClassifier(n_estimators=10, random_state=42),
+        ],
+    )
+    def test_single_class_partition_rejected(self, partitions, estimator):
+        """Test a partition missing a class is refused, not half-applied"""
+        from src.models.incremental import incremental_update
+
+        X_base, y_base, X_new, _ = partitions
+        model, preprocessor = self.fit_base(estimator, X_base, y_base)
+
+        with pytest.raises(ValueError, match="retrain on all data"):
+            incremental_update(
+                model, preprocessor, X_new.iloc[:10], np.ones(10, dtype=int)
+            )
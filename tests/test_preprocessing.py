@@ -122,6 +122,67 @@ class TestHeartDiseasePreprocessor:
         assert X_transformed.isna().sum().sum() == 0
 
 
+class TestCompiledTransform:
+    """Test cases for the NumPy fast path of the preprocessor"""
+
+    @pytest.fixture
+    def fitted(self):
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(50, 4)), columns=["a", "b", "c", "d"])
+        X.iloc[::7, 1] = np.nan
+        preprocessor = HeartDiseasePreprocessor()
+        preprocessor.fit_transform(X)
+        return preprocessor
+
+    def test_matches_dataframe_transform(self, fitted):
+        """Test compiled output matches the DataFrame transform"""
+        X_test = pd.DataFrame(
+            [[0.1, np.nan, -1.0, 2.0], [1.5, 0.3, np.nan, -0.2]],
+            columns=["a", "b", "c", "d"],
+        )
+
+        assert fitted.is_compiled
+        expected = fitted.transform(X_test).to_numpy()
+        result = fitted.transform_array(X_test.to_numpy())
+
+        np.testing.assert_allclose(result, expected, rtol=1e-12, atol=1e-12)
+
+    def test_transform_in_place(self, fitted):
+        """Test the transform can write into the input buffer"""
+        X = np.array([[0.1, np.nan, -1.0, 2.0]])
+        expected = fitted.transform_array(X.copy())
+
+        result = fitted.transform_array(X, out=X)
+
+        assert result is X
+        np.testing.assert_allclose(X, expected)
+
+    def test_compiled_after_load(self, fitted, tmp_path):
+        """Test loading a saved preprocessor compiles the fast path"""
+        filepath = tmp_path / "preprocessor.pkl"
+        fitted.save(filepath)
+
+        loaded = HeartDiseasePreprocessor.load(filepath)
+
+        assert loaded.is_compiled
+        X = np.array([[0.1, 0.2, 0.3, 0.4]])
+        np.testing.assert_allclose(loaded.transform_array(X), fitted.transform_array(X))
+
+    def test_falls_back_for_custom_missing_marker(self):
+        """Test imputers with a non-NaN marker use the DataFrame transform"""
+        from sklearn.impute import SimpleImputer
+
+        X = pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": [4.0, -1.0, 6.0]})
+        preprocessor = HeartDiseasePreprocessor(
+            imputer=SimpleImputer(missing_values=-1.0, strategy="median")
+        )
+        expected = preprocessor.fit_transform(X).to_numpy()
+
+        assert not preprocessor.is_compiled
+        result = preprocessor.transform_array(X.to_numpy())
+        np.testing.assert_allclose(result, expected)
+
+
 class TestLoadAndPreprocessData:
     """Test cases for load_and_preprocess_data function"""
 
@@ -158,3 +219,69 @@ class TestLoadAndPreprocessData:
         assert len(X) == len(y)
         assert "target" not in X.columns
         assert y.isin([0, 1]).all()  # Binary target
+
+
+class TestFeatureSchema:
+    """Test cases for the compact feature dtypes"""
+
+    @pytest.fixture
+    def raw_frame(self):
+        return pd.DataFrame(
+            {
+                "age": [63.0, 67.0],
+                "sex": [1, 0],
+                "cp": [3, 2],
+                "trestbps": [145, 160],
+                "chol": [233, 286],
+                "fbs": [1, 0],
+                "restecg": [0, 2],
+                "thalach": [150, 108],
+                "exang": [0, 1],
+                "oldpeak": [2.3, 1.5],
+                "slope": [0, 2],
+                "ca": [0.0, np.nan],
+                "thal": [1, 2],
+            }
+        )
+
+    def test_apply_feature_schema(self, raw_frame):
+        """Test codes become int8 and measurements float32"""
+        from src.utils.features import apply_feature_schema
+
+        df = apply_feature_schema(raw_frame)
+
+        assert df["sex"].dtype == np.int8
+        assert df["thal"].dtype == np.int8
+        assert df["chol"].dtype == np.float32
+        # Missing codes keep NaN in float32
+        assert df["ca"].dtype == np.float32
+        assert df["ca"].isna().sum() == 1
+
+    def test_schema_rejects_fractional_codes(self, raw_frame):
+        """Test non-integer categorical codes are not silently truncated"""
+        from src.utils.features import apply_feature_schema
+
+        raw_frame["cp"] = [1.5, 2.0]
+
+        with pytest.raises(ValueError, match="cp"):
+            apply_feature_schema(raw_frame)
+
+    def test_float32_preprocessor(self, raw_frame, tmp_path):
+        """Test a float32 preprocessor outputs float32 and keeps it on reload"""
+        preprocessor = HeartDiseasePreprocessor(dtype="float32")
+        X = preprocessor.fit_transform(raw_frame)
+
+        assert set(X.dtypes) == {np.dtype(np.float32)}
+        assert preprocessor.transform(raw_frame).dtypes.iloc[0] == np.float32
+
+        preprocessor.save(tmp_path / "preprocessor.pkl")
+        loaded = HeartDiseasePreprocessor.load(tmp_path / "preprocessor.pkl")
+        result = loaded.transform_array(raw_frame.to_numpy(dtype=np.float64))
+
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, X.to_numpy(), rtol=1e-6)
+
+    def test_invalid_dtype(self):
+        """Test unsupported matrix dtypes are rejected"""
+        with pytest.raises(ValueError):
+            HeartDiseasePreprocessor(dtype="float16")
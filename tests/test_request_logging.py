@@ -0,0 +1,91 @@
+"""
+Unit tests for request logging helpers
+"""
+
+import json
+import logging
+import logging.handlers
+
+import pytest
+
+from src.api.request_logging import (
+    JsonFormatter,
+    RequestLogSampler,
+    configure_logging,
+    parse_sample_rates,
+)
+
+
+class TestJsonFormatter:
+    """Test cases for JsonFormatter"""
+
+    def test_formats_message_and_fields(self):
+        """Test records become JSON objects including structured fields"""
+        record = logging.LogRecord(
+            "api", logging.INFO, __file__, 1, "hi %s", ("x",), None
+        )
+        record.fields = {"route": "/predict", "status": 200}
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "hi x"
+        assert entry["level"] == "INFO"
+        assert entry["route"] == "/predict"
+        assert entry["status"] == 200
+
+
+class TestConfigureLogging:
+    """Test cases for configure_logging"""
+
+    def test_queue_listener_writes_records(self):
+        """Test records are written by the background listener"""
+        records = []
+
+        class ListHandler(logging.Handler):
+            def emit(self, record):
+                records.append(self.format(record))
+
+        logger = logging.getLogger("test_request_logging.queue")
+        logger.propagate = False
+        logger.addHandler(ListHandler())
+
+        listener = configure_logging(logger, json_format=True, use_queue=True)
+        try:
+            assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+            logger.warning("queued")
+        finally:
+            listener.stop()
+
+        assert json.loads(records[0])["message"] == "queued"
+
+
+class TestRequestLogSampler:
+    """Test cases for request log sampling"""
+
+    def test_parse_sample_rates(self):
+        """Test route=rate pairs are parsed and validated"""
+        assert parse_sample_rates("/predict=0.1, /health=0") == {
+            "/predict": 0.1,
+            "/health": 0.0,
+        }
+        assert parse_sample_rates("") == {}
+        with pytest.raises(ValueError):
+            parse_sample_rates("/predict")
+        with pytest.raises(ValueError):
+            parse_sample_rates("/predict=2")
+
+    def test_errors_and_slow_requests_always_logged(self):
+        """Test sampling never drops errors or slow requests"""
+        sampler = RequestLogSampler(default_rate=0.0, slow_threshold=0.5)
+
+        assert not sampler.should_log("/predict", 200, 0.01)
+        assert sampler.should_log("/predict", 422, 0.01)
+        assert sampler.should_log("/predict", 500, 0.01)
+        assert sampler.should_log("/predict", 200, 0.6)
+
+    def test_per_route_rates(self):
+        """Test routes use their own rate and fall back to the default"""
+        sampler = RequestLogSampler(default_rate=1.0, rates={"/health": 0.0})
+
+        assert sampler.should_log("/predict", 200, 0.01)
+        assert not sampler.should_log("/health", 200, 0.01)
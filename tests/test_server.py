@@ -0,0 +1,187 @@
+"""
+Unit tests for the prefork production server
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+from src.api.server import available_cpus, cgroup_cpu_limit, prepare_metrics_dir
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Supervises two workers that record when they start and when they drain;
+# reloads are refused while a "reject" file exists, and the "trigger" file
+# is watched
+SUPERVISOR_SCRIPT = textwrap.dedent(
+    """
+    import os, signal, socket, sys, time
+    from src.api.server import PreforkServer
+
+    out = sys.argv[1]
+
+    def worker(sock):
+        def drain(signum, frame):
+            open(os.path.join(out, f"drained-{os.getpid()}"), "w").close()
+            os._exit(0)
+
+        signal.signal(signal.SIGTERM, drain)
+        open(os.path.join(out, f"started-{os.getpid()}"), "w").close()
+        while True:
+            time.sleep(0.05)
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    def reaped(pid):
+        open(os.path.join(out, f"reaped-{pid}"), "w").close()
+
+    def reload():
+        accepted = not os.path.exists(os.path.join(out, "reject"))
+        mark = "reloaded" if accepted else "rejected"
+        open(os.path.join(out, f"{mark}-{time.monotonic_ns()}"), "w").close()
+        return accepted
+
+    def watch():
+        return os.path.exists(os.path.join(out, "trigger"))
+
+    PreforkServer(
+        sock,
+        2,
+        worker,
+        graceful_timeout=5,
+        on_exit=reaped,
+        reload_fn=reload,
+        watch_fn=watch,
+        watch_interval=0.1,
+    ).run()
+    """
+)
+
+
+def _marks(out, pattern):
+    return sorted(int(p.name.split("-")[1]) for p in out.glob(pattern))
+
+
+def _start_supervisor(out):
+    return subprocess.Popen(
+        [sys.executable, "-c", SUPERVISOR_SCRIPT, str(out)],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT)},
+    )
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.05)
+
+
+class TestAvailableCpus:
+    """Test cases for the cgroup-aware CPU count"""
+
+    def test_cgroup_v2_quota(self, tmp_path):
+        """Test cpu.max quotas are read and rounded up to whole workers"""
+        (tmp_path / "cpu.max").write_text("150000 100000\n")
+
+        assert cgroup_cpu_limit(tmp_path) == 1.5
+        assert available_cpus(tmp_path) == min(2, len(os.sched_getaffinity(0)))
+
+        (tmp_path / "cpu.max").write_text("50000 100000\n")
+        assert available_cpus(tmp_path) == 1
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        """Test the v1 CFS quota is used when there is no cpu.max"""
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000\n")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+
+        assert cgroup_cpu_limit(tmp_path) == 2.0
+
+    def test_unlimited(self, tmp_path):
+        """Test no quota falls back to the CPU affinity mask"""
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+
+        assert cgroup_cpu_limit(tmp_path) is None
+        assert cgroup_cpu_limit(tmp_path / "missing") is None
+        assert available_cpus(tmp_path) == len(os.sched_getaffinity(0))
+
+
+class TestMetricsDir:
+    """Test cases for the shared Prometheus metrics directory"""
+
+    def test_stale_files_removed(self, tmp_path, monkeypatch):
+        """Test metric files of a previous run are cleared and the env is set"""
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+        metrics_dir = tmp_path / "metrics"
+        metrics_dir.mkdir()
+        (metrics_dir / "counter_123.db").write_bytes(b"stale")
+
+        assert prepare_metrics_dir(metrics_dir) == metrics_dir
+        assert list(metrics_dir.iterdir()) == []
+        assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == str(metrics_dir)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork")
+class TestPreforkServer:
+    """Test cases for the worker supervisor"""
+
+    def test_restart_and_graceful_shutdown(self, tmp_path):
+        """Test dead workers are replaced and reported, and SIGTERM drains all"""
+        supervisor = _start_supervisor(tmp_path)
+
+        try:
+            _wait_for(lambda: len(_marks(tmp_path, "started-*")) == 2)
+            killed = _marks(tmp_path, "started-*")[0]
+            os.kill(killed, signal.SIGKILL)
+            _wait_for(lambda: len(_marks(tmp_path, "started-*")) == 3)
+            assert _marks(tmp_path, "reaped-*") == [killed]
+
+            supervisor.send_signal(signal.SIGTERM)
+            assert supervisor.wait(timeout=10) == 0
+        finally:
+            if supervisor.poll() is None:
+                supervisor.kill()
+
+        assert len(_marks(tmp_path, "drained-*")) == 2
+        assert len(_marks(tmp_path, "reaped-*")) == 3
+
+    def test_reload_replaces_workers(self, tmp_path):
+        """Test SIGHUP and watched changes roll the workers after reload_fn"""
+        supervisor = _start_supervisor(tmp_path)
+
+        try:
+            _wait_for(lambda: len(_marks(tmp_path, "started-*")) == 2)
+            original = _marks(tmp_path, "started-*")
+
+            supervisor.send_signal(signal.SIGHUP)
+            _wait_for(lambda: _marks(tmp_path, "drained-*") == original)
+            assert len(_marks(tmp_path, "reloaded-*")) == 1
+            assert len(_marks(tmp_path, "started-*")) == 4
+            _wait_for(lambda: _marks(tmp_path, "reaped-*") == original)
+
+            # A failed reload keeps the current workers
+            (tmp_path / "reject").touch()
+            supervisor.send_signal(signal.SIGHUP)
+            _wait_for(lambda: len(_marks(tmp_path, "rejected-*")) == 1)
+            (tmp_path / "reject").unlink()
+
+            (tmp_path / "trigger").touch()
+            _wait_for(lambda: len(_marks(tmp_path, "started-*")) == 6)
+            assert len(_marks(tmp_path, "reloaded-*")) == 2
+
+            supervisor.send_signal(signal.SIGTERM)
+            assert supervisor.wait(timeout=10) == 0
+        finally:
+            if supervisor.poll() is None:
+                supervisor.kill()
+
+        assert len(_marks(tmp_path, "drained-*")) == 6
@@ -0,0 +1,96 @@
+"""Tests for the synthetic data generator"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.data.synthetic as synthetic
+from src.data.synthetic import SyntheticDataGenerator, generate_dataset
+from src.utils.features import FEATURE_COLUMNS
+
+
+@pytest.fixture
+def generator():
+    rng = np.random.default_rng(3)
+    n = 400
+    y = rng.integers(0, 2, n)
+    X = pd.DataFrame(
+        {
+            "age": rng.normal(50 + 8 * y, 8),
+            "sex": rng.integers(0, 2, n),
+            "cp": rng.integers(0, 4, n),
+            "trestbps": rng.normal(130, 15, n),
+            "chol": rng.normal(240, 40, n),
+            "fbs": rng.integers(0, 2, n),
+            "restecg": rng.integers(0, 3, n),
+            "thalach": rng.normal(150, 20, n),
+            "exang": rng.integers(0, 2, n),
+            "oldpeak": np.abs(rng.normal(1, 1, n)),
+            "slope": rng.integers(0, 3, n),
+            "ca": rng.integers(0, 4, n).astype(float),
+            "thal": rng.integers(1, 4, n),
+        }
+    )
+    # age and thalach move together
+    X["thalach"] = 300 - 2 * X["age"] + rng.normal(0, 5, n)
+    X.loc[X.index[::20], "ca"] = np.nan
+    return SyntheticDataGenerator().fit(X[FEATURE_COLUMNS], y), X, y
+
+
+class TestSyntheticDataGenerator:
+    """Test cases for SyntheticDataGenerator"""
+
+    def test_schema(self, generator):
+        """Test samples follow the feature schema"""
+        gen, _, _ = generator
+        df = gen.sample(1000, np.random.default_rng(0))
+
+        assert list(df.columns) == FEATURE_COLUMNS + ["target"]
+        assert df["sex"].dtype == np.int8
+        assert df["age"].dtype == np.float32
+        # Columns with missing values in the source stay float32 with NaN
+        assert df["ca"].dtype == np.float32
+        assert df["target"].isin([0, 1]).all()
+
+    def test_marginals_and_correlation(self, generator):
+        """Test class means, missing rate and correlation are reproduced"""
+        gen, X, y = generator
+        df = gen.sample(50000, np.random.default_rng(0))
+
+        for label in (0, 1):
+            real = X[y == label]["age"].mean()
+            assert df[df["target"] == label]["age"].mean() == pytest.approx(
+                real, abs=1.0
+            )
+        assert df["target"].mean() == pytest.approx(y.mean(), abs=0.02)
+        assert df["ca"].isna().mean() == pytest.approx(0.05, abs=0.01)
+        assert df["cp"].isin([0, 1, 2, 3]).all()
+        assert df[["age", "thalach"]].corr().iloc[0, 1] < -0.8
+
+    def test_deterministic_for_seed(self, generator, monkeypatch):
+        """Test the same seed gives the same blocks and another seed differs"""
+        gen, _, _ = generator
+        monkeypatch.setattr(synthetic, "BLOCK_ROWS", 300)
+
+        first = pd.concat(gen.iter_blocks(1000, seed=7), ignore_index=True)
+        second = pd.concat(gen.iter_blocks(1000, seed=7), ignore_index=True)
+        other = pd.concat(gen.iter_blocks(1000, seed=8), ignore_index=True)
+
+        assert len(first) == 1000
+        pd.testing.assert_frame_equal(first, second)
+        assert not first.equals(other)
+
+    def test_streams_to_parquet(self, generator, tmp_path, monkeypatch):
+        """Test datasets are written block by block with every row"""
+        gen, _, _ = generator
+        monkeypatch.setattr(synthetic, "BLOCK_ROWS", 256)
+        output = tmp_path / "synthetic.parquet"
+
+        stats = generate_dataset(gen, output, 1000, seed=1)
+        df = pd.read_parquet(output)
+
+        assert stats["rows"] == 1000
+        assert len(df) == 1000
+        pd.testing.assert_frame_equal(
+            df, pd.concat(gen.iter_blocks(1000, seed=1), ignore_index=True)
+        )
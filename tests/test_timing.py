@@ -0,0 +1,90 @@
+"""
+Unit tests for request timing helpers
+"""
+
+import pstats
+
+from prometheus_client import CollectorRegistry, Histogram
+
+from src.api.timing import STAGES, RequestProfiler, StageTimer, stage_histograms
+
+
+class TestStageTimer:
+    """Test cases for StageTimer"""
+
+    def test_laps_accumulate_per_stage(self):
+        """Test each lap charges the time since the previous one"""
+        timer = StageTimer()
+        timer.lap("read_body")
+        timer.lap("parse_validate")
+        timer.durations["infer"] = 2_000_000
+        timer.reset()
+        timer.lap("serialize")
+        serialize = timer.durations["serialize"]
+        timer.lap("serialize")
+
+        assert list(timer.durations) == [
+            "read_body",
+            "parse_validate",
+            "infer",
+            "serialize",
+        ]
+        assert all(duration >= 0 for duration in timer.durations.values())
+        assert timer.durations["serialize"] >= serialize
+
+    def test_server_timing_header(self):
+        """Test stages are reported in milliseconds in recording order"""
+        timer = StageTimer()
+        timer.durations.update({"read_body": 12_000, "infer": 1_500_000})
+
+        assert timer.server_timing() == "read_body;dur=0.012, infer;dur=1.500"
+
+    def test_observe(self):
+        """Test durations are observed in seconds on the bound histograms"""
+        registry = CollectorRegistry()
+        histogram = Histogram(
+            "stage_seconds", "Stage time", ["endpoint", "stage"], registry=registry
+        )
+        histograms = stage_histograms(histogram, "/predict")
+        timer = StageTimer()
+        timer.durations.update({"read_body": 1_000_000, "infer": 3_000_000})
+
+        timer.observe(histograms)
+
+        assert set(histograms) == set(STAGES)
+        labels = {"endpoint": "/predict", "stage": "infer"}
+        assert registry.get_sample_value("stage_seconds_sum", labels) == 0.003
+        labels["stage"] = "parse_validate"
+        assert registry.get_sample_value("stage_seconds_count", labels) == 0
+
+
+class TestRequestProfiler:
+    """Test cases for RequestProfiler"""
+
+    def test_disabled(self, tmp_path):
+        """Test no request is profiled with a zero sample rate"""
+        profiler = RequestProfiler(sample_rate=0.0, output_dir=tmp_path)
+
+        assert not profiler.enabled
+        assert profiler.start() is None
+
+    def test_sampled_request_dumped(self, tmp_path):
+        """Test a sampled request is written as a loadable profile"""
+        profiler = RequestProfiler(sample_rate=1.0, output_dir=tmp_path / "profiles")
+
+        running = profiler.start()
+        sum(range(1000))
+        path = profiler.stop(running, "/predict/batch")
+
+        assert path.parent == tmp_path / "profiles"
+        assert path.name.startswith("predict_batch-")
+        assert pstats.Stats(str(path)).total_calls > 0
+
+    def test_one_profile_at_a_time(self, tmp_path):
+        """Test a request is not profiled while another profile is running"""
+        profiler = RequestProfiler(sample_rate=1.0, output_dir=tmp_path)
+
+        running = profiler.start()
+        assert profiler.start() is None
+        profiler.stop(running, "/predict")
+        assert profiler.start() is not None
@@ -0,0 +1,99 @@
+"""
+Unit tests for asynchronous MLflow logging
+"""
+
+import json
+
+import numpy as np
+import pytest
+from mlflow.tracking import MlflowClient
+from mlflow.utils.mlflow_tags import (
+    MLFLOW_LOGGED_MODELS,
+    MLFLOW_SOURCE_NAME,
+    MLFLOW_USER,
+)
+from sklearn.linear_model import LogisticRegression
+
+from src.models.tracking import AsyncMlflowLogger
+
+
+@pytest.fixture
+def client(tmp_path):
+    """MLflow client backed by a temporary file store"""
+    return MlflowClient(tracking_uri=f"file:{tmp_path / 'mlruns'}")
+
+
+@pytest.fixture
+def experiment_id(client):
+    return client.create_experiment("test")
+
+
+class TestAsyncMlflowLogger:
+    """Test cases for AsyncMlflowLogger"""
+
+    def test_batched_params_metrics_and_nested_runs(self, client, experiment_id):
+        """Test buffered data and context tags are written when runs end"""
+        with AsyncMlflowLogger(experiment_id, client=client) as tracker:
+            parent = tracker.start_run("search")
+            child = tracker.start_run("trial", parent_run_id=parent)
+            tracker.log_params(child, {"C": 0.1, "class_weight": None})
+            tracker.log_metrics(child, {"roc_auc": 0.9})
+            for step, value in enumerate([0.1, 0.2]):
+                tracker.log_metric(child, "fit_seconds", value, step=step)
+            tracker.set_tags(child, {"pruned": False})
+            tracker.end_run(child)
+            tracker.end_run(parent)
+
+        run = client.get_run(child)
+        assert run.data.params == {"C": "0.1", "class_weight": "None"}
+        assert run.data.metrics["roc_auc"] == 0.9
+        assert run.data.tags["pruned"] == "False"
+        assert run.data.tags["mlflow.parentRunId"] == parent
+        assert run.data.tags[MLFLOW_USER]
+        assert run.data.tags[MLFLOW_SOURCE_NAME]
+        assert run.info.status == "FINISHED"
+        history = client.get_metric_history(child, "fit_seconds")
+        assert [m.value for m in sorted(history, key=lambda m: m.step)] == [0.1, 0.2]
+
+    def test_model_logged_in_background(self, client, experiment_id):
+        """Test models are serialized as MLflow artifacts"""
+        model = LogisticRegression().fit(np.random.randn(20, 3), [0, 1] * 10)
+
+        with AsyncMlflowLogger(experiment_id, client=client) as tracker:
+            run_id = tracker.start_run("model")
+            tracker.log_model(run_id, model)
+            tracker.log_model(run_id, model, artifact_path="retrained")
+            tracker.end_run(run_id)
+
+        artifacts = [a.path for a in client.list_artifacts(run_id, "model")]
+        assert "model/MLmodel" in artifacts
+        assert "model/model.pkl" in artifacts
+        history = json.loads(client.get_run(run_id).data.tags[MLFLOW_LOGGED_MODELS])
+        assert [(m["run_id"], m["artifact_path"]) for m in history] == [
+            (run_id, "model"),
+            (run_id, "retrained"),
+        ]
+        assert "sklearn" in history[0]["flavors"]
+
+    def test_write_errors_raised_on_close(self, client, experiment_id):
+        """Test failed background writes are reported"""
+        tracker = AsyncMlflowLogger(experiment_id, client=client)
+        run_id = tracker.start_run("broken")
+        tracker.log_params(run_id, {"C": 1})
+        tracker.log_params(run_id, {"C": 2})
+        tracker.end_run(run_id)
+
+        with pytest.raises(RuntimeError, match="log_batch"):
+            tracker.close()
+
+    def test_open_runs_marked_failed_on_exception(self, client, experiment_id):
+        """Test an exception in the block fails open runs but still flushes"""
+        with pytest.raises(ValueError):
+            with AsyncMlflowLogger(experiment_id, client=client) as tracker:
+                run_id = tracker.start_run("crashed")
+                tracker.log_metrics(run_id, {"roc_auc": 0.5})
+                raise ValueError("training failed")
+
+        run = client.get_run(run_id)
+        assert run.info.status == "FAILED"
+        assert run.data.metrics["roc_auc"] == 0.5